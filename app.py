@@ -1,23 +1,26 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import os
-from datetime import datetime
-from components.heatmaps import display_heatmap, get_available_cameras, get_available_dates, get_intervals
-from components.count_people import get_people_count, get_total_people_count, get_total_entries
-from components.queue_time import get_queue_times
-from components.graficos import show_queue_time_chart
+from datetime import datetime, time, timedelta
+from components.heatmaps import DEFAULT_OPACITY, display_density_heatmap, display_heatmap, get_available_cameras, get_available_dates, get_intervals, has_density, has_raw_detections, shared_scale
+from components.heatmap_engine import COLORMAPS, render_window, seconds_of
+from components.day_snapshot import get_day_snapshot
+from components.metrics_store import FIRST_PERIOD_HOUR
+from components.graficos import queue_time_figure, show_people_chart, show_queue_time_chart, show_total_entries_chart
 from components.utils import format_camera_name
-from components.graficos import show_total_entries_last_15_days_chart
+from components.graficos import show_total_entries_last_15_days_chart, show_entries_by_weekday_chart, show_stores_chart
 from components.export_pdf import generate_daily_report
+from components.report_jobs import submit_reports
+from components.export_range import EXPORTERS
+from components.cache import cache_stats
+from components.comparison import show_comparison
+from components.heatmap_previews import DEFAULT_WIDTH, LEVELS
+from components import anomalies, config, live, overview, profiling, queue_analytics, rollups, stores
 from streamlit_scroll_to_top import scroll_to_here  # scroll automático
-from components.drive_downloader import ensure_camera_data
+from components.drive_downloader import ensure_camera_data, download_status
 
-# --- Diretório base (local ou remoto) ---
-if os.path.exists(r"G:\Meu Drive\Colab Notebooks\data\detections"):
-    BASE_DIR = r"G:\Meu Drive\Colab Notebooks\data\detections"
-else:
-    BASE_DIR = "data/detections"
+# --- Diretório base (Drive montado, pasta local ou espelho do backend remoto; ver components/config.py) ---
+BASE_DIR = config.BASE_DIR
 
 # Cria pasta caso ainda não exista (importante para Streamlit Cloud)
 os.makedirs(BASE_DIR, exist_ok=True)
@@ -26,6 +29,10 @@ os.makedirs(BASE_DIR, exist_ok=True)
 st.set_page_config(page_title="Mapa de Calor - Circulação", layout="wide")
 st.title("Circulação no Estabelecimento")
 
+# --- Medição de desempenho (painel com ?perf=1, log com SMARTAWARE_PROFILE=1) ---
+show_perf_panel = st.query_params.get(profiling.QUERY_PARAM) == "1"
+rerun_timer = profiling.begin_rerun(panel=show_perf_panel)
+
 # --- Ajuste de margens e espaçamento ---
 st.markdown("""
     <style>
@@ -52,28 +59,49 @@ def scroll_bottom():
 # --- FILTROS ---
 st.sidebar.header("🎛️ Filtros")
 
-# 🔹 Garante que há dados de pelo menos uma câmera no diretório
-if not os.listdir(BASE_DIR):
-    st.sidebar.info("⏳ Carregando dados iniciais do Google Drive...")
-    # baixa ao menos os dados da entrada para popular a estrutura
-    ensure_camera_data("camera11", "2025-10-07")  # exemplo inicial
-    st.sidebar.success("✅ Dados iniciais baixados, recarregue a página (Ctrl+R).")
+# 🔹 Loja (o seletor só aparece quando o stores.json tem mais de uma)
+store_options = stores.list_stores()
+store_names = [s.name for s in store_options]
+if len(store_options) > 1:
+    selected_store_name = st.sidebar.selectbox("🏬 Loja", store_names, key="store_selectbox")
+    selected_store = store_options[store_names.index(selected_store_name)]
+else:
+    selected_store = store_options[0]
+store_id = selected_store.store_id
+
+# 🔹 Garante que há dados de pelo menos uma câmera no diretório da loja
+if stores.store_catalog(BASE_DIR, store_id).is_empty():
+    # baixa ao menos os dados da entrada para popular a estrutura (em segundo plano)
+    initial_status = ensure_camera_data(selected_store.entrance_id, "2025-10-07")  # exemplo inicial
+    if initial_status == "pending":
+        st.sidebar.info("⏳ Carregando dados iniciais do Google Drive...")
+    elif initial_status == "complete":
+        st.sidebar.success("✅ Dados iniciais baixados, recarregue a página (Ctrl+R).")
+    else:
+        st.sidebar.warning("⚠️ Não foi possível baixar os dados iniciais do Google Drive.")
+
+# 🔹 Monta o resumo da visão geral e a consolidação de cada dia assim que os dados chegam
+overview.watch_catalog(store_id)
+rollups.watch_catalog(store_id)
 
-# 🔹 Obtém lista de câmeras disponíveis
-cameras = get_available_cameras()
+# 🔹 Obtém lista de câmeras disponíveis da loja
+cameras = get_available_cameras(store_id)
 
 if not cameras:
     st.warning("Nenhuma câmera encontrada. Aguarde o carregamento inicial.")
+    profiling.end_rerun(rerun_timer)
     st.stop()
 
 # 🔹 Ordena câmeras (Entrada primeiro, camera10 por último)
-if "camera11" in cameras:
-    cameras.remove("camera11")
-    cameras.insert(0, "camera11")
+for entrance in reversed(selected_store.entrance_ids):
+    if entrance in cameras:
+        cameras.remove(entrance)
+        cameras.insert(0, entrance)
 
-if "camera10" in cameras:
-    cameras.remove("camera10")
-    cameras.append("camera10")
+last_camera = selected_store.camera_id("camera10")
+if last_camera in cameras:
+    cameras.remove(last_camera)
+    cameras.append(last_camera)
 
 # 🔹 Mapeia nomes técnicos para nomes amigáveis
 camera_labels = [format_camera_name(cam) for cam in cameras]
@@ -87,31 +115,6 @@ selected_label = st.sidebar.selectbox(
 selected_camera = cameras[camera_labels.index(selected_label)]
 
 
-# --- FILTROS ---
-st.sidebar.header("🎛️ Filtros")
-cameras = get_available_cameras()
-
-# 🔹 Garante que 'camera11' (Entrada) venha primeiro e 'camera10' por último
-if "camera11" in cameras:
-    cameras.remove("camera11")
-    cameras.insert(0, "camera11")
-
-if "camera10" in cameras:
-    cameras.remove("camera10")
-    cameras.append("camera10")
-
-# 🔹 Mapeia nomes técnicos para nomes amigáveis
-camera_labels = [format_camera_name(cam) for cam in cameras]
-
-# 🔹 Cria o selectbox mostrando o nome amigável, mas retornando o código real
-selected_label = st.sidebar.selectbox(
-    "📷 Selecionar Câmera",
-    camera_labels,
-    key="camera_selectbox"
-) if cameras else None
-
-selected_camera = cameras[camera_labels.index(selected_label)] if selected_label else None
-
 # --- Datas disponíveis ---
 dates_str = get_available_dates(selected_camera) if selected_camera else []
 dates_available = [datetime.strptime(d, "%Y-%m-%d").date() for d in dates_str]
@@ -129,9 +132,26 @@ else:
     selected_date = None
 
 # --- Garante que os arquivos necessários existam localmente (baixa apenas o essencial) ---
+@st.fragment(run_every=2)
+def wait_for_download(camera_name: str, date_str: str):
+    """Acompanha o download em segundo plano e recarrega a página quando terminar."""
+    if download_status(camera_name, date_str) == "pending":
+        st.info(f"⏳ Baixando dados de {format_camera_name(camera_name)} ({date_str}) do Google Drive...")
+    else:
+        st.rerun()
+
+@st.fragment(run_every=2)
+def wait_for_cameras(camera_names, date_str: str):
+    """Recarrega a comparação quando as câmeras que estavam baixando terminarem."""
+    if any(download_status(name, date_str) == "pending" for name in camera_names):
+        return
+    st.rerun()
+
 if selected_camera and selected_date:
     date_str = selected_date.strftime("%Y-%m-%d")
-    ensure_camera_data(selected_camera, date_str)
+    if ensure_camera_data(selected_camera, date_str) == "pending":
+        with st.sidebar:
+            wait_for_download(selected_camera, date_str)
 
 # --- Intervalos (períodos de tempo) ---
 intervals = get_intervals(selected_camera, selected_date.strftime("%Y-%m-%d")) if selected_camera and selected_date else []
@@ -158,28 +178,297 @@ selected_interval_label = st.sidebar.selectbox(
 selected_interval = values[labels.index(selected_interval_label)]
 is_full_day = selected_interval is None
 
+# --- Janela personalizada (heatmap calculado a partir das detecções brutas) ---
+custom_window = None
+if selected_camera and selected_date and has_raw_detections(selected_camera, selected_date.strftime("%Y-%m-%d")):
+    if st.sidebar.toggle("🎯 Janela personalizada", key="custom_window_toggle"):
+        window_start, window_end = st.sidebar.slider(
+            "🕒 Janela de horário",
+            min_value=time(0, 0),
+            max_value=time(23, 45),
+            value=(time(8, 0), time(20, 0)),
+            step=timedelta(minutes=15),
+            format="HH:mm",
+            key="custom_window_slider"
+        )
+        window_days = st.sidebar.number_input(
+            "📆 Dias (até a data selecionada)", min_value=1, max_value=31, value=1, key="custom_window_days"
+        )
+        custom_window = (window_start, window_end, int(window_days))
+
+# --- Escala do heatmap (quando o dia tem as grades de densidade brutas) ---
+density_options = None
+if selected_camera and selected_date and not custom_window:
+    date_str = selected_date.strftime("%Y-%m-%d")
+    if has_density(selected_camera, date_str, "total" if is_full_day else selected_interval):
+        with st.sidebar.expander("🎨 Escala do heatmap"):
+            cmap = st.selectbox("Cores", list(COLORMAPS), key="density_cmap")
+            normalization_labels = {"Linear": "max", "Logarítmica": "log", "Percentil 99": "percentile"}
+            mode = normalization_labels[st.selectbox("Normalização", list(normalization_labels), key="density_mode")]
+            scale_labels = ["Própria", "Todos os horários do dia", "Mesmo horário, últimos 7 dias"]
+            scale = st.selectbox("Escala", scale_labels, key="density_scale")
+            opacity = st.slider("Opacidade", 0.1, 1.0, DEFAULT_OPACITY, 0.05, key="density_opacity")
+
+        interval_key = "total" if is_full_day else selected_interval
+        if scale == scale_labels[1]:
+            # A grade do dia inteiro soma todos os horários: entra na escala para não saturar
+            day_items = [(date_str, p) for p in intervals] + ([(date_str, interval_key)] if is_full_day else [])
+            vmax = shared_scale(selected_camera, day_items, mode)
+        elif scale == scale_labels[2]:
+            recent = [d for d in get_available_dates(selected_camera) if d <= date_str][-7:]
+            vmax = shared_scale(selected_camera, [(d, interval_key) for d in recent], mode)
+        else:
+            vmax = None
+        density_options = {"cmap": cmap, "mode": mode, "vmax": vmax, "opacity": opacity}
+
+# --- Consolidação em segundo plano (os relatórios leem só os dias consolidados) ---
+def show_rollup_progress(store_id):
+    done, total = rollups.progress(store_id) or (0, 0)
+    text = f"🗄️ Consolidando os dados da loja: {done}/{total} dias" if total else "🗄️ Consolidando os dados da loja..."
+    st.progress(done / total if total else 0.0, text=text)
+
+@st.fragment(run_every=1)
+def wait_for_rollups(store_id, end_date):
+    """Acompanha a consolidação até end_date e recarrega a página quando os dias estiverem prontos."""
+    if rollups.ensure_consolidated(store_id, end_date):
+        st.rerun()
+    show_rollup_progress(store_id)
+
 # --- Botão para gerar relatório (agora logo abaixo dos filtros principais) ---
 st.sidebar.markdown("### 📄 Relatório Diário")
 if selected_date:
     date_str = selected_date.strftime("%Y-%m-%d")
     if st.sidebar.button("📊 Gerar Relatório do Dia"):
-        try:
-            output_path = generate_daily_report(date_str)
-            st.sidebar.success("✅ Relatório gerado com sucesso!")
-            with open(output_path, "rb") as f:
-                st.sidebar.download_button(
-                    label="⬇️ Baixar Relatório PDF",
-                    data=f,
-                    file_name=f"relatorio_{date_str}.pdf",
-                    mime="application/pdf"
-                )
-        except FileNotFoundError:
-            st.sidebar.error("⚠️ Arquivos necessários não encontrados para essa data.")
-        except Exception as e:
-            st.sidebar.error(f"❌ Erro ao gerar relatório: {e}")
+        st.session_state.daily_report = (store_id, date_str)
+    if st.session_state.get("daily_report") == (store_id, date_str):
+        if not rollups.ensure_consolidated(store_id, date_str):
+            with st.sidebar:
+                wait_for_rollups(store_id, date_str)
+        else:
+            del st.session_state.daily_report
+            try:
+                output_path = generate_daily_report(date_str, store_id=store_id)
+                st.sidebar.success("✅ Relatório gerado com sucesso!")
+                with open(output_path, "rb") as f:
+                    st.sidebar.download_button(
+                        label="⬇️ Baixar Relatório PDF",
+                        data=f,
+                        file_name=f"relatorio_{date_str}.pdf" if selected_store.is_default else f"relatorio_{store_id}_{date_str}.pdf",
+                        mime="application/pdf"
+                    )
+            except FileNotFoundError:
+                st.sidebar.error("⚠️ Arquivos necessários não encontrados para essa data.")
+            except Exception as e:
+                st.sidebar.error(f"❌ Erro ao gerar relatório: {e}")
 else:
     st.sidebar.info("Selecione uma data para gerar o relatório.")
 
+# --- Relatórios de vários dias (gerados em paralelo, fora do rerun) ---
+st.sidebar.markdown("### 📚 Relatórios por Período")
+
+def show_report_batch(batch):
+    """Resultado do lote de relatórios concluído: erros e o download."""
+    st.progress(1.0, text=f"📄 {len(batch.dates)}/{len(batch.dates)} relatórios")
+    for date_str, error in sorted(batch.errors().items()):
+        if isinstance(error, FileNotFoundError):
+            st.warning(f"⚠️ {date_str}: arquivos necessários não encontrados.")
+        else:
+            st.error(f"❌ {date_str}: {error}")
+    if batch.results():
+        st.download_button(
+            label="⬇️ Baixar Relatórios (.zip)",
+            data=batch.zip_bytes(),
+            file_name=f"relatorios_{batch.dates[0]}_{batch.dates[-1]}.zip",
+            mime="application/zip",
+            key="download_report_batch"
+        )
+
+@st.fragment(run_every=1)
+def poll_report_batch():
+    """Acompanha o lote em andamento (só existe enquanto há um lote sem terminar)."""
+    batch = st.session_state.get("report_batch")
+    if batch is None or batch.done():
+        # Recarrega a página: o lote concluído é exibido fora do fragmento, sem novas consultas
+        st.rerun()
+    if batch.consolidating():
+        show_rollup_progress(batch.store_id)
+        return
+    done, total = batch.progress()
+    st.progress(done / total if total else 1.0, text=f"📄 {done}/{total} relatórios")
+
+if dates_available:
+    report_range = st.sidebar.date_input(
+        "📅 Intervalo",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date,
+        key="report_range"
+    )
+    if st.sidebar.button("📊 Gerar Relatórios do Período") and len(report_range) == 2:
+        st.session_state.report_batch = submit_reports(report_range[0], report_range[1], store_id)
+    report_batch = st.session_state.get("report_batch")
+    if report_batch is not None:
+        with st.sidebar:
+            if report_batch.done():
+                show_report_batch(report_batch)
+            else:
+                poll_report_batch()
+
+    export_format = st.sidebar.selectbox("🗂️ Formato", list(EXPORTERS), key="export_format")
+    if st.sidebar.button("📦 Exportar Período") and len(report_range) == 2:
+        st.session_state.export_request = (store_id, *report_range, export_format)
+    export_request = st.session_state.get("export_request")
+    if export_request is not None and export_request[0] == store_id:
+        _, export_start, export_end, export_format = export_request
+        end_str = export_end.strftime("%Y-%m-%d")
+        if not rollups.ensure_consolidated(store_id, end_str):
+            with st.sidebar:
+                wait_for_rollups(store_id, end_str)
+        else:
+            del st.session_state.export_request
+            exporter, mime = EXPORTERS[export_format]
+            skipped = []
+            try:
+                with st.spinner("📦 Gerando exportação..."):
+                    export_path = exporter(export_start, export_end, store_id=store_id, skipped=skipped)
+                if skipped:
+                    st.sidebar.warning(f"⚠️ Dias sem dados (fora da exportação): {', '.join(skipped)}")
+                with open(export_path, "rb") as f:
+                    st.sidebar.download_button(
+                        label=f"⬇️ Baixar {export_format}",
+                        data=f.read(),
+                        file_name=os.path.basename(export_path),
+                        mime=mime,
+                        key="download_export_range"
+                    )
+            except FileNotFoundError:
+                st.sidebar.warning("⚠️ Nenhum dia com dados no intervalo selecionado.")
+            except Exception as e:
+                st.sidebar.error(f"❌ Erro ao gerar exportação: {e}")
+
+
+# --- Visão geral (todas as câmeras x períodos, a partir do resumo do dia) ---
+if selected_date and st.sidebar.toggle("🏬 Visão geral da loja", key="overview_toggle"):
+    date_str = selected_date.strftime("%Y-%m-%d")
+    st.subheader(f"🏬 Visão geral - {date_str}")
+    overview.show_overview(date_str, st, store_id)
+
+    profiling.end_rerun(rerun_timer)
+    st.stop()
+
+# --- Comparação entre lojas (lê só as lojas selecionadas) ---
+if selected_date and len(store_options) > 1 and st.sidebar.toggle("🏬 Comparar lojas", key="stores_toggle"):
+    date_str = selected_date.strftime("%Y-%m-%d")
+    compare_store_names = st.sidebar.multiselect("🏬 Lojas", store_names, default=store_names, key="compare_stores")
+    compare_store_ids = [store_options[store_names.index(name)].store_id for name in compare_store_names]
+    for compare_store_id in compare_store_ids:
+        rollups.watch_catalog(compare_store_id)
+    st.subheader(f"🏬 Comparação entre lojas - até {date_str}")
+    show_stores_chart(date_str, st, compare_store_ids)
+
+    profiling.end_rerun(rerun_timer)
+    st.stop()
+
+# --- Comparação de câmeras (mesma data e período, carregadas em paralelo) ---
+compare_cameras = []
+if selected_date and len(cameras) > 1:
+    if st.sidebar.toggle("🧩 Comparar câmeras", key="compare_toggle"):
+        compare_cameras = st.sidebar.multiselect(
+            "📷 Câmeras",
+            cameras,
+            default=[selected_camera] + [cam for cam in cameras if cam != selected_camera][:3],
+            format_func=format_camera_name,
+            key="compare_cameras"
+        )
+
+if selected_date and st.session_state.get("compare_toggle"):
+    date_str = selected_date.strftime("%Y-%m-%d")
+    period_text = "Dia inteiro" if is_full_day else selected_interval_label
+    st.subheader(f"🧩 Comparação - {date_str} - {period_text}")
+    pending_cameras = show_comparison(compare_cameras, date_str, selected_interval, st)
+    if pending_cameras:
+        wait_for_cameras(pending_cameras, date_str)
+
+    profiling.end_rerun(rerun_timer)
+    st.stop()
+
+# --- Modo ao vivo (dia corrente, a partir do log de eventos das câmeras) ---
+live_date = live.today_str()
+live_mode = False
+if selected_camera in live.live_cameras(live_date):
+    st.sidebar.markdown("### 🔴 Ao Vivo")
+    live_mode = st.sidebar.toggle("🔴 Ao vivo (hoje)", key="live_mode_toggle")
+
+@st.fragment(run_every=live.REFRESH_SECONDS)
+def show_live_heatmap(camera_name: str, period):
+    """Heatmap ao vivo: só este bloco é atualizado a cada REFRESH_SECONDS."""
+    img, aggregator = live.live_heatmap(camera_name, period, live_date)
+    if img is None:
+        st.info("⏳ Aguardando as primeiras detecções...")
+        return
+    st.image(img, use_container_width=True)
+    st.caption(f"🔴 {aggregator.events} eventos — atualizado às {datetime.fromtimestamp(aggregator.updated_at):%H:%M:%S}")
+
+@st.fragment(run_every=live.REFRESH_SECONDS)
+def show_live_metrics(camera_name: str, period):
+    """Métricas ao vivo do período (ou do dia) com a variação desde a última atualização."""
+    snapshot = live.live_snapshot(camera_name, live_date)
+    current = {
+        "people": snapshot.people(period),
+        "entries": snapshot.entries(period),
+        **{f"queue{n}": snapshot.queue(n, period) for n in selected_store.queue_numbers},
+    }
+    previous_key = f"live_metrics_{camera_name}_{period}"
+    previous = st.session_state.get(previous_key, {})
+    st.session_state[previous_key] = current
+
+    def delta(key):
+        if current[key] is None or previous.get(key) is None or current[key] == previous[key]:
+            return None
+        return round(current[key] - previous[key], 2)
+
+    def show(v):
+        return "–" if v is None else v
+
+    st.metric("📊 Pessoas no ambiente", show(current["people"]), delta("people"))
+    st.metric("🚶‍♂️ Entradas na loja", show(current["entries"]), delta("entries"))
+    for col, number in zip(st.columns(max(len(selected_store.queue_numbers), 1)), selected_store.queue_numbers):
+        col.metric(f"🕒 Caixa {number} (s)", show(current[f"queue{number}"]), delta(f"queue{number}"), delta_color="inverse")
+
+@st.fragment(run_every=live.REFRESH_SECONDS)
+def show_live_queue_chart():
+    """Gráfico de filas ao vivo, remontado apenas quando chegam eventos novos."""
+    aggregator = live.get_aggregator(selected_store.entrance_id, live_date)
+    aggregator.update()
+    cached = st.session_state.get("live_queue_figure")
+    if cached is None or cached[0] != aggregator.version:
+        fig = queue_time_figure(live_date, live.live_snapshot(selected_store.entrance_id, live_date))
+        cached = (aggregator.version, fig)
+        st.session_state.live_queue_figure = cached
+    if cached[1] is None:
+        st.info("⏳ Nenhum tempo de fila registrado hoje.")
+        return
+    st.plotly_chart(cached[1], use_container_width=True, key="live_queue_chart")
+
+if live_mode:
+    current = live.current_period()
+    live_labels = ["📆 Dia inteiro"] + [period_to_time[p] for p in range(1, (current or 0) + 1)]
+    live_label = st.sidebar.selectbox("⏱️ Horário (ao vivo)", live_labels, key="live_interval_selectbox")
+    live_period = None if live_label == live_labels[0] else live_labels.index(live_label)
+
+    left_col, right_col = st.columns([6, 3])
+    with left_col:
+        st.subheader(f"🔴 {format_camera_name(selected_camera)} - {live_date} - Ao vivo ({live_label})")
+        show_live_heatmap(selected_camera, live_period)
+    with right_col:
+        st.subheader("📊 Agora")
+        show_live_metrics(selected_camera, live_period)
+    st.subheader("🕒 Tempo Médio de Fila por Caixa (hoje)")
+    show_live_queue_chart()
+
+    profiling.end_rerun(rerun_timer)
+    st.stop()
+
 
 
 # --- Layout ---
@@ -188,14 +477,30 @@ left_col, right_col = st.columns([6, 3])
 with left_col:
     if selected_camera and selected_date:
         date_str = selected_date.strftime("%Y-%m-%d")
-        if is_full_day:
-            st.subheader(f"{format_camera_name(selected_camera)} - {date_str} - Dia inteiro")
-            ensure_camera_data(selected_camera, date_str)
-            display_heatmap(selected_camera, date_str, "total")
+        zoom = st.toggle("🔍 Ampliar (resolução original)", key="heatmap_zoom")
+        if custom_window:
+            window_start, window_end, window_days = custom_window
+            days_text = "" if window_days == 1 else f" - últimos {window_days} dias"
+            st.subheader(
+                f"{format_camera_name(selected_camera)} - {date_str} - "
+                f"{window_start.strftime('%H:%M')} – {window_end.strftime('%H:%M')}{days_text}"
+            )
+            img = render_window(selected_camera, date_str, seconds_of(window_start), seconds_of(window_end), window_days)
+            if img:
+                st.image(img, use_container_width=True)
+            else:
+                st.warning("⚠️ Nenhuma detecção encontrada para a janela selecionada.")
         else:
-            st.subheader(f"{format_camera_name(selected_camera)} - {date_str} - Horário {selected_interval_label}")
-            ensure_camera_data(selected_camera, date_str)
-            display_heatmap(selected_camera, date_str, selected_interval)
+            interval_key = "total" if is_full_day else selected_interval
+            period_text = "Dia inteiro" if is_full_day else f"Horário {selected_interval_label}"
+            st.subheader(f"{format_camera_name(selected_camera)} - {date_str} - {period_text}")
+            if density_options:
+                display_density_heatmap(
+                    selected_camera, date_str, interval_key, **density_options,
+                    width=LEVELS[-1] if zoom else DEFAULT_WIDTH
+                )
+            else:
+                display_heatmap(selected_camera, date_str, interval_key, zoom=zoom)
 
         # --- Botão "Ver mais" abaixo do Heatmap ---
         st.markdown("""
@@ -264,13 +569,12 @@ with right_col:
             unsafe_allow_html=True
         )
 
+        # 🔹 Todas as métricas do dia (pessoas, entradas e filas) em uma única leitura
+        snapshot = get_day_snapshot(selected_camera, date_str)
+        snapshot_period = None if is_full_day else selected_interval
+
         # --- Número de pessoas no ambiente ---
-        people_count = None
-        if selected_camera:
-            if is_full_day:
-                people_count = get_total_people_count(selected_camera, date_str)
-            else:
-                people_count = get_people_count(selected_camera, date_str, selected_interval)
+        people_count = snapshot.people(snapshot_period)
 
         st.markdown(
             f"""
@@ -295,11 +599,7 @@ with right_col:
         )
 
         # --- Total de pessoas que entraram na loja ---
-        total_entries = None
-        if is_full_day:
-            total_entries = get_total_entries(date_str)
-        else:
-            total_entries = get_total_entries(date_str, selected_interval)
+        total_entries = snapshot.entries(snapshot_period)
 
         st.markdown(
             f"""
@@ -326,18 +626,17 @@ with right_col:
         )
 
         # --- Tempo médio de fila por caixas ---
-        caixa1, caixa2 = get_queue_times(date_str, None if is_full_day else selected_interval)
+        filas = snapshot.queues(snapshot_period)
         import math
         def fmt(v):
             if v is None or (isinstance(v, float) and math.isnan(v)):
                 return "–"
             return f"{float(v):.2f}"
 
-        v1, v2 = fmt(caixa1), fmt(caixa2)
 
         st.markdown('<div style="font-size: 18px; font-weight: 500; margin-bottom: 10px;">🕒 Tempo médio de fila por caixas (segundos)</div>', unsafe_allow_html=True)
 
-        for i, val in enumerate([v1, v2], start=1):
+        for i, val in zip(stores.store_of(snapshot.camera_name).queue_numbers, map(fmt, filas)):
             st.markdown(f'''
             <div style="display: flex; align-items: center; gap: 8px; margin-bottom: 10px;">
                 <div style="font-size: 18px; font-weight: 500;">Caixa {i}</div>
@@ -356,67 +655,64 @@ with right_col:
             </div>
             ''', unsafe_allow_html=True)
 
+        # 🔹 Distribuição da espera (quando há as passagens pela fila do dia)
+        if snapshot.dwell is not None and not snapshot.dwell.empty:
+            if is_full_day:
+                window = (0, 24 * 3600)
+            else:
+                window_start = (FIRST_PERIOD_HOUR + selected_interval - 1) * 3600
+                window = (window_start, window_start + 3600)
+            queue_stats = queue_analytics.window_stats(snapshot.dwell, *window)
+            for number, row in queue_stats.iterrows():
+                if row["customers"] == 0:
+                    continue
+                st.caption(
+                    f"Caixa {number}: {int(row['customers'])} clientes · "
+                    f"p50 {row['p50']:.0f} s · p90 {row['p90']:.0f} s · p95 {row['p95']:.0f} s · "
+                    f"pico de {int(row['waiting_peak'])} na fila"
+                )
+
+        # 🔹 Picos e períodos fora do padrão (linhas de base mantidas pelas consolidações)
+        st.markdown('<div style="font-size: 18px; font-weight: 500; margin: 10px 0;">⚠️ Fora do padrão</div>', unsafe_allow_html=True)
+        day_rollup = rollups.daily_frame(date_str, date_str, store_id, "entries")
+        if is_full_day and not day_rollup.empty and pd.notna(day_rollup["peak_period"].iloc[0]):
+            peak = day_rollup.iloc[0]
+            st.caption(f"📈 Pico de entradas: {anomalies.period_label(int(peak['peak_period']))} ({peak['peak_value']:.0f})")
+        flagged = rollups.anomaly_frame(date_str, date_str, store_id)
+        flagged = flagged[flagged["camera"].isin(["", selected_camera])]
+        if not is_full_day:
+            flagged = flagged[flagged["period"] == selected_interval]
+        if flagged.empty:
+            st.caption(f"Nada fora do padrão das últimas {anomalies.BASELINE_WEEKS} semanas neste período.")
+        for _, row in flagged.iterrows():
+            st.warning(anomalies.describe(row, format_camera_name), icon="⚠️")
+
 
 # --- Gráficos ---
 if selected_camera and selected_date and st.session_state.show_people_chart:
     date_str = selected_date.strftime("%Y-%m-%d")
+    snapshot = get_day_snapshot(selected_camera, date_str)
 
     # === Gráfico 1: Pessoas no ambiente selecionado ===
-    csv_path = os.path.join(BASE_DIR, selected_camera, date_str, "count", "people_count.csv")
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
-        df_plot = df[df["Período"].str.lower() != "total"]
-        df_plot["Período"] = df_plot["Período"].apply(lambda x: period_to_time.get(int(x), x))
-
-        st.subheader("📈 Fluxo de Pessoas no Ambiente Selecionado")
-        fig1 = px.bar(
-            df_plot,
-            x="Período",
-            y="Número de Pessoas",
-            color="Número de Pessoas",
-            color_continuous_scale="Blues",
-            text="Número de Pessoas",
-            title=f"Fluxo de Pessoas - {selected_camera} ({date_str})"
-        )
-        fig1.update_traces(textposition="outside")
-        fig1.update_layout(xaxis_title="Horário", yaxis_title="Número de Pessoas", title_x=0.5, margin=dict(t=70))
-        st.plotly_chart(fig1, use_container_width=True)
-    else:
-        st.error("Arquivo people_count.csv não encontrado.")
+    st.subheader("📈 Fluxo de Pessoas no Ambiente Selecionado")
+    show_people_chart(selected_camera, date_str, st, snapshot)
 
     # === Gráfico 2: Total de Pessoas que Entraram no Estabelecimento ===
-    total_csv_path = os.path.join(BASE_DIR, "camera11", date_str, "count", "people_total.csv")
-    if os.path.exists(total_csv_path):
-        df_total = pd.read_csv(total_csv_path)
-        df_total.columns = df_total.columns.str.strip()
-        df_total_plot = df_total[df_total["Período"].str.lower() != "total"]
-        df_total_plot["Período"] = df_total_plot["Período"].apply(lambda x: period_to_time.get(int(x), x))
-
-        st.subheader("📊 Total de Pessoas que Entraram no Estabelecimento")
-        fig2 = px.bar(
-            df_total_plot,
-            x="Período",
-            y="Entradas",
-            color="Entradas",
-            color_continuous_scale="Greens",
-            text="Entradas",
-            title=f"Entradas no Estabelecimento ({date_str})"
-        )
-        fig2.update_traces(textposition="outside")
-        fig2.update_layout(xaxis_title="Horário", yaxis_title="Número de Entradas", title_x=0.5, margin=dict(t=90))
-        st.plotly_chart(fig2, use_container_width=True)
-    else:
-        st.warning("Arquivo people_total.csv não encontrado.")
+    st.subheader("📊 Total de Pessoas que Entraram no Estabelecimento")
+    show_total_entries_chart(date_str, st, snapshot, store_id)
 
     # === Gráfico 3: Tempo Médio de Fila por Caixa ===
     st.subheader("🕒 Comparativo de Tempo Médio de Fila por Caixa")
-    show_queue_time_chart(date_str, st)
+    show_queue_time_chart(date_str, st, snapshot, store_id)
 
 
     # === Gráfico 4: Entradas por Dia (últimos 15 dias) ===
     st.subheader("📅 Evolução de Entradas nos Últimos 15 Dias")
-    show_total_entries_last_15_days_chart(date_str, st)
+    show_total_entries_last_15_days_chart(date_str, st, store_id)
+
+    # === Gráfico 5: Entradas por dia da semana (últimos 90 dias) ===
+    st.subheader("📆 Entradas por Dia da Semana")
+    show_entries_by_weekday_chart(date_str, st, store_id=store_id)
 
 
 
@@ -424,3 +720,16 @@ if selected_camera and selected_date and st.session_state.show_people_chart:
     if st.session_state.scroll_to_bottom:
         scroll_to_here(0, key="bottom")
         st.session_state.scroll_to_bottom = False
+
+# --- Painel de desempenho (oculto; aparece com ?perf=1 na URL) ---
+profiling.end_rerun(rerun_timer)
+if show_perf_panel:
+    with st.sidebar.expander("⏱️ Desempenho deste rerun", expanded=True):
+        profiling.show_panel(rerun_timer, st)
+        # 🔹 Cache compartilhado por todas as sessões (acertos e pedidos simultâneos coalescidos)
+        stats = cache_stats()
+        st.caption(
+            f"Cache do processo: {stats['hit_rate']:.0%} acertos · "
+            f"{stats['coalesced']} pedidos coalescidos ({stats['coalesce_rate']:.0%} dos cálculos) · "
+            f"{stats['inflight']} em andamento"
+        )
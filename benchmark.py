@@ -0,0 +1,342 @@
+# benchmark.py
+"""Benchmark dos caminhos de dados do dashboard sobre uma árvore sintética (resultado em JSON)."""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import streamlit as st
+from streamlit import config as st_config
+from streamlit.logger import set_log_level
+
+from components import cache, catalog, export_pdf, export_range, figure_cache, heatmap_engine, heatmap_previews, heatmaps, metrics_store, overview, queue_analytics, rollups, stores
+from components.count_people import get_people_count, get_total_entries
+from components.day_snapshot import get_day_snapshot
+from components.graficos import show_total_entries_last_15_days_chart
+from components.heatmaps import display_heatmap, get_available_cameras, get_available_dates, get_intervals
+from components.queue_time import get_queue_times
+
+# Câmera da entrada: é a que tem people_total.csv e os CSVs de fila
+ENTRANCE_CAMERA = "camera11"
+
+# Quantidade de imagens diferentes usadas para compor os PNGs sintéticos
+IMAGE_TEMPLATES = 8
+
+
+# --- Geração da árvore sintética ---
+def camera_names(count: int):
+    """Nomes das câmeras geradas (a entrada sempre incluída)."""
+    others = [f"camera{i}" for i in range(1, count + 20) if f"camera{i}" != ENTRANCE_CAMERA]
+    return [ENTRANCE_CAMERA] + others[:max(0, count - 1)]
+
+
+def _image_templates(size, rng: np.random.Generator):
+    """PNGs (bytes) com manchas gaussianas, parecidos com os heatmaps reais."""
+    width, height = size
+    yy, xx = np.mgrid[0:height, 0:width]
+    templates = []
+    for _ in range(IMAGE_TEMPLATES):
+        grid = np.zeros((height, width), dtype=np.float32)
+        for _ in range(6):
+            cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+            radius = rng.uniform(0.03, 0.12) * width
+            grid += np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * radius ** 2)).astype(np.float32)
+        buffer = io.BytesIO()
+        heatmap_engine.colorize(grid).save(buffer, format="PNG")
+        templates.append(buffer.getvalue())
+    return templates
+
+
+def _write_csv(path: str, header: str, rows, total=None):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for period, value in rows:
+            f.write(f"{period},{value}\n")
+        if total is not None:
+            f.write(f"Total,{total}\n")
+
+
+def generate_tree(root: str, cameras: int, days: int, intervals: int, end_date: str,
+                  image_size=(1280, 720), points: int = 0, grids: bool = False, seed: int = 42):
+    """
+    Cria <root>/<câmera>/<data>/{count,queue,heatmaps[,points]} para 'days'
+    dias terminando em end_date. Retorna as câmeras e datas geradas.
+    """
+    rng = np.random.default_rng(seed)
+    py_rng = random.Random(seed)
+    templates = _image_templates(image_size, rng)
+    last = date.fromisoformat(end_date)
+    dates = [(last - timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)]
+    names = camera_names(cameras)
+
+    for camera_name in names:
+        for date_str in dates:
+            day_dir = os.path.join(root, camera_name, date_str)
+            for sub in ("count", "heatmaps"):
+                os.makedirs(os.path.join(day_dir, sub), exist_ok=True)
+
+            people = [py_rng.randint(0, 40) for _ in range(intervals)]
+            _write_csv(os.path.join(day_dir, "count", "people_count.csv"), "Período,Número de Pessoas",
+                       enumerate(people, 1), sum(people))
+
+            for period in range(1, intervals + 1):
+                with open(os.path.join(day_dir, "heatmaps", f"heatmap_interval_{period}.png"), "wb") as f:
+                    f.write(templates[py_rng.randrange(IMAGE_TEMPLATES)])
+            with open(os.path.join(day_dir, "heatmaps", "heatmap_total.png"), "wb") as f:
+                f.write(templates[py_rng.randrange(IMAGE_TEMPLATES)])
+            if grids:
+                cells = (image_size[1] // heatmap_engine.CELL_SIZE, image_size[0] // heatmap_engine.CELL_SIZE)
+                for stem in [f"heatmap_interval_{p}" for p in range(1, intervals + 1)] + ["heatmap_total"]:
+                    np.save(os.path.join(day_dir, "heatmaps", f"{stem}.npy"), rng.gamma(0.5, 1.0, cells).astype(np.float32))
+
+            if camera_name == ENTRANCE_CAMERA:
+                entries = [py_rng.randint(0, 30) for _ in range(intervals)]
+                _write_csv(os.path.join(day_dir, "count", "people_total.csv"), "Período,Entradas",
+                           enumerate(entries, 1), sum(entries))
+                os.makedirs(os.path.join(day_dir, "queue"), exist_ok=True)
+                for queue_number in stores.get_store(stores.DEFAULT_STORE).queue_numbers:
+                    waits = [f"{py_rng.uniform(5, 120):.2f}" for _ in range(intervals)]
+                    _write_csv(os.path.join(day_dir, "queue", f"queue_time{queue_number}.csv"),
+                               "Período,Tempo Médio (s)", enumerate(waits, 1))
+
+            if points:
+                os.makedirs(os.path.join(day_dir, "points"), exist_ok=True)
+                t = np.sort(rng.uniform(8 * 3600, 20 * 3600, points))
+                xy = rng.uniform((0, 0), image_size, (points, 2))
+                np.save(os.path.join(day_dir, "points", "detections.npy"),
+                        np.column_stack([t, xy]).astype(np.float32))
+
+    return names, dates
+
+
+# --- Configuração dos componentes ---
+def configure(data_dir: str, state_dir: str):
+    """Aponta os componentes para a árvore sintética e para uma pasta de estado própria."""
+    for module in (catalog, export_pdf, heatmap_engine, heatmaps, metrics_store, overview, queue_analytics):
+        module.BASE_DIR = data_dir
+    catalog.CATALOG_DIR = os.path.join(state_dir, "catalog")
+    metrics_store.STORE_DIR = os.path.join(state_dir, "metrics")
+    heatmap_previews.PREVIEW_DIR = os.path.join(state_dir, "cache", "heatmaps")
+    figure_cache.FIGURES_DIR = os.path.join(state_dir, "cache", "figures")
+    export_pdf.REPORTS_DIR = os.path.join(state_dir, "reports")
+    export_range.EXPORTS_DIR = os.path.join(state_dir, "exports")
+    overview.SUMMARY_DIR = os.path.join(state_dir, "summaries")
+    rollups.ROLLUP_DIR = os.path.join(state_dir, "rollups")
+
+
+def reset_state(state_dir: str):
+    """Estado "frio": sem cache em memória, catálogo, bancos, prévias ou relatórios."""
+    cache.clear_cache()
+    metrics_store.close_all()
+    rollups.close_all()
+    with catalog._catalogs_lock:
+        for item in catalog._catalogs.values():
+            item.stop(wait=True)
+        catalog._catalogs.clear()
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.makedirs(state_dir, exist_ok=True)
+
+
+# --- Cenários ---
+def scenarios(names, dates, intervals: int, points: int, grids: bool = False, viewers: int = 0):
+    """
+    {nome: função} com o trabalho que o dashboard faz para cada ponto de
+    entrada ao abrir a data mais recente.
+    """
+    camera_name = names[-1]
+    date_str = dates[-1]
+    periods = range(1, intervals + 1)
+
+    def sidebar_listing():
+        for cam in get_available_cameras():
+            cam_dates = get_available_dates(cam)
+            if cam_dates:
+                get_intervals(cam, cam_dates[-1])
+
+    def people_count():
+        for cam in names:
+            for period in periods:
+                get_people_count(cam, date_str, period)
+        get_total_entries(date_str)
+
+    def queue_times():
+        get_queue_times(date_str)
+        for period in periods:
+            get_queue_times(date_str, period)
+
+    def heatmap():
+        display_heatmap(camera_name, date_str, 1)
+
+    def entries_15_days():
+        # O que o listener do catálogo consolida antes (só o que é novo, quando quente)
+        rollups.update()
+        show_total_entries_last_15_days_chart(date_str, st.empty())
+
+    def daily_report():
+        rollups.update(start_date=date_str, end_date=date_str)
+        export_pdf.generate_daily_report(date_str)
+
+    result = {
+        "sidebar_listing": sidebar_listing,
+        "get_people_count": people_count,
+        "get_queue_times": queue_times,
+        "display_heatmap": heatmap,
+        "show_total_entries_last_15_days_chart": entries_15_days,
+        "generate_daily_report": daily_report,
+    }
+    if grids:
+        def density_shared_scale():
+            vmax = heatmaps.shared_scale(camera_name, [(date_str, p) for p in periods], "max")
+            heatmaps.render_density(camera_name, date_str, 1, "viridis", "max", vmax)
+
+        result["render_density"] = density_shared_scale
+    if viewers:
+        def concurrent_viewers():
+            # 'viewers' sessões abrindo a mesma visão ao mesmo tempo
+            barrier = threading.Barrier(viewers)
+
+            def view():
+                barrier.wait()
+                get_day_snapshot(camera_name, date_str)
+                display_heatmap(camera_name, date_str, 1)
+                show_total_entries_last_15_days_chart(date_str, st.empty())
+
+            threads = [threading.Thread(target=view) for _ in range(viewers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        result["concurrent_viewers"] = concurrent_viewers
+    if points:
+        result["render_window"] = lambda: heatmap_engine.render_window(
+            camera_name, date_str, 10 * 3600 + 15 * 60, 10 * 3600 + 45 * 60, days=min(7, len(dates))
+        )
+    return result
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(names, dates, intervals: int, state_dir: str, repeat: int, points: int = 0, only=None, grids: bool = False, viewers: int = 0):
+    """Mede cada cenário: uma execução fria e 'repeat' execuções quentes."""
+    results = []
+    for name, fn in scenarios(names, dates, intervals, points, grids, viewers).items():
+        if only and name not in only:
+            continue
+        reset_state(state_dir)
+        before = cache.cache_stats()
+        cold = _timed(fn)
+        warm = [_timed(fn) for _ in range(repeat)]
+        after = cache.cache_stats()
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        coalesced = after["coalesced"] - before["coalesced"]
+        results.append({
+            "name": name,
+            "cold_s": round(cold, 6),
+            "warm": {
+                "runs": repeat,
+                "min_s": round(min(warm), 6) if warm else None,
+                "median_s": round(statistics.median(warm), 6) if warm else None,
+                "mean_s": round(statistics.fmean(warm), 6) if warm else None,
+                "max_s": round(max(warm), 6) if warm else None,
+            },
+            "cache": {
+                "hits": hits,
+                "misses": misses,
+                "coalesced": coalesced,
+                "entries": after["entries"],
+                "bytes": after["bytes"],
+            },
+        })
+    reset_state(state_dir)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos de dados do dashboard.")
+    parser.add_argument("--cameras", type=int, default=3, help="número de câmeras (inclui camera11)")
+    parser.add_argument("--days", type=int, default=30, help="dias por câmera")
+    parser.add_argument("--intervals", type=int, default=12, help="intervalos (períodos) por dia")
+    parser.add_argument("--end-date", default="2025-10-31", help="último dia gerado (YYYY-MM-DD)")
+    parser.add_argument("--image-size", default="1280x720", help="tamanho dos PNGs, LARGURAxALTURA")
+    parser.add_argument("--points", type=int, default=0, help="detecções brutas por dia (0 = sem points/)")
+    parser.add_argument("--grids", action="store_true", help="grava as grades de densidade (.npy) ao lado dos PNGs")
+    parser.add_argument("--viewers", type=int, default=0, help="sessões simultâneas abrindo a mesma visão (0 = sem o cenário)")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções quentes por cenário")
+    parser.add_argument("--only", nargs="*", help="roda apenas os cenários indicados")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="pasta de trabalho (padrão: temporária, apagada no fim)")
+    parser.add_argument("--keep", action="store_true", help="não apaga a pasta de trabalho")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    # Fora do "streamlit run" os st.* só geram avisos de contexto ausente
+    st_config.get_config_options()
+    set_log_level("error")
+
+    width, height = (int(v) for v in args.image_size.lower().split("x"))
+    workdir = args.workdir or tempfile.mkdtemp(prefix="smartaware-bench-")
+    data_dir = os.path.join(workdir, "detections")
+    state_dir = os.path.join(workdir, "state")
+
+    try:
+        start = time.perf_counter()
+        names, dates = generate_tree(
+            data_dir, args.cameras, args.days, args.intervals, args.end_date,
+            image_size=(width, height), points=args.points, grids=args.grids, seed=args.seed,
+        )
+        generate_seconds = time.perf_counter() - start
+
+        configure(data_dir, state_dir)
+        results = run(names, dates, args.intervals, state_dir, args.repeat, args.points, args.only, args.grids, args.viewers)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "config": {
+            "cameras": args.cameras,
+            "days": args.days,
+            "intervals": args.intervals,
+            "end_date": args.end_date,
+            "image_size": [width, height],
+            "points": args.points,
+            "grids": args.grids,
+            "repeat": args.repeat,
+            "viewers": args.viewers,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "generate_s": round(generate_seconds, 3),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
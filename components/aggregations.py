@@ -0,0 +1,185 @@
+# components/aggregations.py
+"""Agregações de vários dias (por dia, dia da semana ou horário) lidas das consolidações de cada loja."""
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from components import metrics_store, rollups, stores
+
+# Métrica exibida -> (métrica da consolidação, coluna da consolidação diária)
+METRICS = {
+    "Entradas": ("entries", "total"),
+    "Pessoas": ("people", "total"),
+}
+
+# Métricas de contagem são somadas; tempos de fila (uma coluna por caixa) são médias
+COUNT_METRICS = ["Entradas", "Pessoas"]
+
+WEEKDAYS = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+
+def _as_date_str(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def queue_metric(number: int):
+    """Métrica exibida do tempo de fila de um caixa."""
+    return f"Fila Caixa {number} (s)"
+
+
+def queue_metrics(store_ids):
+    """Métricas exibidas dos tempos de fila dos caixas das lojas, na ordem dos caixas."""
+    numbers = {n for store_id in store_ids for n in stores.get_store(store_id).queue_numbers}
+    return [queue_metric(n) for n in sorted(numbers)]
+
+
+def _label(metric: str):
+    if metric.startswith("queue"):
+        return queue_metric(int(metric[len("queue"):]))
+    return next((label for label, (name, _) in METRICS.items() if name == metric), None)
+
+
+def _camera_of(store, metric: str, camera: str):
+    """Câmera a que uma linha da consolidação da loja é atribuída."""
+    if camera:
+        return camera
+    if metric == "entries":
+        return store.entrance_id
+    return store.checkout_id(int(metric[len("queue"):]))
+
+
+def _camera_rows(cameras, read, index: str, column: str):
+    """
+    Lê a consolidação de cada loja das câmeras pedidas (read(loja) ->
+    DataFrame) e devolve uma linha por (index, câmera) com as métricas exibidas.
+    """
+    if cameras is None:
+        cameras = stores.camera_ids(metrics_store.BASE_DIR)
+    wanted = {}
+    for camera_name in cameras:
+        wanted.setdefault(stores.split(camera_name)[0], set()).add(camera_name)
+
+    frames = []
+    for store_id, store_cameras in wanted.items():
+        store = stores.get_store(store_id)
+        df = read(store_id)
+        if df.empty:
+            continue
+        df["camera"] = [_camera_of(store, m, c) for m, c in zip(df["metric"], df["camera"])]
+        frames.append(df[df["camera"].isin(store_cameras)])
+
+    labels = [*METRICS, *queue_metrics(wanted)]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if df.empty:
+        return pd.DataFrame(columns=[column, "Câmera", *labels])
+    df["label"] = df["metric"].map(_label)
+    df["value"] = [row.mean if row.metric.startswith("queue") else row.total for row in df.itertuples()]
+    df = df.pivot(index=[index, "camera"], columns="label", values="value").reindex(columns=labels)
+    df.columns.name = None
+    df = df.reset_index().rename(columns={index: column, "camera": "Câmera"})
+    return df.sort_values([column, "Câmera"], ignore_index=True)
+
+
+def daily_totals(start_date, end_date, cameras=None):
+    """
+    Uma linha por (data, câmera) com Entradas, Pessoas e o tempo médio de fila
+    dos caixas. Métricas que a câmera não produz ficam como NaN.
+    """
+    start_date, end_date = _as_date_str(start_date), _as_date_str(end_date)
+    return _camera_rows(cameras, lambda store_id: rollups.daily_frame(start_date, end_date, store_id), "date", "Data")
+
+
+def _by_weekday(df, key: str, count_metrics):
+    queue_columns = [c for c in df.columns if c.startswith("Fila Caixa")]
+    columns = ["Dia da Semana", key, "Dias"] + [f"{m} (total)" for m in count_metrics] \
+        + [f"{m} (média)" for m in count_metrics] + queue_columns
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    df["weekday"] = pd.to_datetime(df["Data"]).dt.weekday
+    grouped = df.groupby(["weekday", key])
+    result = pd.DataFrame({"Dias": grouped["Data"].nunique()})
+    for metric in count_metrics:
+        result[f"{metric} (total)"] = grouped[metric].sum(min_count=1)
+        result[f"{metric} (média)"] = grouped[metric].mean()
+    for metric in queue_columns:
+        result[metric] = grouped[metric].mean()
+    result = result.reset_index()
+    result.insert(0, "Dia da Semana", result["weekday"].map(lambda w: WEEKDAYS[w]))
+    return result.drop(columns="weekday")[columns]
+
+
+def weekday_totals(start_date, end_date, cameras=None):
+    """
+    Agrega por dia da semana: soma e média diária das contagens e média dos
+    tempos de fila. 'Dias' é o número de datas com dados em cada dia da semana.
+    """
+    return _by_weekday(daily_totals(start_date, end_date, cameras), "Câmera", COUNT_METRICS)
+
+
+def hourly_totals(start_date, end_date, cameras=None):
+    """
+    Agrega por período do dia (1 = 08:00–09:00, ...): soma das contagens e
+    média dos tempos de fila ao longo de todas as datas do intervalo.
+    """
+    start_date, end_date = _as_date_str(start_date), _as_date_str(end_date)
+    return _camera_rows(cameras, lambda store_id: rollups.period_frame(start_date, end_date, store_id), "period", "Período")
+
+
+def store_totals(start_date, end_date, store_ids=None):
+    """
+    Uma linha por (data, loja) com as Entradas (soma das câmeras de entrada) e
+    o tempo médio de fila de cada caixa (da câmera configurada para ele).
+    Só as consolidações das lojas pedidas são lidas.
+    """
+    start_date, end_date = _as_date_str(start_date), _as_date_str(end_date)
+    store_ids = store_ids or [s.store_id for s in stores.list_stores()]
+    frames = []
+    for store_id in store_ids:
+        store = stores.get_store(store_id)
+        daily = rollups.daily_frame(start_date, end_date, store_id)
+        daily = daily[daily["camera"] == ""]
+        if daily.empty:
+            continue
+        df = pd.DataFrame({
+            "Entradas": daily[daily["metric"] == "entries"].set_index("date")["total"],
+            **{
+                queue_metric(number): daily[daily["metric"] == f"queue{number}"].set_index("date")["mean"]
+                for number in store.queue_numbers
+            },
+        })
+        df.index.name = "Data"
+        df = df.reset_index()
+        df.insert(1, "Loja", store.name)
+        frames.append(df)
+
+    columns = ["Data", "Loja", "Entradas", *queue_metrics(store_ids)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True).reindex(columns=columns)
+    return df.sort_values(["Data", "Loja"], ignore_index=True)
+
+
+def store_weekday_totals(start_date, end_date, store_ids=None):
+    """Como weekday_totals, por loja (Entradas somadas entre as câmeras de entrada)."""
+    return _by_weekday(store_totals(start_date, end_date, store_ids), "Loja", ["Entradas"])
+
+
+def aggregate(start_date, end_date, cameras=None, by: str = "day"):
+    """Ponto de entrada único: by = 'day', 'weekday' ou 'hour'."""
+    if by == "day":
+        return daily_totals(start_date, end_date, cameras)
+    if by == "weekday":
+        return weekday_totals(start_date, end_date, cameras)
+    if by == "hour":
+        return hourly_totals(start_date, end_date, cameras)
+    raise ValueError(f"Agrupamento inválido: {by}")
+
+
+def date_window(end_date, days: int):
+    """Retorna (início, fim) de uma janela de 'days' dias terminando em end_date."""
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    return (end_date - timedelta(days=days - 1)).strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
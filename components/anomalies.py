@@ -0,0 +1,278 @@
+# components/anomalies.py
+"""Períodos fora do padrão, comparados com linhas de base incrementais por dia da semana e período."""
+import datetime
+import math
+
+from components.metrics_store import FIRST_PERIOD_HOUR, TOTAL_PERIOD
+
+# Semanas (do mesmo dia da semana) na linha de base de cada período
+BASELINE_WEEKS = 8
+
+# Valores mínimos na linha de base para um período poder ser sinalizado
+MIN_HISTORY = 4
+
+# Desvios-padrão a partir dos quais o valor é sinalizado
+Z_THRESHOLD = 3.5
+
+# Desvio mínimo em segundos dos tempos de fila (e fração da média, se maior)
+QUEUE_STD_FLOOR = 10.0
+QUEUE_STD_RATIO = 0.25
+
+# Peso (em semanas) do ruído esperado da métrica na variância da janela
+PRIOR_WEEKS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS baselines (
+    metric TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    weekday INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    PRIMARY KEY (metric, camera, weekday, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS baseline_values (
+    metric TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    weekday INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric, camera, weekday, period, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS baseline_values_date ON baseline_values (date);
+CREATE TABLE IF NOT EXISTS anomalies (
+    date TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    value REAL NOT NULL,
+    expected REAL NOT NULL,
+    std REAL NOT NULL,
+    z REAL NOT NULL,
+    PRIMARY KEY (date, metric, camera, period)
+) WITHOUT ROWID;
+"""
+
+TABLES = ("baselines", "baseline_values", "anomalies")
+
+METRIC_LABELS = {"entries": "Entradas", "people": "Pessoas"}
+
+
+def metric_label(metric: str):
+    """Nome da métrica para exibição (queue<N> -> 'Fila Caixa N')."""
+    if metric.startswith("queue"):
+        return f"Fila Caixa {metric[len('queue'):]}"
+    return METRIC_LABELS.get(metric, metric)
+
+
+def _spread(metric: str, count: int, mean: float, m2: float):
+    """
+    Desvio usado no z. A variância da janela é puxada para o ruído esperado da
+    métrica (o de uma contagem, √média, ou uma fração do tempo médio de fila)
+    com peso de PRIOR_WEEKS semanas e alargada para poucas semanas (intervalo
+    de predição): algumas semanas quase iguais não fazem qualquer variação
+    virar anomalia, nem 3 entradas contra uma média de 0,5.
+    """
+    if metric.startswith("queue"):
+        noise = max(QUEUE_STD_FLOOR, QUEUE_STD_RATIO * abs(mean))
+    else:
+        noise = max(1.0, math.sqrt(abs(mean)))
+    variance = (m2 + PRIOR_WEEKS * noise ** 2) / (count - 1 + PRIOR_WEEKS)
+    return max(math.sqrt(variance * (1 + 1 / count)), noise)
+
+
+# --- Estatística de Welford com remoção ---
+def _add(count, mean, m2, value):
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def _remove(count, mean, m2, value):
+    if count <= 1:
+        return 0, 0.0, 0.0
+    new_mean = (count * mean - value) / (count - 1)
+    m2 -= (value - new_mean) * (value - mean)
+    return count - 1, new_mean, max(m2, 0.0)
+
+
+# --- Células da linha de base ---
+def _get_cell(conn, key):
+    row = conn.execute(
+        "SELECT count, mean, m2 FROM baselines WHERE metric = ? AND camera = ? AND weekday = ? AND period = ?", key
+    ).fetchone()
+    return row if row else (0, 0.0, 0.0)
+
+
+def _put_cell(conn, key, stats):
+    if stats[0] == 0:
+        conn.execute("DELETE FROM baselines WHERE metric = ? AND camera = ? AND weekday = ? AND period = ?", key)
+    else:
+        conn.execute("INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?, ?, ?, ?)", (*key, *stats))
+
+
+def _score(metric: str, camera: str, period: int, date_str: str, value: float, stats):
+    """Linha de anomalia do valor contra (contagem, média, m2) da linha de base, ou None."""
+    count, mean, m2 = stats
+    if count < MIN_HISTORY:
+        return None
+    std = _spread(metric, count, mean, m2)
+    z = (value - mean) / std
+    if abs(z) < Z_THRESHOLD:
+        return None
+    return (date_str, metric, camera, period, value, round(mean, 2), round(std, 2), round(z, 2))
+
+
+def _observe(conn, metric: str, camera: str, period: int, weekday: int, date_str: str, value: float):
+    """
+    Compara o valor de um dia mais novo que toda a janela com a linha de base
+    e o coloca na janela; retorna a linha de anomalia ou None.
+    """
+    key = (metric, camera, weekday, period)
+    stats = _get_cell(conn, key)
+    anomaly = _score(metric, camera, period, date_str, value, stats)
+    conn.execute("INSERT INTO baseline_values VALUES (?, ?, ?, ?, ?, ?)", (*key, date_str, value))
+    stats = _add(*stats, value)
+    if stats[0] > BASELINE_WEEKS:
+        # Sai o valor mais antigo da janela
+        old_date, old_value = conn.execute(
+            "SELECT date, value FROM baseline_values WHERE metric = ? AND camera = ? AND weekday = ? AND period = ? "
+            "ORDER BY date LIMIT 1",
+            key,
+        ).fetchone()
+        conn.execute(
+            "DELETE FROM baseline_values WHERE metric = ? AND camera = ? AND weekday = ? AND period = ? AND date = ?",
+            (*key, old_date),
+        )
+        stats = _remove(*stats, old_value)
+    _put_cell(conn, key, stats)
+    return anomaly
+
+
+def _day_values(daily, hourly):
+    """(métrica, câmera, período, valor) de um dia a partir das linhas daily e hourly."""
+    values = [(metric, camera, period, value) for _, metric, camera, period, value in hourly]
+    for _, metric, camera, total, mean, _, _, _ in daily:
+        # Dia inteiro: total das contagens, média dos tempos de fila
+        value = mean if metric.startswith("queue") else total
+        if value is not None:
+            values.append((metric, camera, TOTAL_PERIOD, value))
+    return values
+
+
+def _weekday(date_str: str):
+    return datetime.date.fromisoformat(date_str).weekday()
+
+
+def _forget_day(conn, date_str: str):
+    """Tira o dia das janelas das linhas de base e apaga as suas anomalias."""
+    rows = conn.execute(
+        "SELECT metric, camera, weekday, period, value FROM baseline_values WHERE date = ?", (date_str,)
+    ).fetchall()
+    for metric, camera, weekday, period, value in rows:
+        key = (metric, camera, weekday, period)
+        _put_cell(conn, key, _remove(*_get_cell(conn, key), value))
+    conn.execute("DELETE FROM baseline_values WHERE date = ?", (date_str,))
+    conn.execute("DELETE FROM anomalies WHERE date = ?", (date_str,))
+
+
+def _rebuild_weekday(conn, weekday: int, since: str):
+    """
+    Refaz as linhas de base de um dia da semana a partir das consolidações
+    gravadas (tabelas daily e hourly, já com o dia novo ou sem o dia apagado)
+    e compara de novo os dias a partir de 'since', como se tivessem chegado em ordem.
+    """
+    dates = [d for (d,) in conn.execute("SELECT DISTINCT date FROM daily ORDER BY date") if _weekday(d) == weekday]
+    placeholders = ",".join("?" for _ in dates)
+    daily, hourly = {}, {}
+    for table, rows in (("daily", daily), ("hourly", hourly)):
+        for row in conn.execute(f"SELECT * FROM {table} WHERE date IN ({placeholders})", dates):
+            rows.setdefault(row[0], []).append(row)
+    cells = {}
+    for date_str in dates:
+        for metric, camera, period, value in _day_values(daily.get(date_str, []), hourly.get(date_str, [])):
+            cells.setdefault((metric, camera, weekday, period), []).append((date_str, value))
+
+    conn.execute("DELETE FROM baselines WHERE weekday = ?", (weekday,))
+    conn.execute("DELETE FROM baseline_values WHERE weekday = ?", (weekday,))
+    # O próprio dia (que pode ter sido apagado) e os seguintes são comparados de novo
+    conn.executemany("DELETE FROM anomalies WHERE date = ?", [(d,) for d in {since, *dates} if d >= since])
+
+    found = []
+    for key, values in cells.items():
+        metric, camera, _, period = key
+        window = []
+        stats = (0, 0.0, 0.0)
+        for date_str, value in values:
+            if date_str >= since:
+                found.append(_score(metric, camera, period, date_str, value, stats))
+            window.append((date_str, value))
+            stats = _add(*stats, value)
+            if len(window) > BASELINE_WEEKS:
+                stats = _remove(*stats, window.pop(0)[1])
+        conn.executemany("INSERT INTO baseline_values VALUES (?, ?, ?, ?, ?, ?)", [(*key, d, v) for d, v in window])
+        _put_cell(conn, key, stats)
+    conn.executemany("INSERT INTO anomalies VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [a for a in found if a])
+
+
+def _has_later_days(conn, weekday: int, date_str: str):
+    """Indica se algum dia seguinte do mesmo dia da semana já está nas linhas de base."""
+    return any(
+        _weekday(d) == weekday
+        for (d,) in conn.execute("SELECT DISTINCT date FROM baseline_values WHERE date > ?", (date_str,))
+    )
+
+
+def remove_day(conn, date_str: str):
+    """
+    Tira o dia apagado das linhas de base e apaga as suas anomalias. As
+    janelas voltam a ter os valores anteriores que ele tinha tirado.
+    """
+    _rebuild_weekday(conn, _weekday(date_str), date_str)
+
+
+def apply_day(conn, date_str: str, daily, hourly):
+    """
+    Compara os valores do dia (linhas daily e hourly das consolidações) com as
+    linhas de base, grava as anomalias e atualiza as linhas de base.
+    Um dia regravado primeiro sai das linhas de base; um dia que chegou antes
+    de dias seguintes já consolidados refaz as linhas de base do dia da semana.
+    """
+    weekday = _weekday(date_str)
+    if _has_later_days(conn, weekday, date_str):
+        _rebuild_weekday(conn, weekday, date_str)
+        return
+    _forget_day(conn, date_str)
+    anomalies = [
+        _observe(conn, metric, camera, period, weekday, date_str, value)
+        for metric, camera, period, value in _day_values(daily, hourly)
+    ]
+    conn.executemany("INSERT INTO anomalies VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [a for a in anomalies if a])
+
+
+# --- Textos ---
+def period_label(period: int):
+    if period == TOTAL_PERIOD:
+        return "Dia inteiro"
+    hour = FIRST_PERIOD_HOUR + int(period) - 1
+    return f"{hour:02d}:00 – {hour + 1:02d}:00"
+
+
+def describe(row, camera_label=None):
+    """Texto de uma anomalia (linha de rollups.anomaly_frame), ex.: 'Entradas · 14:00 – 15:00: 120 (esperado ~60 ± 8; 7,5σ acima)'."""
+    metric = row["metric"]
+    label = metric_label(metric)
+    if row["camera"]:
+        label = f"{label} — {camera_label(row['camera']) if camera_label else row['camera']}"
+    unit = " s" if metric.startswith("queue") else ""
+    decimals = 1 if metric.startswith("queue") else 0
+    direction = "acima" if row["z"] > 0 else "abaixo"
+    return (
+        f"{label} · {period_label(row['period'])}: {row['value']:.{decimals}f}{unit} "
+        f"(esperado ~{row['expected']:.{decimals}f}{unit} ± {row['std']:.{decimals}f}; "
+        f"{abs(row['z']):.1f}σ {direction})"
+    )
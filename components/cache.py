@@ -0,0 +1,222 @@
+# components/cache.py
+"""Cache LRU em memória, invalidado pela assinatura dos arquivos lidos, com pedidos simultâneos coalescidos."""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+
+import pandas as pd
+from PIL import Image
+
+from components.profiling import count, span
+
+MAX_ENTRIES = 1024
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def file_signature(path: str):
+    """Retorna (caminho, mtime_ns, tamanho) — ou (caminho, None, None) se não existir."""
+    try:
+        st_ = os.stat(path)
+        return (path, st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return (path, None, None)
+
+
+def _estimate_size(value):
+    """Estimativa (barata) de memória ocupada por um valor cacheado."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class FileCache:
+    """LRU limitado por número de entradas e por bytes estimados."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Cálculos em andamento: chave -> Future compartilhado pelos pedidos simultâneos
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        # namespace -> [calculados, coalescidos]
+        self._flights = {}
+
+    def get(self, key):
+        """Retorna (True, valor) em caso de acerto ou (False, None)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, namespace: str = "value"):
+        """
+        Valor da chave: do cache, do cálculo já em andamento para a mesma chave
+        (outra sessão pediu primeiro) ou de compute(), que só roda uma vez.
+        Uma exceção de compute() é repassada a todos que esperavam por ele.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key][0]
+                flight = None
+                leader = False
+            else:
+                flights = self._flights.setdefault(namespace, [0, 0])
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = Future()
+                    self.misses += 1
+                    flights[0] += 1
+                else:
+                    self.coalesced += 1
+                    flights[1] += 1
+
+        if flight is None:
+            count("cache.hit")
+            return value
+        if not leader:
+            count("cache.coalesced")
+            with span(f"wait:{namespace}"):
+                return flight.result()
+
+        count("cache.miss")
+        try:
+            with span(f"load:{namespace}"):
+                value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set_exception(e)
+            raise
+        # Guarda antes de liberar a chave: quem chegar depois já encontra o valor no cache
+        self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        flight.set_result(value)
+        return value
+
+    def load(self, namespace: str, paths, loader, *args, **kwargs):
+        """
+        Executa loader(*args, **kwargs) e guarda o resultado enquanto os arquivos
+        em 'paths' não mudarem. Chamadas simultâneas com os mesmos argumentos
+        e arquivos compartilham uma única execução.
+        """
+        signatures = tuple(file_signature(p) for p in paths)
+        key = (namespace, args, tuple(sorted(kwargs.items())), signatures)
+        return self.get_or_compute(key, lambda: loader(*args, **kwargs), namespace)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Contadores de uso do cache. coalesce_rate é a fração dos pedidos não
+        atendidos pelo cache que aproveitaram um cálculo já em andamento.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            pending = self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "coalesce_rate": round(self.coalesced / pending, 4) if pending else 0.0,
+                "namespaces": {
+                    namespace: {"computed": computed, "coalesced": coalesced}
+                    for namespace, (computed, coalesced) in sorted(self._flights.items())
+                },
+            }
+
+
+# 🔹 Instância única usada por todos os componentes do processo
+_cache = FileCache()
+
+
+def get_cache():
+    return _cache
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def cached_by_files(paths_fn):
+    """
+    Decorador: memoiza a função enquanto os arquivos retornados por
+    paths_fn(*args, **kwargs) mantiverem o mesmo mtime e tamanho.
+    """
+    def decorator(fn):
+        namespace = f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return _cache.load(namespace, paths_fn(*args, **kwargs), fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def read_image(path: str):
+    """Abre uma imagem já decodificada, cacheada por arquivo."""
+    def _open(p):
+        img = Image.open(p)
+        img.load()
+        return img
+
+    return _cache.load("image", [path], _open, path)
+
+
+def read_csv(path: str):
+    """Lê um CSV (colunas sem espaços nas bordas), cacheado por arquivo."""
+    def _read(p):
+        df = pd.read_csv(p)
+        df.columns = df.columns.str.strip()
+        return df
+
+    return _cache.load("csv", [path], _read, path)
@@ -0,0 +1,314 @@
+# components/catalog.py
+"""Índice em memória da árvore de dados (câmera -> data -> arquivos), salvo em disco e atualizado em segundo plano."""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from components import config
+from components.profiling import timed
+
+BASE_DIR = config.BASE_DIR
+
+# Pasta onde os índices são persistidos (um arquivo por BASE_DIR)
+CATALOG_DIR = os.path.join(config.STATE_DIR, "catalog")
+
+# Intervalo entre varreduras em segundo plano (segundos)
+RESCAN_SECONDS = 60
+
+# A cada N varreduras, relista tudo mesmo sem mudança de mtime (o Drive nem
+# sempre atualiza o mtime das pastas)
+FULL_RESCAN_EVERY = 10
+
+# Subpastas de cada dia que contêm artefatos
+ARTIFACT_DIRS = ("count", "queue", "heatmaps", "points")
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _list_dirs(path: str):
+    """Lista subpastas usando scandir (evita um stat extra por entrada)."""
+    try:
+        with os.scandir(path) as it:
+            return sorted(entry.name for entry in it if entry.is_dir())
+    except OSError:
+        return []
+
+
+def _list_files(path: str):
+    try:
+        with os.scandir(path) as it:
+            return sorted(entry.name for entry in it if entry.is_file())
+    except OSError:
+        return []
+
+
+def parse_intervals(heatmap_files):
+    """Extrai os números de intervalo de 'heatmap_interval_N.png'."""
+    intervals = set()
+    for f in heatmap_files:
+        if f.startswith("heatmap_interval_"):
+            try:
+                intervals.add(int(f.split("_")[-1].split(".")[0]))
+            except ValueError:
+                continue
+    return sorted(intervals)
+
+
+def _changed_days(old_cameras: dict, cameras: dict):
+    """[(câmera, data)] dos dias novos, alterados ou removidos entre duas varreduras."""
+    days = []
+    for camera_name in set(old_cameras) | set(cameras):
+        old_dates = old_cameras.get(camera_name, {}).get("dates", {})
+        new_dates = cameras.get(camera_name, {}).get("dates", {})
+        for date_str in set(old_dates) | set(new_dates):
+            if old_dates.get(date_str) != new_dates.get(date_str):
+                days.append((camera_name, date_str))
+    return sorted(days)
+
+
+class Catalog:
+    """Índice câmera -> data -> {intervalos, artefatos} de um BASE_DIR."""
+
+    def __init__(self, base_dir: str, catalog_path: str | None = None, exclude=()):
+        self.base_dir = base_dir
+        self.catalog_path = catalog_path
+        # Subpastas que não são câmeras (ex.: as outras lojas dentro da raiz da loja padrão)
+        self.exclude = set(exclude)
+        self._lock = threading.RLock()
+        self._scan_lock = threading.Lock()
+        self._data = {"mtime": None, "cameras": {}}
+        self._thread = None
+        self._stop = threading.Event()
+        self._listeners = []
+        self.last_scan = None
+        self._load()
+
+    # --- Persistência ---
+    def _load(self):
+        if not self.catalog_path or not os.path.exists(self.catalog_path):
+            return
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("base_dir") == self.base_dir:
+                self._data = data["tree"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        if not self.catalog_path:
+            return
+        os.makedirs(os.path.dirname(self.catalog_path), exist_ok=True)
+        tmp_path = f"{self.catalog_path}.tmp"
+        with self._lock:
+            payload = {"base_dir": self.base_dir, "tree": self._data}
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+        os.replace(tmp_path, self.catalog_path)
+
+    # --- Ouvintes ---
+    def add_listener(self, callback):
+        """Registra callback([(câmera, data), ...]) chamado após cada varredura com mudanças."""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def _notify(self, days):
+        if not days:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(days)
+            except Exception as e:
+                print(f"⚠️ Erro ao avisar mudanças do catálogo: {e}")
+
+    # --- Varredura ---
+    def _scan_date(self, camera_name: str, date_str: str, old: dict | None, full: bool = False):
+        """Relista a pasta do dia apenas se ela ou uma de suas subpastas mudou."""
+        date_path = os.path.join(self.base_dir, camera_name, date_str)
+        mtimes = {"": _mtime(date_path)}
+        for sub in ARTIFACT_DIRS:
+            mtimes[sub] = _mtime(os.path.join(date_path, sub))
+        if not full and old is not None and old.get("mtimes") == mtimes:
+            return old, False
+
+        artifacts = []
+        intervals = []
+        for sub in ARTIFACT_DIRS:
+            if mtimes[sub] is None:
+                continue
+            files = _list_files(os.path.join(date_path, sub))
+            artifacts.extend(f"{sub}/{f}" for f in files)
+            if sub == "heatmaps":
+                intervals = parse_intervals(files)
+        return {"mtimes": mtimes, "intervals": intervals, "artifacts": artifacts}, True
+
+    def _scan_camera(self, camera_name: str, old: dict | None, full: bool = False):
+        camera_path = os.path.join(self.base_dir, camera_name)
+        mtime = _mtime(camera_path)
+        old_dates = (old or {}).get("dates", {})
+        relist = full or old is None or old.get("mtime") != mtime
+        date_names = _list_dirs(camera_path) if relist else list(old_dates)
+
+        changed = old is None or old.get("mtime") != mtime
+        dates = {}
+        for date_str in date_names:
+            entry, date_changed = self._scan_date(camera_name, date_str, old_dates.get(date_str), full)
+            dates[date_str] = entry
+            changed = changed or date_changed
+        return {"mtime": mtime, "dates": dates}, changed
+
+    @timed()
+    def scan(self, full: bool = False):
+        """
+        Varredura incremental (ou completa, com full=True) de toda a árvore.
+        Retorna True se algo mudou.
+        """
+        with self._scan_lock:
+            with self._lock:
+                old = self._data
+            mtime = _mtime(self.base_dir)
+            old_cameras = old.get("cameras", {})
+            relist = full or mtime != old.get("mtime")
+            camera_names = _list_dirs(self.base_dir) if relist else list(old_cameras)
+            camera_names = [name for name in camera_names if name not in self.exclude]
+
+            changed = mtime != old.get("mtime")
+            cameras = {}
+            for camera_name in camera_names:
+                entry, camera_changed = self._scan_camera(camera_name, old_cameras.get(camera_name), full)
+                cameras[camera_name] = entry
+                changed = changed or camera_changed
+
+            with self._lock:
+                self._data = {"mtime": mtime, "cameras": cameras}
+                self.last_scan = time.time()
+            if changed:
+                self._save()
+        if changed:
+            self._notify(_changed_days(old_cameras, cameras))
+        return changed
+
+    @timed()
+    def refresh_folder(self, camera_name: str, date_str: str):
+        """Atualiza imediatamente uma pasta (ex.: após um download)."""
+        with self._scan_lock:
+            entry, changed = self._scan_date(camera_name, date_str, None)
+            with self._lock:
+                cameras = self._data.setdefault("cameras", {})
+                camera = cameras.setdefault(camera_name, {"mtime": None, "dates": {}})
+                if entry["mtimes"][""] is None:
+                    camera["dates"].pop(date_str, None)
+                else:
+                    camera["dates"][date_str] = entry
+                    camera["dates"] = dict(sorted(camera["dates"].items()))
+            self._save()
+        self._notify([(camera_name, date_str)])
+
+    # --- Atualização em segundo plano ---
+    def start(self, interval: float = RESCAN_SECONDS):
+        """Inicia a varredura periódica (uma única thread por catálogo)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True, name="catalog-rescan")
+            self._thread.start()
+
+    def stop(self, wait: bool = False):
+        """Interrompe a varredura periódica; com wait=True espera a thread terminar."""
+        self._stop.set()
+        thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, interval: float):
+        cycle = 0
+        while not self._stop.is_set():
+            try:
+                self.scan(full=cycle % FULL_RESCAN_EVERY == 0)
+            except Exception as e:
+                print(f"⚠️ Erro ao atualizar o catálogo: {e}")
+            cycle += 1
+            self._stop.wait(interval)
+
+    # --- Consultas (somente memória) ---
+    def cameras(self):
+        with self._lock:
+            return sorted(name for name in self._data.get("cameras", {}) if name not in self.exclude)
+
+    def dates(self, camera_name: str):
+        with self._lock:
+            camera = self._data.get("cameras", {}).get(camera_name)
+            return sorted(camera["dates"]) if camera else []
+
+    def _date_entry(self, camera_name: str, date_str: str):
+        camera = self._data.get("cameras", {}).get(camera_name)
+        return camera["dates"].get(date_str) if camera else None
+
+    def intervals(self, camera_name: str, date_str: str):
+        with self._lock:
+            entry = self._date_entry(camera_name, date_str)
+            return list(entry["intervals"]) if entry else []
+
+    def artifacts(self, camera_name: str, date_str: str):
+        """Arquivos do dia, relativos à pasta da data (ex.: 'count/people_count.csv')."""
+        with self._lock:
+            entry = self._date_entry(camera_name, date_str)
+            return list(entry["artifacts"]) if entry else []
+
+    def day_signature(self, date_str: str):
+        """{câmera: mtimes das pastas do dia} das câmeras que têm a data."""
+        with self._lock:
+            return {
+                camera_name: camera["dates"][date_str]["mtimes"]
+                for camera_name, camera in self._data.get("cameras", {}).items()
+                if date_str in camera["dates"] and camera_name not in self.exclude
+            }
+
+    def has_artifact(self, camera_name: str, date_str: str, relative_path: str):
+        return relative_path.replace(os.sep, "/") in self.artifacts(camera_name, date_str)
+
+    def is_empty(self):
+        with self._lock:
+            return not self._data.get("cameras")
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _catalog_path(base_dir: str):
+    digest = hashlib.sha1(os.path.abspath(base_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CATALOG_DIR, f"{digest}.json")
+
+
+def get_catalog(base_dir: str | None = None, exclude=()):
+    """
+    Retorna o catálogo do diretório (padrão: BASE_DIR). Na primeira chamada do
+    processo usa o índice salvo em disco, ou faz uma varredura completa se não
+    houver nenhum, e inicia a atualização periódica em segundo plano.
+    exclude: subpastas da raiz que não são câmeras.
+    """
+    base_dir = base_dir or BASE_DIR
+    with _catalogs_lock:
+        catalog = _catalogs.get(base_dir)
+        if catalog is None:
+            catalog = Catalog(base_dir, _catalog_path(base_dir), exclude)
+            if catalog.is_empty():
+                catalog.scan()
+            catalog.start()
+            _catalogs[base_dir] = catalog
+        elif exclude:
+            # A lista de lojas pode ter mudado (stores.json)
+            catalog.exclude = set(exclude)
+        return catalog
@@ -0,0 +1,89 @@
+# components/comparison.py
+"""Comparação de várias câmeras na mesma data e período, carregadas em paralelo."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from components.day_snapshot import get_day_snapshot
+from components.drive_downloader import ensure_camera_data
+from components.heatmap_previews import LEVELS, get_preview
+from components.heatmaps import get_heatmap_file
+from components.profiling import timed
+from components.utils import format_camera_name
+
+# Threads para carregar as câmeras (uma por câmera até este limite)
+MAX_WORKERS = 8
+
+# Colunas da grade de comparação
+GRID_COLUMNS = 3
+
+# Largura das prévias da grade (menor nível do heatmap_previews)
+GRID_WIDTH = LEVELS[0]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="comparison")
+        return _executor
+
+
+def load_camera(camera_name: str, date_str: str, period: int | None, width: int = GRID_WIDTH):
+    """{"camera", "image" (bytes da prévia), "people"} de uma câmera no período (None = dia inteiro)."""
+    heatmap_file = get_heatmap_file(camera_name, date_str, "total" if period is None else period)
+    return {
+        "camera": camera_name,
+        "image": get_preview(heatmap_file, width),
+        "people": get_day_snapshot(camera_name, date_str).people(period),
+    }
+
+
+@timed()
+def load_cameras(camera_names, date_str: str, period: int | None, width: int = GRID_WIDTH):
+    """Carrega as câmeras em paralelo e devolve os resultados na ordem pedida."""
+    executor = _get_executor()
+    futures = [executor.submit(load_camera, name, date_str, period, width) for name in camera_names]
+    panels = []
+    for name, future in zip(camera_names, futures):
+        try:
+            panels.append(future.result())
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar {name} ({date_str}): {e}")
+            panels.append({"camera": name, "image": None, "people": None})
+    return panels
+
+
+def request_cameras(camera_names, date_str: str):
+    """Agenda o download das pastas das câmeras (sem bloquear); retorna as que ainda estão baixando."""
+    return [name for name in camera_names if ensure_camera_data(name, date_str, prefetch=False) == "pending"]
+
+
+def show_comparison(camera_names, date_str: str, period: int | None, placeholder, columns: int = GRID_COLUMNS):
+    """
+    Mostra a grade de heatmaps reduzidos e contagens das câmeras escolhidas.
+    Retorna as câmeras cujos dados ainda estão sendo baixados.
+    """
+    if not camera_names:
+        placeholder.info("Selecione ao menos uma câmera para comparar.")
+        return []
+
+    pending = request_cameras(camera_names, date_str)
+    loaded = iter(load_cameras([name for name in camera_names if name not in pending], date_str, period))
+    panels = [{"camera": name, "pending": True} if name in pending else next(loaded) for name in camera_names]
+    for start in range(0, len(panels), columns):
+        cols = placeholder.columns(columns)
+        for col, panel in zip(cols, panels[start:start + columns]):
+            col.markdown(f"**{format_camera_name(panel['camera'])}**")
+            if panel.get("pending"):
+                col.info("⏳ Baixando dados do Google Drive...")
+                continue
+            if panel["image"] is not None:
+                col.image(panel["image"], use_container_width=True)
+            else:
+                col.warning("⚠️ Heatmap não encontrado.")
+            people = panel["people"]
+            col.metric("📊 Pessoas no ambiente", people if people is not None else "–")
+    return pending
@@ -0,0 +1,36 @@
+# components/config.py
+"""Configuração central do dashboard (caminhos e origem dos dados, trocados pelas variáveis SMARTAWARE_*)."""
+import os
+
+# Drive montado pelo Google Drive para desktop (Windows)
+DRIVE_MOUNT_DIR = r"G:\Meu Drive\Colab Notebooks\data\detections"
+
+
+def _env(name: str, default=None):
+    value = os.environ.get(name)
+    return value if value else default
+
+
+# 🔹 Árvore de dados lida por todos os componentes: a pasta indicada, o Drive
+# montado (se existir) ou a cópia local preenchida pelo backend remoto
+BASE_DIR = _env("SMARTAWARE_DATA_DIR") or (DRIVE_MOUNT_DIR if os.path.isdir(DRIVE_MOUNT_DIR) else os.path.join("data", "detections"))
+
+# 🔹 Dados derivados (metrics, catalog, cache, reports, exports, summaries, live, logs)
+STATE_DIR = _env("SMARTAWARE_STATE_DIR", "data")
+
+# 🔹 Lojas e papéis das câmeras (entrada, caixas)
+STORES_FILE = _env("SMARTAWARE_STORES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stores.json"))
+
+# 🔹 Origem dos dados. Com o Drive montado a árvore já é local; senão ela é um
+# espelho da pasta pública do Drive, baixado sob demanda
+BACKEND = _env("SMARTAWARE_BACKEND") or ("local" if BASE_DIR == DRIVE_MOUNT_DIR else "drive")
+
+DRIVE_BASE_URL = _env(
+    "SMARTAWARE_DRIVE_URL",
+    "https://drive.google.com/drive/folders/1tOUMDs-SdgF1X9q-d2okdmHtn1iYLRBo?usp=sharing",
+)
+
+S3_BUCKET = _env("SMARTAWARE_S3_BUCKET")
+S3_PREFIX = _env("SMARTAWARE_S3_PREFIX", "detections")
+S3_ENDPOINT_URL = _env("SMARTAWARE_S3_ENDPOINT_URL")  # ex.: http://localhost:9000 (MinIO)
+S3_REGION = _env("SMARTAWARE_S3_REGION")
@@ -0,0 +1,230 @@
+# components/datasource.py
+"""Origem dos dados <câmera>/<data>/... (pasta local, Google Drive ou S3) com downloads retomáveis."""
+import json
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+
+from components import config
+
+# Tamanho dos blocos copiados por vez
+CHUNK_SIZE = 1024 * 1024
+
+# Conexões simultâneas mantidas pelo cliente S3 (downloads em paralelo do drive_downloader)
+S3_MAX_CONNECTIONS = 16
+
+
+def _join(*parts):
+    return "/".join(p.strip("/") for p in parts if p)
+
+
+def _version_path(dest_path: str):
+    return f"{dest_path}.source.json"
+
+
+def resume_offset(dest_path: str, version: dict):
+    """
+    Byte a partir do qual continuar o download parcial em dest_path: o tamanho
+    dele se foi começado com a mesma versão da origem, senão 0 (o parcial é
+    descartado). Registra a versão atual para a próxima tentativa.
+    """
+    offset = 0
+    if os.path.exists(dest_path):
+        try:
+            with open(_version_path(dest_path), "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            recorded = None
+        offset = os.path.getsize(dest_path)
+        if recorded != version or offset > version.get("size", offset):
+            os.remove(dest_path)
+            offset = 0
+    with open(_version_path(dest_path), "w", encoding="utf-8") as f:
+        json.dump(version, f)
+    return offset
+
+
+def finish_download(dest_path: str, version: dict):
+    """Confere o tamanho final do download e apaga o registro da versão."""
+    if version["size"] == 0 and not os.path.exists(dest_path):
+        # Arquivo vazio na origem: nenhum byte foi pedido, só cria o arquivo
+        open(dest_path, "wb").close()
+    size = os.path.getsize(dest_path)
+    if size != version["size"]:
+        os.remove(dest_path)
+        raise IOError(f"Download incompleto de {dest_path}: {size} de {version['size']} bytes")
+    try:
+        os.remove(_version_path(dest_path))
+    except OSError:
+        pass
+
+
+class DataSource(ABC):
+    """
+    Interface comum. Caminhos relativos usam '/' a partir da raiz da árvore
+    (ex.: 'camera11/2025-10-07/count/people_total.csv').
+    """
+
+    name = ""
+
+    @abstractmethod
+    def list_files(self, camera_name: str, date_str: str):
+        """[(caminho relativo à pasta do dia, referência para fetch)] de todos os arquivos do dia."""
+
+    @abstractmethod
+    def fetch(self, camera_name: str, date_str: str, relative_path: str, ref, dest_path: str):
+        """Copia o arquivo para dest_path, continuando um dest_path parcial da mesma versão da origem."""
+
+    def serves(self, base_dir: str):
+        """Indica se os arquivos já estão em base_dir (não há o que baixar)."""
+        return False
+
+
+class LocalSource(DataSource):
+    """Pasta local (ou Drive montado) com o layout <câmera>/<data>/..."""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, relative_path: str):
+        return os.path.join(self.root, *relative_path.split("/")) if relative_path else self.root
+
+    def list_files(self, camera_name: str, date_str: str):
+        folder = self._path(_join(camera_name, date_str))
+        files = []
+        for dirpath, _, filenames in os.walk(folder):
+            for name in filenames:
+                relative = os.path.relpath(os.path.join(dirpath, name), folder).replace(os.sep, "/")
+                files.append((relative, relative))
+        return sorted(files)
+
+    def fetch(self, camera_name: str, date_str: str, relative_path: str, ref, dest_path: str):
+        source_path = self._path(_join(camera_name, date_str, ref))
+        st_ = os.stat(source_path)
+        version = {"size": st_.st_size, "mtime_ns": st_.st_mtime_ns}
+        offset = resume_offset(dest_path, version)
+        with open(source_path, "rb") as src, open(dest_path, "ab") as dst:
+            src.seek(offset)
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        finish_download(dest_path, version)
+
+    def serves(self, base_dir: str):
+        return os.path.abspath(self.root) == os.path.abspath(base_dir)
+
+
+class DriveMirrorSource(DataSource):
+    """Pasta pública do Google Drive via gdown (listagem por pasta do dia, downloads retomáveis)."""
+
+    name = "drive"
+
+    def __init__(self, base_url: str = config.DRIVE_BASE_URL):
+        self.base_url = base_url
+
+    def _gdown(self):
+        import gdown
+        return gdown
+
+    def list_files(self, camera_name: str, date_str: str):
+        folder_url = f"{self.base_url}/{camera_name}/{date_str}"
+        files = self._gdown().download_folder(url=folder_url, quiet=True, use_cookies=False, skip_download=True)
+        return [(f.path.replace(os.sep, "/"), f.id) for f in files or []]
+
+    def fetch(self, camera_name: str, date_str: str, relative_path: str, ref, dest_path: str):
+        # O gdown retoma o parcial sozinho; o Drive público não expõe uma versão para conferir antes
+        self._gdown().download(id=ref, output=dest_path, quiet=True, use_cookies=False, resume=True)
+
+
+class S3Source(DataSource):
+    """
+    Bucket S3 (ou compatível, como o MinIO) com as chaves <prefixo>/<câmera>/<data>/...
+    Um único cliente boto3 (thread-safe, com pool de conexões) é reaproveitado.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None, region: str | None = None):
+        if not bucket:
+            raise ValueError("Informe o bucket (SMARTAWARE_S3_BUCKET) para usar o backend S3.")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                try:
+                    import boto3
+                    from botocore.config import Config
+                except ImportError:
+                    raise ImportError("O backend S3 requer o boto3 (pip install boto3).")
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    region_name=self.region,
+                    config=Config(max_pool_connections=S3_MAX_CONNECTIONS, retries={"max_attempts": 3}),
+                )
+            return self._client
+
+    def _key(self, relative_path: str):
+        return _join(self.prefix, relative_path)
+
+    def _pages(self, prefix: str, **kwargs):
+        paginator = self.client().get_paginator("list_objects_v2")
+        yield from paginator.paginate(Bucket=self.bucket, Prefix=prefix, **kwargs)
+
+    def list_files(self, camera_name: str, date_str: str):
+        base = f"{self._key(_join(camera_name, date_str))}/"
+        files = []
+        for page in self._pages(base):
+            for obj in page.get("Contents", []):
+                relative = obj["Key"][len(base):]
+                if relative and not relative.endswith("/"):
+                    files.append((relative, obj["Key"]))
+        return sorted(files)
+
+    def fetch(self, camera_name: str, date_str: str, relative_path: str, ref, dest_path: str):
+        head = self.client().head_object(Bucket=self.bucket, Key=ref)
+        version = {"size": head["ContentLength"], "etag": head["ETag"]}
+        offset = resume_offset(dest_path, version)
+        if offset < version["size"]:
+            # Um único GET do ponto de parada até o fim, só se o objeto ainda for o mesmo.
+            # Se ele foi regravado entre o HEAD e o GET, o S3 responde 412 e a próxima
+            # tentativa, com outro ETag, recomeça do zero
+            response = self.client().get_object(
+                Bucket=self.bucket, Key=ref, Range=f"bytes={offset}-", IfMatch=version["etag"]
+            )
+            with response["Body"] as body, open(dest_path, "ab") as f:
+                for chunk in body.iter_chunks(CHUNK_SIZE):
+                    f.write(chunk)
+        finish_download(dest_path, version)
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+def create_datasource(backend: str = None):
+    """Backend indicado (padrão: config.BACKEND)."""
+    backend = backend or config.BACKEND
+    if backend == "local":
+        return LocalSource(config.BASE_DIR)
+    if backend == "drive":
+        return DriveMirrorSource(config.DRIVE_BASE_URL)
+    if backend == "s3":
+        return S3Source(config.S3_BUCKET, config.S3_PREFIX, config.S3_ENDPOINT_URL, config.S3_REGION)
+    raise ValueError(f"Backend de dados desconhecido: {backend}")
+
+
+def get_datasource():
+    """Instância única do backend configurado (conexões reaproveitadas entre chamadas)."""
+    global _source
+    with _source_lock:
+        if _source is None:
+            _source = create_datasource()
+        return _source
@@ -0,0 +1,176 @@
+# components/day_snapshot.py
+"""Todas as métricas de um dia selecionado, carregadas uma única vez em arrays por período."""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from components import metrics_store, queue_analytics, stores
+from components.cache import get_cache
+from components.metrics_store import INTEGER_KINDS, TOTAL_PERIOD
+
+# Câmera da entrada da loja padrão
+ENTRANCE_CAMERA = stores.DEFAULT_ROLES["entrances"][0]
+
+# Threads usadas para ler as fontes de um dia
+MAX_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="day-snapshot")
+        return _executor
+
+
+def snapshot_sources(camera_name: str):
+    """[(câmera, tipo)] das fontes que compõem o snapshot de uma câmera."""
+    store = stores.store_of(camera_name)
+    sources = [(camera_name, "people_count")]
+    sources += [(entrance, "people_total") for entrance in store.entrance_ids]
+    sources += [(store.checkout_id(n), f"queue{n}") for n in store.queue_numbers]
+    return sources
+
+
+def dwell_sources(camera_name: str):
+    """{câmera do caixa: [caixas]} cujas passagens (dwell.csv) entram no snapshot."""
+    store = stores.store_of(camera_name)
+    cameras = {}
+    for number in store.queue_numbers:
+        cameras.setdefault(store.checkout_id(number), []).append(number)
+    return cameras
+
+
+class DaySnapshot:
+    """Métricas por período de uma câmera em um dia (arrays somente leitura)."""
+
+    def __init__(self, camera_name: str, date_str: str, arrays: dict, dwell=None):
+        self.camera_name = camera_name
+        self.date_str = date_str
+        self._arrays = arrays
+        # Passagens pela fila (DataFrame do queue_analytics) ou None
+        self.dwell = dwell
+        # Média do dia de cada fila, calculada uma vez: ponderada pelos clientes
+        # quando há passagens, senão a média dos períodos
+        weighted = queue_analytics.day_means(dwell) if dwell is not None else {}
+        self._queue_means = {}
+        numbers = sorted(set(weighted) | {int(kind[5:]) for kind in arrays if kind.startswith("queue")})
+        for number in numbers:
+            if number in weighted:
+                self._queue_means[number] = weighted[number]
+                continue
+            values = arrays.get(f"queue{number}")
+            periods = values[TOTAL_PERIOD + 1:] if values is not None else []
+            valid = [v for v in periods if not math.isnan(v)]
+            self._queue_means[number] = round(sum(valid) / len(valid), 2) if valid else None
+
+    def has(self, kind: str):
+        """Indica se o CSV da métrica existia no dia."""
+        return self._arrays.get(kind) is not None
+
+    def value(self, kind: str, period: int | None = None):
+        """Valor de um período (ou da linha Total, se period for None) ou None."""
+        values = self._arrays.get(kind)
+        if values is None:
+            return None
+        index = TOTAL_PERIOD if period is None else int(period)
+        if index < 0 or index >= len(values):
+            return None
+        value = values[index]
+        if math.isnan(value):
+            return None
+        return int(value) if kind in INTEGER_KINDS else float(value)
+
+    def people(self, period: int | None = None):
+        """Pessoas no ambiente da câmera: no período ou o total do dia."""
+        return self.value("people_count", period)
+
+    def entries(self, period: int | None = None):
+        """Entradas na loja (câmeras de entrada): no período ou o total do dia."""
+        return self.value("people_total", period)
+
+    def queue(self, number: int, period: int | None = None):
+        """Tempo médio de fila do caixa: no período ou a média do dia (2 casas)."""
+        if period is None:
+            return self._queue_means.get(number)
+        value = self.value(f"queue{number}", period)
+        return round(value, 2) if value is not None else None
+
+    def queues(self, period: int | None = None):
+        """Tempos de fila dos caixas da loja da câmera, na ordem dos caixas."""
+        return tuple(self.queue(n, period) for n in stores.store_of(self.camera_name).queue_numbers)
+
+    def period_values(self, kind: str):
+        """{período: valor} dos períodos com valor, sem a linha Total."""
+        values = self._arrays.get(kind)
+        if values is None:
+            return {}
+        return {
+            period: self.value(kind, period)
+            for period in range(TOTAL_PERIOD + 1, len(values))
+            if not math.isnan(values[period])
+        }
+
+    def period_frame(self, kind: str):
+        """DataFrame 'Período' + coluna de valor original (como nos CSVs), ou None."""
+        if not self.has(kind):
+            return None
+        values = self.period_values(kind)
+        return pd.DataFrame({"Período": list(values.keys()), metrics_store.value_columns(kind)[0]: list(values.values())})
+
+
+def sum_arrays(arrays):
+    """Soma por período dos arrays existentes (NaN onde nenhum tem valor); None se nenhum existir."""
+    arrays = [a for a in arrays if a is not None]
+    if len(arrays) <= 1:
+        return arrays[0] if arrays else None
+    size = max(len(a) for a in arrays)
+    stacked = np.full((len(arrays), size), np.nan)
+    for row, values in zip(stacked, arrays):
+        row[:len(values)] = values
+    total = np.nansum(stacked, axis=0)
+    total[np.isnan(stacked).all(axis=0)] = np.nan
+    total.setflags(write=False)
+    return total
+
+
+def _load_dwell(camera_name: str, date_str: str):
+    frames = []
+    for checkout, numbers in dwell_sources(camera_name).items():
+        dwell = queue_analytics.load_dwell(date_str, checkout)
+        if dwell is not None:
+            frames.append(dwell[dwell["queue"].isin(numbers)])
+    if not frames:
+        return None
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def build_snapshot(camera_name: str, date_str: str, read_array=None):
+    """
+    Monta o snapshot lendo cada fonte com read_array(câmera, data, tipo)
+    (padrão: metrics_store.get_day_array), sem passar pelo cache.
+    """
+    read_array = read_array or metrics_store.get_day_array
+    executor = _get_executor()
+    futures = [
+        (kind, executor.submit(read_array, source_camera, date_str, kind))
+        for source_camera, kind in snapshot_sources(camera_name)
+    ]
+    grouped = {}
+    for kind, future in futures:
+        grouped.setdefault(kind, []).append(future.result())
+    arrays = {kind: sum_arrays(values) for kind, values in grouped.items()}
+    return DaySnapshot(camera_name, date_str, arrays, _load_dwell(camera_name, date_str))
+
+
+def get_day_snapshot(camera_name: str, date_str: str):
+    """Snapshot do dia, lido em paralelo na primeira chamada e depois servido do cache."""
+    paths = [metrics_store.source_path(cam, date_str, kind) for cam, kind in snapshot_sources(camera_name)]
+    paths += [queue_analytics.dwell_path(date_str, cam) for cam in dwell_sources(camera_name)]
+    return get_cache().load("day_snapshot", paths, build_snapshot, camera_name, date_str)
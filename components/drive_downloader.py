@@ -1,49 +1,272 @@
+# components/drive_downloader.py
+"""Preenche a árvore local (config.BASE_DIR) a partir do backend de dados configurado."""
+import json
 import os
-import gdown
-import streamlit as st
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
 
-BASE_DIR = "data/detections"
+from components import config, stores
+from components.datasource import get_datasource
+from components.profiling import timed
 
-# 🔹 Pasta raiz pública do Google Drive (detections/)
-DRIVE_BASE_URL = "https://drive.google.com/drive/folders/1tOUMDs-SdgF1X9q-d2okdmHtn1iYLRBo?usp=sharing"
+BASE_DIR = config.BASE_DIR
 
-def ensure_camera_data(camera_name: str, date_str: str):
+# Apenas os arquivos usados pelo dashboard são baixados (ignora vídeos, etc.)
+KEEP_EXTENSIONS = (".png", ".csv", ".npy", ".jpg")
+
+# Detecções brutas usadas pelo heatmap sob demanda (components/heatmap_engine.py)
+KEEP_PREFIXES = ("points/",)
+
+# Manifesto com a lista de arquivos esperados de cada pasta camera/data.
+# Mudar a versão faz as pastas já baixadas serem relistadas (só o que falta é baixado).
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 3
+
+# Número máximo de pastas baixando ao mesmo tempo
+MAX_WORKERS = 4
+
+# Pastas que não existem no Drive (ou cujo download falhou) só são consultadas de novo após esse tempo (s)
+MISSING_RETRY_SECONDS = 600
+
+# Janela de dias anteriores usada pelo gráfico de entradas (show_total_entries_last_15_days_chart)
+ENTRIES_WINDOW_DAYS = 15
+
+# Prioridades da fila (menor = primeiro)
+PRIORITY_VIEW = 0
+PRIORITY_PREFETCH = 10
+
+
+def is_wanted(relative_path: str):
+    """Indica se um arquivo remoto deve ser baixado."""
+    return relative_path.endswith(KEEP_EXTENSIONS) or relative_path.startswith(KEEP_PREFIXES)
+
+
+def _read_manifest(target_dir: str):
+    try:
+        with open(os.path.join(target_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def _write_manifest(target_dir: str, files):
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": MANIFEST_VERSION,
+            "files": [{"path": p, "ref": r} for p, r in files],
+            "listed_at": time.time(),
+        }, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def missing_files(target_dir: str, manifest):
+    """Arquivos do manifesto que ainda não estão (completos) no disco."""
+    return [
+        entry for entry in manifest["files"]
+        if not os.path.isfile(os.path.join(target_dir, entry["path"]))
+    ]
+
+
+class DownloadManager:
     """
-    Baixa apenas os arquivos necessários da câmera e data selecionadas.
-    Ignora arquivos grandes (npy, vídeos, etc.).
+    Baixa pastas camera/data em segundo plano com um pool limitado de threads.
+
+    - Pedidos repetidos para a mesma pasta compartilham o mesmo Future.
+    - Cada pasta tem um manifesto dos arquivos esperados; pastas incompletas
+      (download interrompido) são detectadas e retomadas só com o que falta.
+    - Downloads da tela atual passam na frente dos de pré-carregamento.
     """
-    target_dir = os.path.join(BASE_DIR, camera_name, date_str)
-    os.makedirs(target_dir, exist_ok=True)
 
-    # Evita baixar novamente se já existe algo útil
-    if any(fname.endswith((".png", ".csv")) for fname in os.listdir(target_dir)):
-        print(f"✅ Dados já disponíveis para {camera_name}/{date_str}")
-        return
+    def __init__(self, source=None, base_dir: str = BASE_DIR, max_workers: int = MAX_WORKERS):
+        self.source = source or get_datasource()
+        self.base_dir = base_dir
+        self.max_workers = max_workers
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._missing = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._workers = []
 
-    st.sidebar.info(f"⏳ Baixando dados de {camera_name} ({date_str}) do Google Drive...")
+    def _target_dir(self, camera_name: str, date_str: str):
+        return os.path.join(self.base_dir, camera_name, date_str)
 
-    try:
-        # 🔹 Tenta baixar a subpasta correspondente
-        folder_url = f"{DRIVE_BASE_URL}/{camera_name}/{date_str}"
-        files = gdown.download_folder(
-            url=folder_url,
-            quiet=False,
-            use_cookies=False,
-            remaining_ok=True
-        )
-
-        if not files:
-            st.sidebar.warning(f"⚠️ Nenhum arquivo encontrado para {camera_name}/{date_str}.")
-            return
-
-        for file_path in files:
-            file_name = os.path.basename(file_path)
-            if file_name.endswith((".png", ".csv")):
-                dest_path = os.path.join(target_dir, file_name)
-                os.replace(file_path, dest_path)
-            else:
-                os.remove(file_path)
-
-        st.sidebar.success(f"✅ Dados prontos para {camera_name}/{date_str}")
-    except Exception as e:
-        st.sidebar.error(f"❌ Erro ao baixar dados: {e}")
+    def _start_workers(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True, name=f"drive-download-{len(self._workers)}")
+            worker.start()
+            self._workers.append(worker)
+
+    def _recently_missing(self, key):
+        """Indica se a pasta falhou há menos de MISSING_RETRY_SECONDS (chamar com o lock)."""
+        missing_since = self._missing.get(key)
+        if missing_since is None:
+            return False
+        if time.time() - missing_since >= MISSING_RETRY_SECONDS:
+            # Prazo vencido: a próxima consulta pode tentar de novo
+            del self._missing[key]
+            return False
+        return True
+
+    def status(self, camera_name: str, date_str: str):
+        """'complete', 'pending', 'partial' (sem download em andamento) ou 'missing'."""
+        key = (camera_name, date_str)
+        if self.source.serves(self.base_dir):
+            return "complete" if os.path.isdir(self._target_dir(camera_name, date_str)) else "missing"
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.done():
+                return "pending"
+            if self._recently_missing(key):
+                return "missing"
+        target_dir = self._target_dir(camera_name, date_str)
+        manifest = _read_manifest(target_dir)
+        if manifest is None:
+            return "missing" if not os.path.isdir(target_dir) else "partial"
+        return "partial" if missing_files(target_dir, manifest) else "complete"
+
+    def request(self, camera_name: str, date_str: str, priority: int = PRIORITY_VIEW):
+        """Agenda o download da pasta (se necessário) e retorna um Future com o status final."""
+        key = (camera_name, date_str)
+        if self.source.serves(self.base_dir):
+            job = Future()
+            job.set_result(self.status(camera_name, date_str))
+            return job
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.done():
+                # Já está na fila: reenfileira com a nova prioridade se ela for maior
+                if priority < job.priority:
+                    job.priority = priority
+                    self._seq += 1
+                    self._queue.put((priority, self._seq, key))
+                return job
+
+            if self._recently_missing(key):
+                job = Future()
+                job.set_result("missing")
+                return job
+
+            target_dir = self._target_dir(camera_name, date_str)
+            manifest = _read_manifest(target_dir)
+            if manifest is not None and not missing_files(target_dir, manifest):
+                job = Future()
+                job.set_result("complete")
+                return job
+
+            job = Future()
+            job.priority = priority
+            self._jobs[key] = job
+            self._seq += 1
+            self._queue.put((priority, self._seq, key))
+            self._start_workers()
+            return job
+
+    def prefetch(self, camera_name: str, date_str: str, entrance_camera: str | None = None):
+        """
+        Pré-carrega o que a próxima interação provavelmente vai pedir:
+        os dias vizinhos da câmera e a janela de 15 dias da entrada da loja dela.
+        """
+        entrance_camera = entrance_camera or stores.store_of(camera_name).entrance_id
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        wanted = [(entrance_camera, date_str)]
+        for delta in (-1, 1):
+            wanted.append((camera_name, (day + timedelta(days=delta)).strftime("%Y-%m-%d")))
+        for delta in range(1, ENTRIES_WINDOW_DAYS + 1):
+            wanted.append((entrance_camera, (day - timedelta(days=delta)).strftime("%Y-%m-%d")))
+        for cam, d in wanted:
+            self.request(cam, d, PRIORITY_PREFETCH)
+
+    def _work(self):
+        while True:
+            _, _, key = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(key)
+                # Entrada duplicada (prioridade alterada) de um download já iniciado
+                if job is None or job.running() or job.done():
+                    continue
+                if not job.set_running_or_notify_cancel():
+                    continue
+            try:
+                result = self._download(*key)
+                with self._lock:
+                    if result == "missing":
+                        self._missing[key] = time.time()
+                    else:
+                        self._missing.pop(key, None)
+                    self._jobs.pop(key, None)
+                job.set_result(result)
+            except Exception as e:
+                print(f"❌ Erro ao baixar dados de {key[0]}/{key[1]}: {e}")
+                with self._lock:
+                    # Falhas (ex.: Drive inacessível) também aguardam antes de tentar de novo
+                    self._missing[key] = time.time()
+                    self._jobs.pop(key, None)
+                job.set_exception(e)
+
+    def _download(self, camera_name: str, date_str: str):
+        target_dir = self._target_dir(camera_name, date_str)
+        manifest = _read_manifest(target_dir)
+        if manifest is None:
+            files = [(p, r) for p, r in self.source.list_files(camera_name, date_str) if is_wanted(p)]
+            if not files:
+                print(f"⚠️ Nenhum arquivo encontrado para {camera_name}/{date_str}.")
+                return "missing"
+            os.makedirs(target_dir, exist_ok=True)
+            _write_manifest(target_dir, files)
+            manifest = _read_manifest(target_dir)
+
+        pending = missing_files(target_dir, manifest)
+        for entry in pending:
+            dest_path = os.path.join(target_dir, entry["path"])
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # Baixa para um arquivo temporário: um download interrompido nunca parece completo
+            # (e é retomado do ponto onde parou na próxima tentativa)
+            part_path = f"{dest_path}.part"
+            self.source.fetch(camera_name, date_str, entry["path"], entry["ref"], part_path)
+            os.replace(part_path, dest_path)
+
+        if pending:
+            print(f"✅ Dados prontos para {camera_name}/{date_str} ({len(pending)} arquivos)")
+        catalog, name = stores.catalog_for(self.base_dir, camera_name)
+        catalog.refresh_folder(name, date_str)
+        return "complete"
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_download_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+        return _manager
+
+
+@timed()
+def ensure_camera_data(camera_name: str, date_str: str, prefetch: bool = True):
+    """
+    Garante (em segundo plano) que a pasta da câmera/data esteja baixada.
+    Não bloqueia: retorna o status atual ('complete', 'pending', 'missing', ...)
+    e agenda o pré-carregamento dos dias vizinhos.
+    """
+    manager = get_download_manager()
+    job = manager.request(camera_name, date_str)
+    if prefetch:
+        manager.prefetch(camera_name, date_str)
+    if job.done():
+        return job.result() if job.exception() is None else "error"
+    return "pending"
+
+
+@timed()
+def download_status(camera_name: str, date_str: str):
+    return get_download_manager().status(camera_name, date_str)
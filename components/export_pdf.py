@@ -1,3 +1,4 @@
+import hashlib
 import os
 import pandas as pd
 from datetime import datetime
@@ -6,8 +7,17 @@ from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
+from components import anomalies, config, rollups, stores
+from components.cache import file_signature
+from components.profiling import timed
 
-BASE_DIR = r"G:\Meu Drive\Colab Notebooks\data\detections"
+BASE_DIR = config.BASE_DIR
+
+# Pasta dos relatórios gerados (um arquivo por dia e versão das entradas)
+REPORTS_DIR = os.path.join(config.STATE_DIR, "reports")
+
+# Incrementar quando o layout do relatório mudar, para não reaproveitar PDFs antigos
+REPORT_VERSION = 2
 
 # Mapeamento de períodos para horários
 period_to_time = {
@@ -17,80 +27,146 @@ period_to_time = {
     10: "17:00 – 18:00", 11: "18:00 – 19:00", 12: "19:00 – 20:00"
 }
 
-def read_csv_safely(path):
-    """Lê CSVs de forma segura."""
-    if not os.path.exists(path):
-        return None
-    try:
-        df = pd.read_csv(path)
-        df.columns = df.columns.str.strip()
-        return df
-    except Exception:
-        return None
+def report_sources(date_str, store_id=stores.DEFAULT_STORE):
+    """Arquivos de entrada do relatório de um dia: entradas da loja, depois os caixas."""
+    store = stores.get_store(store_id)
+    sources = [os.path.join(BASE_DIR, camera, date_str, "count", "people_total.csv") for camera in store.entrance_ids]
+    for number in store.queue_numbers:
+        sources.append(os.path.join(BASE_DIR, store.checkout_id(number), date_str, "queue", f"queue_time{number}.csv"))
+    return sources
 
 
-def generate_daily_report(date_str, output_path="relatorio_dia.pdf"):
-    """
-    Gera o relatório PDF completo com base em:
-    - Entradas do dia (people_total.csv)
-    - Tempos de fila (queue_time1.csv e queue_time2.csv)
-    """
+def queue_column(number):
+    """Coluna do tempo de fila de um caixa nas tabelas do relatório."""
+    return f"Fila Caixa {number} (s)"
 
-    # Caminhos dos arquivos
-    people_total_path = os.path.join(BASE_DIR, "camera11", date_str, "count", "people_total.csv")
-    queue1_path = os.path.join(BASE_DIR, "camera11", date_str, "queue", "queue_time1.csv")
-    queue2_path = os.path.join(BASE_DIR, "camera11", date_str, "queue", "queue_time2.csv")
 
-    # Lê CSVs
-    df_total = read_csv_safely(people_total_path)
-    df_q1 = read_csv_safely(queue1_path)
-    df_q2 = read_csv_safely(queue2_path)
+def queue_means(merged, store_id=stores.DEFAULT_STORE):
+    """[(caixa, tempo médio de fila do dia em s)] a partir de load_day_table()."""
+    return [(n, round(merged[queue_column(n)].mean(), 2)) for n in stores.get_store(store_id).queue_numbers]
 
-    if df_total is None or df_q1 is None or df_q2 is None:
-        raise FileNotFoundError("Um ou mais arquivos necessários não foram encontrados.")
 
-    # Normaliza colunas
-    for df in [df_total, df_q1, df_q2]:
-        if "Período" in df.columns:
-            df["Período"] = df["Período"].astype(str).str.strip()
+def report_path(date_str, store_id=stores.DEFAULT_STORE):
+    """
+    Caminho do PDF identificado pelo conteúdo das entradas: o mesmo dia com os
+    mesmos CSVs e a mesma consolidação (picos e períodos fora do padrão, que
+    dependem das semanas anteriores) sempre gera o mesmo arquivo; qualquer
+    mudança gera outro.
+    """
+    digest = hashlib.sha1(f"{REPORT_VERSION}|{date_str}|{rollups.day_state(date_str, store_id)}".encode("utf-8"))
+    for path, mtime, size in (file_signature(p) for p in report_sources(date_str, store_id)):
+        digest.update(f"|{os.path.relpath(path, BASE_DIR)}:{mtime}:{size}".encode("utf-8"))
+    prefix = "relatorio" if store_id == stores.DEFAULT_STORE else f"relatorio_{store_id}"
+    return os.path.join(REPORTS_DIR, f"{prefix}_{date_str}_{digest.hexdigest()[:12]}.pdf")
 
-    # Remove linha "Total" para cálculo detalhado
-    df_total_filtered = df_total[df_total["Período"].str.lower() != "total"].copy()
-    df_q1_filtered = df_q1[df_q1["Período"].astype(str).str.lower() != "total"].copy()
-    df_q2_filtered = df_q2[df_q2["Período"].astype(str).str.lower() != "total"].copy()
 
-    # Converte períodos em int
-    df_total_filtered["Período"] = df_total_filtered["Período"].astype(int)
-    df_q1_filtered["Período"] = df_q1_filtered["Período"].astype(int)
-    df_q2_filtered["Período"] = df_q2_filtered["Período"].astype(int)
+def load_day_table(date_str, store_id=stores.DEFAULT_STORE):
+    """
+    Tabela do dia por período (Período, Entradas, Fila Caixa N (s) de cada
+    caixa da loja, Horário), lida da consolidação por horário da loja
+    (components/rollups.py). Lança FileNotFoundError se faltar alguma métrica.
+    """
+    hourly = rollups.hourly_frame(date_str, store_id)
+    hourly = hourly[hourly["camera"] == ""]
+    columns = {"entries": "Entradas"}
+    columns.update({f"queue{n}": queue_column(n) for n in stores.get_store(store_id).queue_numbers})
+    if not set(columns) <= set(hourly["metric"]):
+        raise FileNotFoundError("Um ou mais arquivos necessários não foram encontrados.")
 
-    # Junta as tabelas pelo período
+    # Junta as métricas pelo período
     merged = pd.DataFrame({"Período": sorted(period_to_time.keys())})
-    merged = merged.merge(df_total_filtered[["Período", "Entradas"]], on="Período", how="left")
-    merged = merged.merge(df_q1_filtered[["Período", "Tempo Médio (s)"]], on="Período", how="left", suffixes=("", "_Caixa1"))
-    merged = merged.merge(df_q2_filtered[["Período", "Tempo Médio (s)"]], on="Período", how="left", suffixes=("", "_Caixa2"))
-
-    merged.rename(columns={
-        "Tempo Médio (s)": "Fila Caixa 1 (s)",
-        "Tempo Médio (s)_Caixa2": "Fila Caixa 2 (s)"
-    }, inplace=True)
+    for metric, column in columns.items():
+        values = hourly[hourly["metric"] == metric].rename(columns={"period": "Período", "value": column})
+        merged = merged.merge(values[["Período", column]], on="Período", how="left")
 
     # Mapeia o horário
     merged["Horário"] = merged["Período"].map(period_to_time)
     merged.fillna(0, inplace=True)
 
+    return merged
+
+
+def highlights(date_str, store_id=stores.DEFAULT_STORE):
+    """
+    (picos, anomalias) do dia na loja, lidos das consolidações: linhas
+    [métrica, horário de pico (valor)] e o DataFrame dos períodos fora do
+    padrão (components/anomalies.py).
+    """
+    daily = rollups.daily_frame(date_str, date_str, store_id)
+    daily = daily[(daily["camera"] == "") & daily["peak_period"].notna()]
+    peaks = []
+    for _, row in daily.iterrows():
+        unit = f"{row['peak_value']:.2f} s" if row["metric"].startswith("queue") else f"{row['peak_value']:.0f}"
+        peaks.append([anomalies.metric_label(row["metric"]), f"{period_to_time.get(int(row['peak_period']), '')} ({unit})"])
+    flagged = rollups.anomaly_frame(date_str, date_str, store_id)
+    flagged = flagged[flagged["camera"] == ""]
+    return peaks, flagged
+
+
+def summary_table(rows):
+    """Tabela 'Indicador | Valor' do resumo."""
+    table = Table(rows, colWidths=[9*cm, 6*cm])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    return table
+
+
+def period_table(merged):
+    """Tabela detalhada por período a partir de load_day_table()."""
+    queues = [c for c in merged.columns if c.startswith("Fila Caixa")]
+    table_data = [["Horário", "Entradas", *queues]]
+    for _, row in merged.iterrows():
+        table_data.append([
+            row["Horário"],
+            int(row["Entradas"]),
+            *(round(row[column], 2) for column in queues)
+        ])
+
+    # As colunas das filas dividem a largura que sobra na página
+    table = Table(table_data, colWidths=[4.5*cm, 3.5*cm] + [8*cm / max(len(queues), 1)] * len(queues))
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white])
+    ]))
+    return table
+
+
+@timed()
+def generate_daily_report(date_str, output_path=None, store_id=stores.DEFAULT_STORE):
+    """
+    Gera o relatório PDF completo com base em:
+    - Entradas do dia (people_total.csv)
+    - Tempos de fila dos caixas da loja (queue_time<N>.csv)
+
+    Sem 'output_path', grava em um caminho único por conteúdo (report_path) e
+    reaproveita o PDF se ele já tiver sido gerado com as mesmas entradas.
+    """
+    if output_path is None:
+        output_path = report_path(date_str, store_id)
+        if os.path.exists(output_path):
+            return output_path
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    merged = load_day_table(date_str, store_id)
+
     # Calcula totais do dia
     total_entradas = int(merged["Entradas"].sum())
-    media_fila1 = round(merged["Fila Caixa 1 (s)"].mean(), 2)
-    media_fila2 = round(merged["Fila Caixa 2 (s)"].mean(), 2)
 
     # Criação do PDF
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
     styles = getSampleStyleSheet()
     story = []
 
     # Cabeçalho
-    story.append(Paragraph(f"<b>📄 Relatório de Entradas e Tempos de Fila — {date_str}</b>", styles["Title"]))
+    store = stores.get_store(store_id)
+    store_text = "" if store.is_default else f" — {store.name}"
+    story.append(Paragraph(f"<b>📄 Relatório de Entradas e Tempos de Fila{store_text} — {date_str}</b>", styles["Title"]))
     story.append(Spacer(1, 12))
 
     # Resumo geral
@@ -98,40 +174,34 @@ def generate_daily_report(date_str, output_path="relatorio_dia.pdf"):
     resumo_data = [
         ["Indicador", "Valor"],
         ["Total de Entradas", f"{total_entradas}"],
-        ["Tempo Médio de Fila — Caixa 1 (s)", f"{media_fila1}"],
-        ["Tempo Médio de Fila — Caixa 2 (s)", f"{media_fila2}"]
+        *([f"Tempo Médio de Fila — Caixa {n} (s)", f"{media}"] for n, media in queue_means(merged, store_id))
     ]
 
-    resumo_table = Table(resumo_data, colWidths=[9*cm, 6*cm])
-    resumo_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
+    resumo_table = summary_table(resumo_data)
     story.append(resumo_table)
     story.append(Spacer(1, 18))
 
+    # Picos e períodos fora do padrão
+    peaks, flagged = highlights(date_str, store_id)
+    if peaks:
+        story.append(Paragraph("<b>📈 Picos do Dia</b>", styles["Heading2"]))
+        story.append(summary_table([["Indicador", "Horário de pico"]] + peaks))
+        story.append(Spacer(1, 18))
+    story.append(Paragraph("<b>⚠️ Fora do Padrão</b>", styles["Heading2"]))
+    if flagged.empty:
+        story.append(Paragraph(
+            f"Nenhum período fora do padrão em relação às últimas {anomalies.BASELINE_WEEKS} semanas.",
+            styles["Normal"]
+        ))
+    else:
+        for _, row in flagged.iterrows():
+            story.append(Paragraph(f"• {anomalies.describe(row)}", styles["Normal"]))
+    story.append(Spacer(1, 18))
+
     # Tabela detalhada
     story.append(Paragraph("<b>📅 Detalhamento por Período</b>", styles["Heading2"]))
 
-    table_data = [["Horário", "Entradas", "Fila Caixa 1 (s)", "Fila Caixa 2 (s)"]]
-    for _, row in merged.iterrows():
-        table_data.append([
-            row["Horário"],
-            int(row["Entradas"]),
-            round(row["Fila Caixa 1 (s)"], 2),
-            round(row["Fila Caixa 2 (s)"], 2)
-        ])
-
-    table = Table(table_data, colWidths=[4.5*cm, 3.5*cm, 4*cm, 4*cm])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white])
-    ]))
+    table = period_table(merged)
     story.append(table)
 
     # Rodapé
@@ -141,5 +211,9 @@ def generate_daily_report(date_str, output_path="relatorio_dia.pdf"):
         styles["Normal"]
     ))
 
+    # Gera em um arquivo temporário: um PDF parcial nunca é reaproveitado
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp_path, pagesize=A4)
     doc.build(story)
+    os.replace(tmp_path, output_path)
     return output_path
@@ -0,0 +1,175 @@
+# components/export_range.py
+"""Exportação de intervalos longos (PDF, CSV, XLSX) lida e gravada dia a dia."""
+import csv
+import os
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+
+from components import config, stores
+from components.export_pdf import load_day_table, period_table, queue_column, queue_means, summary_table
+from components.report_jobs import date_range
+
+# Pasta dos arquivos exportados
+EXPORTS_DIR = os.path.join(config.STATE_DIR, "exports")
+
+# Colunas da exportação tabular (uma linha por dia e período), seguidas das filas dos caixas da loja
+EXPORT_COLUMNS = ["Data", "Período", "Horário", "Entradas"]
+
+
+def export_columns(store_id=stores.DEFAULT_STORE):
+    """Cabeçalho da exportação tabular da loja."""
+    return EXPORT_COLUMNS + [queue_column(n) for n in stores.get_store(store_id).queue_numbers]
+
+
+def iter_day_tables(start_date, end_date, store_id=stores.DEFAULT_STORE, skipped=None):
+    """
+    Gera (data, tabela do dia) para cada dia com dados no intervalo. Os dias
+    sem dados são acrescentados à lista skipped, se indicada.
+    """
+    for date_str in date_range(start_date, end_date):
+        try:
+            yield date_str, load_day_table(date_str, store_id)
+        except FileNotFoundError:
+            if skipped is not None:
+                skipped.append(date_str)
+
+
+class _LazyStory(list):
+    """
+    Lista de flowables que se reabastece a partir de um gerador de seções.
+
+    O reportlab consome a 'story' pela frente (del flowables[0]) e consulta
+    len() a cada passo; aqui len() puxa a próxima seção só quando o buffer
+    está quase vazio, então apenas um dia fica em memória por vez. Mantém
+    alguns itens de folga para o keepWithNext dos títulos.
+    """
+
+    LOOKAHEAD = 4
+
+    def __init__(self, sections):
+        super().__init__()
+        self._sections = iter(sections)
+        self._exhausted = False
+
+    def __len__(self):
+        while not self._exhausted and super().__len__() <= self.LOOKAHEAD:
+            try:
+                self.extend(next(self._sections))
+            except StopIteration:
+                self._exhausted = True
+        return super().__len__()
+
+
+def _pdf_sections(start_date, end_date, styles, store_id=stores.DEFAULT_STORE, skipped=None):
+    """Gera as seções do PDF: capa, um bloco por dia e o resumo do intervalo."""
+    store = stores.get_store(store_id)
+    store_text = "" if store.is_default else f" — {store.name}"
+    yield [
+        Paragraph(f"<b>📄 Relatório de Entradas e Tempos de Fila{store_text} — {start_date} a {end_date}</b>", styles["Title"]),
+        Spacer(1, 12),
+    ]
+
+    days = 0
+    total_entradas = 0
+    soma_filas = dict.fromkeys(store.queue_numbers, 0.0)
+    for date_str, merged in iter_day_tables(start_date, end_date, store_id, skipped):
+        entradas = int(merged["Entradas"].sum())
+        medias = queue_means(merged, store_id)
+        days += 1
+        total_entradas += entradas
+        for number, media in medias:
+            soma_filas[number] += media
+
+        yield [
+            Paragraph(f"<b>📅 {date_str}</b>", styles["Heading2"]),
+            summary_table([
+                ["Indicador", "Valor"],
+                ["Total de Entradas", f"{entradas}"],
+                *([f"Tempo Médio de Fila — Caixa {n} (s)", f"{media}"] for n, media in medias),
+            ]),
+            Spacer(1, 12),
+            period_table(merged),
+            PageBreak(),
+        ]
+
+    if days == 0:
+        raise FileNotFoundError("Nenhum dia com dados no intervalo selecionado.")
+
+    yield [
+        Paragraph("<b>📊 Resumo do Período</b>", styles["Heading2"]),
+        summary_table([
+            ["Indicador", "Valor"],
+            ["Dias com dados", f"{days}"],
+            ["Total de Entradas", f"{total_entradas}"],
+            ["Média Diária de Entradas", f"{round(total_entradas / days, 1)}"],
+            *([f"Tempo Médio de Fila — Caixa {n} (s)", f"{round(soma / days, 2)}"] for n, soma in soma_filas.items()),
+        ]),
+        Spacer(1, 24),
+        Paragraph("<i>Relatório gerado automaticamente pelo Dashboard SmartAware.</i>", styles["Normal"]),
+    ]
+
+
+def _default_path(start_date, end_date, extension, store_id=stores.DEFAULT_STORE):
+    os.makedirs(EXPORTS_DIR, exist_ok=True)
+    prefix = "relatorio" if store_id == stores.DEFAULT_STORE else f"relatorio_{store_id}"
+    return os.path.join(EXPORTS_DIR, f"{prefix}_{start_date}_{end_date}.{extension}")
+
+
+def export_range_pdf(start_date, end_date, output_path=None, store_id=stores.DEFAULT_STORE, skipped=None):
+    """PDF com uma seção por dia do intervalo, gerado em streaming (dias sem dados vão para skipped)."""
+    output_path = output_path or _default_path(start_date, end_date, "pdf", store_id)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp_path, pagesize=A4)
+    try:
+        doc.build(_LazyStory(_pdf_sections(start_date, end_date, getSampleStyleSheet(), store_id, skipped)))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _iter_rows(start_date, end_date, store_id=stores.DEFAULT_STORE, skipped=None):
+    columns = export_columns(store_id)[1:]
+    for date_str, merged in iter_day_tables(start_date, end_date, store_id, skipped):
+        for periodo, horario, entradas, *filas in merged[columns].itertuples(index=False, name=None):
+            yield [date_str, int(periodo), horario, int(entradas), *(round(float(fila), 2) for fila in filas)]
+
+
+def export_range_csv(start_date, end_date, output_path=None, store_id=stores.DEFAULT_STORE, skipped=None):
+    """CSV com uma linha por dia e período, escrito dia a dia (dias sem dados vão para skipped)."""
+    output_path = output_path or _default_path(start_date, end_date, "csv", store_id)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(export_columns(store_id))
+        for row in _iter_rows(start_date, end_date, store_id, skipped):
+            writer.writerow(row)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def export_range_xlsx(start_date, end_date, output_path=None, store_id=stores.DEFAULT_STORE, skipped=None):
+    """XLSX (openpyxl em modo write-only, que grava as linhas em streaming; dias sem dados vão para skipped)."""
+    from openpyxl import Workbook
+
+    output_path = output_path or _default_path(start_date, end_date, "xlsx", store_id)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Relatório")
+    sheet.append(export_columns(store_id))
+    for row in _iter_rows(start_date, end_date, store_id, skipped):
+        sheet.append(row)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+EXPORTERS = {
+    "PDF": (export_range_pdf, "application/pdf"),
+    "CSV": (export_range_csv, "text/csv"),
+    "XLSX": (export_range_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
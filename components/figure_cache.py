@@ -0,0 +1,92 @@
+# components/figure_cache.py
+"""Cache das figuras Plotly do "Ver mais", em memória e em JSON no disco."""
+import hashlib
+import os
+import threading
+
+import plotly.io as pio
+
+from components import config
+from components.cache import file_signature, get_cache
+from components.profiling import span
+
+# Pasta das especificações JSON das figuras
+FIGURES_DIR = os.path.join(config.STATE_DIR, "cache", "figures")
+
+# Incrementar quando o código que monta as figuras mudar (invalida o cache em disco)
+FIGURE_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def fingerprint(paths, state: str = ""):
+    """Impressão digital (sha1) das assinaturas dos arquivos de origem (e do estado extra, se houver)."""
+    digest = hashlib.sha1(f"v{FIGURE_VERSION}|{state}".encode("utf-8"))
+    for path, mtime_ns, size in (file_signature(p) for p in paths):
+        digest.update(f"|{os.path.basename(path)}:{mtime_ns}:{size}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _figure_path(chart: str, camera_name: str, date_str: str, digest: str):
+    folder = os.path.join(FIGURES_DIR, chart, camera_name)
+    return folder, os.path.join(folder, f"{date_str}.{digest}.json")
+
+
+def _remove_stale(folder: str, date_str: str, keep: str):
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(f"{date_str}.") and name != keep:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def _read_figure(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return pio.from_json(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_figure(folder: str, path: str, date_str: str, fig):
+    try:
+        with _lock:
+            os.makedirs(folder, exist_ok=True)
+            _remove_stale(folder, date_str, os.path.basename(path))
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(fig.to_json())
+            os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar a figura em cache ({path}): {e}")
+
+
+def get_figure(chart: str, camera_name: str, date_str: str, paths, builder, state: str = ""):
+    """
+    Retorna a figura do gráfico: da memória, do JSON em disco ou montada por
+    builder() (que deve devolver a figura, ou None se não houver dados).
+    state entra na impressão digital junto com os arquivos (ex.: o estado das
+    consolidações lidas, ver rollups.range_state).
+    A figura é compartilhada entre sessões (e montada uma só vez mesmo com
+    pedidos simultâneos): não a modifique.
+    """
+    digest = fingerprint(paths, state)
+    key = ("figure", chart, camera_name, date_str, digest)
+
+    def _load():
+        folder, path = _figure_path(chart, camera_name, date_str, digest)
+        with span(f"figure:{chart}"):
+            fig = _read_figure(path) if os.path.exists(path) else None
+            if fig is None:
+                fig = builder()
+                if fig is not None:
+                    _write_figure(folder, path, date_str, fig)
+        return fig
+
+    # Sessões que pedem a mesma figura ao mesmo tempo esperam pela mesma montagem
+    return get_cache().get_or_compute(key, _load, f"figure:{chart}")
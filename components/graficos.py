@@ -3,8 +3,10 @@ import plotly.express as px
 import os
 import streamlit as st
 from datetime import datetime, date, timedelta
-
-BASE_DIR = r"G:\Meu Drive\Colab Notebooks\data\detections"
+from components import metrics_store, aggregations, rollups, stores
+from components.day_snapshot import get_day_snapshot
+from components.figure_cache import get_figure
+from components.profiling import timed
 
 # --- Mapeamento de períodos para horários ---
 period_to_time = {
@@ -15,17 +17,11 @@ period_to_time = {
 }
 
 
-def show_people_chart(camera_name: str, date_str: str, placeholder):
-    """Mostra o gráfico de fluxo de pessoas do ambiente."""
-    csv_path = os.path.join(BASE_DIR, camera_name, date_str, "count", "people_count.csv")
-    if not os.path.exists(csv_path):
-        placeholder.error(f"Arquivo CSV não encontrado: {csv_path}")
-        return
+def _people_figure(camera_name: str, date_str: str, snapshot):
+    df_plot = snapshot.period_frame("people_count")
+    if df_plot is None:
+        return None
 
-    df = pd.read_csv(csv_path)
-    df.columns = df.columns.str.strip()
-    df_plot = df[df["Período"].str.lower() != "total"].copy()
-    df_plot["Período"] = df_plot["Período"].astype(int)
     df_plot["Horário"] = df_plot["Período"].map(period_to_time)
 
     fig = px.bar(
@@ -44,21 +40,30 @@ def show_people_chart(camera_name: str, date_str: str, placeholder):
         title_x=0.5,
         margin=dict(t=120)
     )
-    placeholder.plotly_chart(fig, use_container_width=True)
-    placeholder.info("Cada barra representa o número de pessoas detectadas em cada período do dia.")
+    return fig
 
 
-def show_total_entries_chart(date_str: str, placeholder):
-    """Mostra o gráfico de entradas totais da loja (camera11)."""
-    csv_path = os.path.join(BASE_DIR, "camera11", date_str, "count", "people_total.csv")
-    if not os.path.exists(csv_path):
+@timed()
+def show_people_chart(camera_name: str, date_str: str, placeholder, snapshot=None):
+    """Mostra o gráfico de fluxo de pessoas do ambiente."""
+    csv_path = metrics_store.source_path(camera_name, date_str, "people_count")
+    fig = get_figure(
+        "people", camera_name, date_str, [csv_path],
+        lambda: _people_figure(camera_name, date_str, snapshot or get_day_snapshot(camera_name, date_str)),
+    )
+    if fig is None:
         placeholder.error(f"Arquivo CSV não encontrado: {csv_path}")
         return
 
-    df = pd.read_csv(csv_path)
-    df.columns = df.columns.str.strip()
-    df_plot = df[df["Período"].str.lower() != "total"].copy()
-    df_plot["Período"] = df_plot["Período"].astype(int)
+    placeholder.plotly_chart(fig, use_container_width=True)
+    placeholder.info("Cada barra representa o número de pessoas detectadas em cada período do dia.")
+
+
+def _total_entries_figure(date_str: str, snapshot):
+    df_plot = snapshot.period_frame("people_total")
+    if df_plot is None:
+        return None
+
     df_plot["Horário"] = df_plot["Período"].map(period_to_time)
 
     fig = px.bar(
@@ -77,41 +82,36 @@ def show_total_entries_chart(date_str: str, placeholder):
         title_x=0.5,
         margin=dict(t=120)
     )
+    return fig
+
+
+@timed()
+def show_total_entries_chart(date_str: str, placeholder, snapshot=None, store_id: str = stores.DEFAULT_STORE):
+    """Mostra o gráfico de entradas totais da loja (câmeras de entrada)."""
+    store = stores.get_store(store_id)
+    paths = [metrics_store.source_path(cam, date_str, "people_total") for cam in store.entrance_ids]
+    csv_path = paths[0]
+    fig = get_figure(
+        "entries", store.entrance_id, date_str, paths,
+        lambda: _total_entries_figure(date_str, snapshot or get_day_snapshot(store.entrance_id, date_str)),
+    )
+    if fig is None:
+        placeholder.error(f"Arquivo CSV não encontrado: {csv_path}")
+        return
+
     placeholder.plotly_chart(fig, use_container_width=True)
     placeholder.info("Cada barra representa o total de pessoas que entraram no estabelecimento em cada período.")
 
 
-def show_queue_time_chart(date_str: str, placeholder):
-    """Mostra o gráfico comparativo do tempo médio de fila (s) entre Caixa 1 e Caixa 2."""
-    queue_dir = os.path.join(BASE_DIR, "camera11", date_str, "queue")
-    queue_files = ["queue_time1.csv", "queue_time2.csv"]
+def queue_time_figure(date_str: str, snapshot):
+    """Figura comparativa das filas por período a partir de um DaySnapshot (ou None sem dados)."""
     dfs = []
 
-    for idx, file in enumerate(queue_files, start=1):
-        csv_path = os.path.join(queue_dir, file)
-        if not os.path.exists(csv_path):
-            placeholder.warning(f"⚠️ Arquivo não encontrado: {file}")
+    for idx in stores.store_of(snapshot.camera_name).queue_numbers:
+        df = snapshot.period_frame(f"queue{idx}")
+        if df is None:
             continue
 
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
-
-        # Garante que as colunas existam
-        if "Período" not in df.columns or "Tempo Médio (s)" not in df.columns:
-            placeholder.warning(f"⚠️ Colunas esperadas não encontradas em {file}")
-            continue
-
-        # Converte para string apenas se possível
-        df["Período"] = df["Período"].astype(str)
-
-        # Remove linhas com 'total' de forma segura (independente do tipo)
-        df = df[~df["Período"].apply(lambda x: isinstance(x, str) and x.lower() == "total")].copy()
-
-        # Agora converte os períodos válidos em inteiros
-        df["Período"] = pd.to_numeric(df["Período"], errors="coerce")
-        df.dropna(subset=["Período"], inplace=True)
-        df["Período"] = df["Período"].astype(int)
-
         # Mapeia horários
         df["Horário"] = df["Período"].map(period_to_time)
         df["Caixa"] = f"Caixa {idx}"
@@ -122,10 +122,9 @@ def show_queue_time_chart(date_str: str, placeholder):
 
     # Caso nenhum DataFrame tenha sido carregado corretamente
     if not dfs:
-        placeholder.error("Nenhum arquivo de tempo de fila encontrado ou em formato incorreto.")
-        return
+        return None
 
-    # Junta os dois arquivos
+    # Junta os arquivos dos caixas
     df_final = pd.concat(dfs, ignore_index=True)
 
     # Cria o gráfico
@@ -148,13 +147,63 @@ def show_queue_time_chart(date_str: str, placeholder):
         legend_title_text="",
         margin=dict(t=120)
     )
+    return fig
+
+
+@timed()
+def show_queue_time_chart(date_str: str, placeholder, snapshot=None, store_id: str = stores.DEFAULT_STORE):
+    """Mostra o gráfico comparativo do tempo médio de fila (s) entre os caixas da loja."""
+    store = stores.get_store(store_id)
+    snapshot = snapshot or get_day_snapshot(store.entrance_id, date_str)
+    for idx in store.queue_numbers:
+        if not snapshot.has(f"queue{idx}"):
+            placeholder.warning(f"⚠️ Arquivo não encontrado: queue_time{idx}.csv")
+
+    paths = [metrics_store.source_path(store.checkout_id(idx), date_str, f"queue{idx}") for idx in store.queue_numbers]
+    fig = get_figure("queues", store.entrance_id, date_str, paths, lambda: queue_time_figure(date_str, snapshot))
+    if fig is None:
+        placeholder.error("Nenhum arquivo de tempo de fila encontrado ou em formato incorreto.")
+        return
+
     placeholder.plotly_chart(fig, use_container_width=True)
     placeholder.info("Cada barra mostra o tempo médio de fila (em segundos) para cada caixa durante o dia.")
 
+
+def _last_15_days_figure(sel_date, dates, store_id: str):
+    daily = rollups.daily_frame(dates[0], dates[-1], store_id, "entries")
+    totals = daily.set_index("date")["total"].dropna().astype(int).to_dict()
+
+    data_rows = [{"Data": d_str, "Total de Entradas": totals.get(d_str, 0)} for d_str in dates]
+
+    # Converte Data → datetime e formata para o eixo
+    df_plot = pd.DataFrame(data_rows)
+    df_plot["Data"] = pd.to_datetime(df_plot["Data"], errors="coerce")
+    df_plot["Dia"] = df_plot["Data"].dt.strftime("%d/%m")
+
+    # Gráfico de linha
+    fig = px.line(
+        df_plot,
+        x="Dia",
+        y="Total de Entradas",
+        markers=True,
+        title=f"📆 Entradas Diárias — Últimos 15 dias até {sel_date.strftime('%d/%m/%Y')}",
+        color_discrete_sequence=["#2ca02c"]
+    )
+    fig.update_traces(textposition="top center")
+    fig.update_layout(
+        xaxis_title="Data",
+        yaxis_title="Total de Entradas",
+        title_x=0.5,
+        margin=dict(t=90)
+    )
+    return fig
+
+
 # --- gráfico de entradas por dia na semana selecionada ---
-def show_total_entries_last_15_days_chart(selected_date_str: str, placeholder):
+@timed()
+def show_total_entries_last_15_days_chart(selected_date_str: str, placeholder, store_id: str = stores.DEFAULT_STORE):
     """
-    Mostra o total de pessoas que entraram na loja (camera11)
+    Mostra o total de pessoas que entraram na loja (câmeras de entrada)
     na data selecionada e nos 15 dias anteriores.
     Se não houver CSV em algum dia, mostra 0.
     """
@@ -166,51 +215,133 @@ def show_total_entries_last_15_days_chart(selected_date_str: str, placeholder):
 
     # Gera o intervalo de 15 dias anteriores + data selecionada
     date_range = [sel_date - timedelta(days=i) for i in range(15, -1, -1)]
+    dates = [d.strftime("%Y-%m-%d") for d in date_range]
 
-    data_rows = []
-    for d in date_range:
-        d_str = d.strftime("%Y-%m-%d")
-        csv_path = os.path.join(BASE_DIR, "camera11", d_str, "count", "people_total.csv")
-
-        total_value = 0
-        if os.path.exists(csv_path):
-            try:
-                df = pd.read_csv(csv_path)
-                df.columns = df.columns.str.strip()
-                if "Período" in df.columns:
-                    period_col = df["Período"].astype(str).str.strip().str.lower()
-                    total_row = df[period_col.eq("total")]
-                    if not total_row.empty:
-                        if "Entradas" in total_row.columns:
-                            total_value = pd.to_numeric(total_row["Entradas"].iloc[0], errors="coerce")
-                        elif "Número de Pessoas" in total_row.columns:
-                            total_value = pd.to_numeric(total_row["Número de Pessoas"].iloc[0], errors="coerce")
-                        total_value = 0 if pd.isna(total_value) else int(total_value)
-            except Exception:
-                total_value = 0
-
-        data_rows.append({"Data": d_str, "Total de Entradas": total_value})
+    store = stores.get_store(store_id)
+    paths = [metrics_store.source_path(cam, d_str, "people_total") for cam in store.entrance_ids for d_str in dates]
+    fig = get_figure(
+        "entries_15_days", store.entrance_id, selected_date_str, paths,
+        lambda: _last_15_days_figure(sel_date, dates, store_id),
+        rollups.range_state(dates[0], dates[-1], store_id),
+    )
+    placeholder.plotly_chart(fig, use_container_width=True)
+    placeholder.info("Dias sem dados aparecem com valor 0.")
 
-    # Converte Data → datetime e formata para o eixo
-    df_plot = pd.DataFrame(data_rows)
-    df_plot["Data"] = pd.to_datetime(df_plot["Data"], errors="coerce")
-    df_plot["Dia"] = df_plot["Data"].dt.strftime("%d/%m")
 
-    # Gráfico de linha
+def _weekday_figure(selected_date_str: str, days: int, store_id: str):
+    start_str, end_str = aggregations.date_window(selected_date_str, days)
+    df = aggregations.store_weekday_totals(start_str, end_str, [store_id])
+    if df.empty:
+        return None
+
+    df["Média de Entradas"] = df["Entradas (média)"].round(1)
+
+    fig = px.bar(
+        df,
+        x="Dia da Semana",
+        y="Média de Entradas",
+        color="Média de Entradas",
+        color_continuous_scale="Greens",
+        text="Média de Entradas",
+        category_orders={"Dia da Semana": aggregations.WEEKDAYS},
+        title=f"Média de Entradas por Dia da Semana — últimos {days} dias"
+    )
+    fig.update_traces(textposition="outside", cliponaxis=False)
+    fig.update_layout(
+        xaxis_title="Dia da Semana",
+        yaxis_title="Média de Entradas",
+        title_x=0.5,
+        margin=dict(t=90)
+    )
+    return fig
+
+
+# --- gráfico de entradas médias por dia da semana ---
+@timed()
+def show_entries_by_weekday_chart(selected_date_str: str, placeholder, days: int = 90, store_id: str = stores.DEFAULT_STORE):
+    """
+    Mostra a média de entradas na loja (câmeras de entrada) por dia da semana
+    nos 'days' dias até a data selecionada.
+    """
+    start_str, end_str = aggregations.date_window(selected_date_str, days)
+    dates = pd.date_range(start_str, end_str).strftime("%Y-%m-%d")
+    store = stores.get_store(store_id)
+    paths = [metrics_store.source_path(cam, d_str, "people_total") for cam in store.entrance_ids for d_str in dates]
+    fig = get_figure(
+        f"weekday_{days}", store.entrance_id, selected_date_str, paths,
+        lambda: _weekday_figure(selected_date_str, days, store_id),
+        rollups.range_state(start_str, end_str, store_id),
+    )
+    if fig is None:
+        placeholder.warning("⚠️ Sem dados de entradas no período.")
+        return
+
+    placeholder.plotly_chart(fig, use_container_width=True)
+    placeholder.info("Cada barra mostra a média diária de entradas considerando apenas os dias com dados.")
+
+
+def _stores_figure(selected_date_str: str, days: int, store_ids):
+    start_str, end_str = aggregations.date_window(selected_date_str, days)
+    df = aggregations.store_totals(start_str, end_str, store_ids)
+    df = df.dropna(subset=["Entradas"])
+    if df.empty:
+        return None
+
+    df["Dia"] = pd.to_datetime(df["Data"]).dt.strftime("%d/%m")
     fig = px.line(
-        df_plot,
+        df,
         x="Dia",
-        y="Total de Entradas",
+        y="Entradas",
+        color="Loja",
         markers=True,
-        title=f"📆 Entradas Diárias — Últimos 15 dias até {sel_date.strftime('%d/%m/%Y')}",
-        color_discrete_sequence=["#2ca02c"]
+        title=f"🏬 Entradas Diárias por Loja — últimos {days} dias"
     )
-    fig.update_traces(textposition="top center")
     fig.update_layout(
         xaxis_title="Data",
         yaxis_title="Total de Entradas",
         title_x=0.5,
+        legend_title_text="",
         margin=dict(t=90)
     )
+    return fig
+
+
+# --- gráfico de entradas por loja (visão agregada entre lojas) ---
+@timed()
+def show_stores_chart(selected_date_str: str, placeholder, store_ids, days: int = 15):
+    """
+    Compara as lojas selecionadas nos 'days' dias até a data: entradas por dia
+    e uma tabela com o total de entradas e a fila média de cada caixa.
+    Só os dados das lojas selecionadas são lidos.
+    """
+    if not store_ids:
+        placeholder.info("Selecione ao menos uma loja.")
+        return
+
+    start_str, end_str = aggregations.date_window(selected_date_str, days)
+    dates = pd.date_range(start_str, end_str).strftime("%Y-%m-%d")
+    selected = [stores.get_store(s) for s in store_ids]
+    paths = [
+        metrics_store.source_path(cam, d_str, "people_total")
+        for store in selected for cam in store.entrance_ids for d_str in dates
+    ]
+    fig = get_figure(
+        f"stores_{days}", "+".join(sorted(store_ids)), selected_date_str, paths,
+        lambda: _stores_figure(selected_date_str, days, store_ids),
+        "|".join(rollups.range_state(start_str, end_str, s) for s in sorted(store_ids)),
+    )
+    if fig is None:
+        placeholder.warning("⚠️ Sem dados de entradas no período.")
+        return
     placeholder.plotly_chart(fig, use_container_width=True)
-    placeholder.info("Dias sem dados aparecem com valor 0.")
+
+    df = aggregations.store_totals(start_str, end_str, store_ids)
+    table = df.groupby("Loja").agg(
+        **{
+            "Dias": ("Data", "nunique"),
+            "Total de Entradas": ("Entradas", "sum"),
+            "Média Diária de Entradas": ("Entradas", "mean"),
+            **{m: (m, "mean") for m in aggregations.queue_metrics(store_ids)},
+        }
+    ).round(2)
+    placeholder.dataframe(table, use_container_width=True)
@@ -0,0 +1,228 @@
+# components/heatmap_engine.py
+"""Heatmaps de qualquer janela de tempo a partir das detecções brutas (points/detections.npy)."""
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image
+
+from components import config
+from components.cache import get_cache, read_image
+from components.profiling import timed
+
+try:
+    import cv2
+except ImportError:  # opencv é opcional: sem ele o mapa não é suavizado
+    cv2 = None
+
+BASE_DIR = config.BASE_DIR
+
+POINTS_DIR = "points"
+POINTS_FILE = "detections.npy"
+META_FILE = "meta.json"
+
+# Quadro de referência da câmera gravado pelo processing/pipeline em heatmaps/
+BACKGROUND_FILE = "background.jpg"
+
+# Tamanho (px) de cada célula da grade de densidade
+CELL_SIZE = 8
+
+# Desvio padrão (em células) da suavização gaussiana
+SMOOTH_SIGMA = 1.5
+
+# Tamanho do quadro quando não há meta.json nem heatmap_total.png
+DEFAULT_FRAME_SIZE = (1280, 720)
+
+
+def points_path(camera_name: str, date_str: str):
+    return os.path.join(BASE_DIR, camera_name, date_str, POINTS_DIR, POINTS_FILE)
+
+
+def has_points(camera_name: str, date_str: str):
+    return os.path.exists(points_path(camera_name, date_str))
+
+
+def _meta_path(camera_name: str, date_str: str):
+    return os.path.join(BASE_DIR, camera_name, date_str, POINTS_DIR, META_FILE)
+
+
+def _read_meta(meta_path: str):
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _open_points(path: str, meta_path: str):
+    """Abre o array com memory-map (sem lê-lo) e diz se ele está ordenado por tempo."""
+    points = np.load(path, mmap_mode="r")
+    if points.ndim != 2 or points.shape[1] < 3:
+        raise ValueError(f"Formato inesperado em {path}: {points.shape}")
+    return points, bool(_read_meta(meta_path).get("sorted_by_time", True))
+
+
+def load_points(camera_name: str, date_str: str):
+    """Retorna (array memory-mapped, ordenado_por_tempo) ou (None, False)."""
+    path = points_path(camera_name, date_str)
+    if not os.path.exists(path):
+        return None, False
+    meta_path = _meta_path(camera_name, date_str)
+    return get_cache().load("points", [path, meta_path], _open_points, path, meta_path)
+
+
+def frame_size(camera_name: str, date_str: str):
+    """(largura, altura) do quadro da câmera: meta.json, heatmap_total.png ou padrão."""
+    meta = _read_meta(_meta_path(camera_name, date_str))
+    if "width" in meta:
+        return int(meta["width"]), int(meta["height"])
+    total_png = os.path.join(BASE_DIR, camera_name, date_str, "heatmaps", "heatmap_total.png")
+    if os.path.exists(total_png):
+        return read_image(total_png).size
+    return DEFAULT_FRAME_SIZE
+
+
+def _window_slice(points, is_sorted: bool, start_s: float, end_s: float):
+    """Detecções com start_s <= t < end_s (lendo só as páginas necessárias se ordenado)."""
+    t = points[:, 0]
+    if is_sorted:
+        lo, hi = np.searchsorted(t, [start_s, end_s], side="left")
+        return points[lo:hi]
+    mask = (t >= start_s) & (t < end_s)
+    return points[mask]
+
+
+def smooth(grid: np.ndarray, sigma: float = SMOOTH_SIGMA):
+    """Suavização gaussiana da grade (sem efeito se o OpenCV não estiver instalado)."""
+    if cv2 is None or sigma <= 0:
+        return grid
+    return cv2.GaussianBlur(grid, (0, 0), sigmaX=sigma, sigmaY=sigma)
+
+
+def _compute_density(camera_name: str, dates: tuple, start_s: float, end_s: float, cell_size: int):
+    width, height = frame_size(camera_name, dates[-1])
+    bins = (max(1, height // cell_size), max(1, width // cell_size))
+    grid = np.zeros(bins, dtype=np.float32)
+    for date_str in dates:
+        points, is_sorted = load_points(camera_name, date_str)
+        if points is None:
+            continue
+        window = _window_slice(points, is_sorted, start_s, end_s)
+        if len(window) == 0:
+            continue
+        # 5ª coluna (quando existe): peso da amostra gravado pelo processing/pipeline
+        weights = window[:, 4] if window.shape[1] > 4 else None
+        hist, _, _ = np.histogram2d(
+            window[:, 2], window[:, 1], bins=bins, range=[[0, height], [0, width]], weights=weights
+        )
+        grid += hist.astype(np.float32)
+    return smooth(grid, SMOOTH_SIGMA)
+
+
+def density(camera_name: str, dates, start_s: float = 0, end_s: float = 24 * 3600, cell_size: int = CELL_SIZE):
+    """
+    Grade de densidade (float32, altura x largura em células) das detecções
+    de uma câmera em uma ou mais datas, na janela [start_s, end_s) do dia.
+    O resultado fica em cache por (câmera, janela) enquanto os arquivos não mudarem.
+    """
+    dates = tuple(dates)
+    paths = [points_path(camera_name, d) for d in dates]
+    return get_cache().load(
+        "heatmap_density", paths, _compute_density, camera_name, dates, float(start_s), float(end_s), int(cell_size)
+    )
+
+
+def _jet(x: np.ndarray):
+    """Rampa tipo "jet" (azul → vermelho) para valores em [0, 1]."""
+    r = np.clip(1.5 - np.abs(4 * x - 3), 0, 1)
+    g = np.clip(1.5 - np.abs(4 * x - 2), 0, 1)
+    b = np.clip(1.5 - np.abs(4 * x - 1), 0, 1)
+    return np.stack([r, g, b], axis=-1)
+
+
+# Escalas de cor: pontos de controle (posição, (r, g, b)) interpolados em LUT_SIZE cores
+COLORMAPS = {
+    "jet": None,
+    "inferno": [(0.0, (0, 0, 4)), (0.25, (87, 16, 110)), (0.5, (188, 55, 84)), (0.75, (249, 142, 9)), (1.0, (252, 255, 164))],
+    "viridis": [(0.0, (68, 1, 84)), (0.25, (59, 82, 139)), (0.5, (33, 145, 140)), (0.75, (94, 201, 98)), (1.0, (253, 231, 37))],
+    "hot": [(0.0, (0, 0, 0)), (0.4, (230, 0, 0)), (0.8, (255, 210, 0)), (1.0, (255, 255, 255))],
+    "cinza": [(0.0, (0, 0, 0)), (1.0, (255, 255, 255))],
+}
+LUT_SIZE = 256
+
+# Normalizações: "max" (linear até o máximo), "log" (log1p) e "percentile" (linear até o percentil)
+NORMALIZATIONS = ("max", "log", "percentile")
+SCALE_PERCENTILE = 99.0
+
+_luts = {}
+
+
+def colormap_lut(name: str = "jet"):
+    """Tabela (LUT_SIZE, 3) uint8 da escala de cor."""
+    lut = _luts.get(name)
+    if lut is None:
+        x = np.linspace(0, 1, LUT_SIZE)
+        stops = COLORMAPS[name]
+        if stops is None:
+            lut = _jet(x) * 255
+        else:
+            positions = [pos for pos, _ in stops]
+            lut = np.stack([np.interp(x, positions, [c[i] for _, c in stops]) for i in range(3)], axis=-1)
+        lut = np.round(lut).astype(np.uint8)
+        _luts[name] = lut
+    return lut
+
+
+def scale_of(grid: np.ndarray, mode: str = "max", percentile: float = SCALE_PERCENTILE):
+    """Valor que corresponde ao topo da escala para a grade (0 se vazia)."""
+    if mode == "percentile":
+        positive = grid[grid > 0]
+        return float(np.percentile(positive, percentile)) if positive.size else 0.0
+    return float(grid.max()) if grid.size else 0.0
+
+
+def normalize(grid: np.ndarray, mode: str = "max", vmax: float | None = None):
+    """
+    Grade em [0, 1]. Com vmax (ex.: o maior valor de vários períodos ou dias)
+    todas as grades ficam na mesma escala; sem vmax, cada uma usa a própria.
+    """
+    if mode not in NORMALIZATIONS:
+        raise ValueError(f"Normalização desconhecida: {mode}")
+    vmax = scale_of(grid, mode) if vmax is None else float(vmax)
+    if vmax <= 0:
+        return np.zeros(grid.shape, dtype=np.float32)
+    if mode == "log":
+        norm = np.log1p(grid) / np.log1p(vmax)
+    else:
+        norm = grid / vmax
+    return np.clip(norm, 0, 1).astype(np.float32)
+
+
+def colorize(grid: np.ndarray, size=None, cmap: str = "jet", mode: str = "max", vmax: float | None = None):
+    """Converte a grade em imagem RGB (escala 'cmap'), opcionalmente redimensionada."""
+    norm = normalize(grid, mode, vmax)
+    rgb = colormap_lut(cmap)[np.round(norm * (LUT_SIZE - 1)).astype(np.intp)]
+    img = Image.fromarray(rgb, mode="RGB")
+    if size is not None:
+        img = img.resize(size, Image.BILINEAR)
+    return img
+
+
+@timed()
+def render_window(camera_name: str, end_date: str, start_s: float, end_s: float, days: int = 1):
+    """
+    Heatmap (PIL.Image no tamanho do quadro) da janela [start_s, end_s) em
+    'days' dias terminando em end_date, ou None se não houver detecções brutas.
+    """
+    last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    dates = [(last - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days - 1, -1, -1)]
+    dates = [d for d in dates if has_points(camera_name, d)]
+    if not dates:
+        return None
+    grid = density(camera_name, dates, start_s, end_s)
+    return colorize(grid, frame_size(camera_name, dates[-1]))
+
+
+def seconds_of(value):
+    """Converte datetime.time em segundos desde 00:00."""
+    return value.hour * 3600 + value.minute * 60 + value.second
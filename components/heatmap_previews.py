@@ -0,0 +1,119 @@
+# components/heatmap_previews.py
+"""Cache de versões reduzidas (WebP ou JPEG) dos PNGs de heatmap."""
+import io
+import os
+import threading
+
+from PIL import Image, features
+
+from components import config, stores
+from components.cache import get_cache, read_image
+
+# Pasta local das imagens derivadas
+PREVIEW_DIR = os.path.join(config.STATE_DIR, "cache", "heatmaps")
+
+# Larguras (px) dos níveis gerados
+LEVELS = (480, 960, 1600)
+
+# Largura padrão da coluna do heatmap no layout "wide"
+DEFAULT_WIDTH = 960
+
+FORMAT = "WEBP" if features.check("webp") else "JPEG"
+EXTENSION = "webp" if FORMAT == "WEBP" else "jpg"
+QUALITY = 80
+
+_lock = threading.Lock()
+
+
+def pick_level(width: int, source_width: int):
+    """Menor nível que cobre 'width' (nunca maior que a imagem original)."""
+    for level in LEVELS:
+        if level >= width:
+            return min(level, source_width)
+    return min(LEVELS[-1], source_width)
+
+
+def _preview_path(source_path: str, level: int):
+    """
+    Retorna (pasta, prefixo da versão atual, caminho) do arquivo derivado,
+    espelhando <câmera>/<data> da origem (<loja>/<câmera>/<data> nas outras lojas).
+    """
+    st_ = os.stat(source_path)
+    heatmaps_dir = os.path.dirname(source_path)
+    date_dir = os.path.dirname(heatmaps_dir)
+    camera_dir = os.path.dirname(date_dir)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    prefix = f"{stem}.{st_.st_mtime_ns:x}-{st_.st_size:x}."
+    parts = [os.path.basename(camera_dir), os.path.basename(date_dir)]
+    store_dir = os.path.basename(os.path.dirname(camera_dir))
+    if store_dir != stores.DEFAULT_STORE and store_dir in stores.load_stores():
+        parts.insert(0, store_dir)
+    folder = os.path.join(PREVIEW_DIR, *parts)
+    return folder, prefix, os.path.join(folder, f"{prefix}{level}.{EXTENSION}")
+
+
+def _encode(img: Image.Image, level: int):
+    if img.width > level:
+        height = max(1, round(img.height * level / img.width))
+        img = img.resize((level, height), Image.LANCZOS)
+    if FORMAT == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format=FORMAT, quality=QUALITY)
+    return buffer.getvalue()
+
+
+def _remove_stale(folder: str, prefix: str):
+    """Apaga versões derivadas de uma origem que já mudou."""
+    stem = prefix.split(".", 1)[0]
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(f"{stem}.") and not name.startswith(prefix):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def _build_preview(source_path: str, level: int):
+    folder, prefix, path = _preview_path(source_path, level)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    data = _encode(read_image(source_path), level)
+    with _lock:
+        os.makedirs(folder, exist_ok=True)
+        _remove_stale(folder, prefix)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return data
+
+
+def _image_size(path: str):
+    # Image.open só lê o cabeçalho: não decodifica o PNG inteiro
+    with Image.open(path) as img:
+        return img.size
+
+
+def get_preview(source_path: str, width: int = DEFAULT_WIDTH):
+    """
+    Retorna os bytes (WebP/JPEG) do nível adequado para exibir o heatmap com
+    'width' pixels de largura, ou None se o PNG de origem não existir.
+    """
+    if not os.path.exists(source_path):
+        return None
+    source_width, _ = get_cache().load("image_size", [source_path], _image_size, source_path)
+    level = pick_level(width, source_width)
+    return get_cache().load("heatmap_preview", [source_path], _build_preview, source_path, level)
+
+
+def warm_previews(source_path: str):
+    """Gera antecipadamente todos os níveis de um heatmap."""
+    for level in LEVELS:
+        get_preview(source_path, level)
@@ -1,9 +1,19 @@
 # src/dashboard/components/heatmaps.py
+"""Heatmaps do dashboard: PNGs prontos ou grades de densidade coloridas na hora."""
 import os
-from PIL import Image
+import numpy as np
 import streamlit as st
+from PIL import Image
+from components import config, stores
+from components.cache import get_cache, read_image
+from components.heatmap_engine import BACKGROUND_FILE, colorize, scale_of
+from components.heatmap_previews import DEFAULT_WIDTH, get_preview
+from components.profiling import timed
 
-BASE_DIR = r"G:\Meu Drive\Colab Notebooks\data\detections"
+BASE_DIR = config.BASE_DIR
+
+# Opacidade padrão do heatmap sobre o quadro de referência
+DEFAULT_OPACITY = 0.6
 
 def get_heatmap_file(camera_name: str, date_str: str, interval_number):
     """Retorna o caminho completo do arquivo de heatmap para a câmera, data e intervalo."""
@@ -12,40 +22,130 @@ def get_heatmap_file(camera_name: str, date_str: str, interval_number):
     else:
         return os.path.join(BASE_DIR, camera_name, date_str, "heatmaps", f"heatmap_interval_{interval_number}.png")
 
+def get_density_file(camera_name: str, date_str: str, interval_number):
+    """Caminho da grade de densidade (.npy) ao lado do PNG do heatmap."""
+    return os.path.splitext(get_heatmap_file(camera_name, date_str, interval_number))[0] + ".npy"
+
+def get_background_file(camera_name: str, date_str: str):
+    return os.path.join(BASE_DIR, camera_name, date_str, "heatmaps", BACKGROUND_FILE)
+
 def load_heatmap(camera_name: str, date_str: str, interval_number: int):
     heatmap_file = get_heatmap_file(camera_name, date_str, interval_number)
     if os.path.exists(heatmap_file):
-        return Image.open(heatmap_file)
+        return read_image(heatmap_file)
     return None
 
-def display_heatmap(camera_name: str, date_str: str, interval_number: int):
-    img = load_heatmap(camera_name, date_str, interval_number)
+@timed()
+def display_heatmap(camera_name: str, date_str: str, interval_number: int, width: int = DEFAULT_WIDTH, zoom: bool = False):
+    """
+    Exibe o heatmap. Por padrão envia a versão reduzida que cabe em 'width'
+    pixels; com zoom=True envia o PNG em resolução original.
+    """
+    caption = f"📍 {camera_name} | {date_str} | Intervalo {interval_number}"
+    if zoom:
+        img = load_heatmap(camera_name, date_str, interval_number)
+    else:
+        img = get_preview(get_heatmap_file(camera_name, date_str, interval_number), width)
     if img:
-        st.image(img, caption=f"📍 {camera_name} | {date_str} | Intervalo {interval_number}", use_container_width=True)
+        st.image(img, caption=caption, use_container_width=True)
     else:
         st.warning("⚠️ Heatmap não encontrado para os filtros selecionados.")
 
-def get_available_cameras():
-    """Retorna as câmeras disponíveis dentro de data/detections."""
-    if not os.path.exists(BASE_DIR):
-        return []
-    return sorted([d for d in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, d))])
+def _open_density(path: str):
+    grid = np.load(path, mmap_mode="r")
+    if grid.ndim != 2:
+        raise ValueError(f"Formato inesperado em {path}: {grid.shape}")
+    return grid
+
+def load_density(camera_name: str, date_str: str, interval_number):
+    """Grade de densidade (memory-mapped, somente leitura) ou None se não houver .npy."""
+    path = get_density_file(camera_name, date_str, interval_number)
+    if not os.path.exists(path):
+        return None
+    return get_cache().load("density_grid", [path], _open_density, path)
+
+def shared_scale(camera_name: str, items, mode: str = "max"):
+    """
+    Topo da escala comum a várias grades da câmera: items = [(data, intervalo)].
+    Retorna None se nenhuma grade existir.
+    """
+    scales = []
+    for date_str, interval_number in items:
+        path = get_density_file(camera_name, date_str, interval_number)
+        if os.path.exists(path):
+            scales.append(get_cache().load("density_scale", [path], _grid_scale, path, mode))
+    return max(scales) if scales else None
 
+def _grid_scale(path: str, mode: str):
+    return scale_of(_open_density(path), mode)
+
+def _render_density(density_path: str, background_path: str, cmap: str, mode: str, vmax, opacity: float, width: int):
+    grid = _open_density(density_path)
+    rows, cols = grid.shape
+    size = (width, max(1, round(width * rows / cols)))
+    heat = colorize(np.asarray(grid), size, cmap, mode, vmax)
+    if os.path.exists(background_path):
+        background = read_image(background_path).convert("RGB").resize(size, Image.BILINEAR)
+        return Image.blend(background, heat, opacity)
+    # Sem quadro de referência: a opacidade vira o canal alfa (sobre o fundo da página)
+    heat.putalpha(int(round(opacity * 255)))
+    return heat
+
+def render_density(camera_name: str, date_str: str, interval_number, cmap: str = "jet", mode: str = "max",
+                   vmax: float | None = None, opacity: float = DEFAULT_OPACITY, width: int = DEFAULT_WIDTH):
+    """
+    Heatmap renderizado a partir da grade bruta (PIL.Image com 'width' px de
+    largura) ou None se não houver .npy. vmax fixa o topo da escala (ver shared_scale).
+    """
+    density_path = get_density_file(camera_name, date_str, interval_number)
+    if not os.path.exists(density_path):
+        return None
+    background_path = get_background_file(camera_name, date_str)
+    return get_cache().load(
+        "density_render", [density_path, background_path], _render_density,
+        density_path, background_path, cmap, mode, vmax, float(opacity), int(width)
+    )
+
+@timed()
+def display_density_heatmap(camera_name: str, date_str: str, interval_number, cmap: str = "jet", mode: str = "max",
+                            vmax: float | None = None, opacity: float = DEFAULT_OPACITY, width: int = DEFAULT_WIDTH):
+    """Exibe o heatmap renderizado da grade bruta; sem .npy, volta para o PNG."""
+    img = render_density(camera_name, date_str, interval_number, cmap, mode, vmax, opacity, width)
+    if img is None:
+        display_heatmap(camera_name, date_str, interval_number, width)
+        return
+    caption = f"📍 {camera_name} | {date_str} | Intervalo {interval_number}"
+    st.image(img, caption=caption, use_container_width=True)
+
+@timed()
+def get_available_cameras(store_id: str = stores.DEFAULT_STORE):
+    """Retorna os ids das câmeras disponíveis da loja."""
+    return stores.camera_ids(BASE_DIR, store_id)
+
+@timed()
 def get_available_dates(camera_name: str):
     """Retorna as datas disponíveis para uma câmera."""
-    camera_path = os.path.join(BASE_DIR, camera_name)
-    if not os.path.exists(camera_path):
-        return []
-    return sorted([d for d in os.listdir(camera_path) if os.path.isdir(os.path.join(camera_path, d))])
+    catalog, name = stores.catalog_for(BASE_DIR, camera_name)
+    return catalog.dates(name)
 
+@timed()
 def get_intervals(camera_name: str, date_str: str):
     """Retorna os intervalos disponíveis dentro da pasta heatmaps da data escolhida."""
-    heatmaps_path = os.path.join(BASE_DIR, camera_name, date_str, "heatmaps")
-    if not os.path.exists(heatmaps_path):
-        return []
-    heatmap_files = [f for f in os.listdir(heatmaps_path) if f.startswith("heatmap_interval_")]
-    intervals_available = sorted(set(int(f.split("_")[-1].split(".")[0]) for f in heatmap_files))
-    return intervals_available
+    catalog, name = stores.catalog_for(BASE_DIR, camera_name)
+    return catalog.intervals(name, date_str)
+
+@timed()
+def has_raw_detections(camera_name: str, date_str: str):
+    """Indica se a data tem as detecções brutas usadas pelo heatmap sob demanda."""
+    catalog, name = stores.catalog_for(BASE_DIR, camera_name)
+    return catalog.has_artifact(name, date_str, "points/detections.npy")
+
+@timed()
+def has_density(camera_name: str, date_str: str, interval_number):
+    """Indica se o período tem a grade de densidade bruta (.npy) ao lado do PNG."""
+    relative = os.path.relpath(get_density_file(camera_name, date_str, interval_number), os.path.join(BASE_DIR, camera_name, date_str))
+    catalog, name = stores.catalog_for(BASE_DIR, camera_name)
+    return catalog.has_artifact(name, date_str, relative)
 
 def heatmap_filter_ui():
     """Interface Streamlit para escolher câmera, data e intervalo."""
@@ -0,0 +1,359 @@
+# components/live.py
+"""Modo ao vivo: métricas do dia corrente lidas incrementalmente do log de eventos de cada câmera."""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from components import config, stores
+from components.day_snapshot import ENTRANCE_CAMERA, DaySnapshot
+from components.heatmap_engine import CELL_SIZE, DEFAULT_FRAME_SIZE, colorize, smooth
+from components.metrics_store import FIRST_PERIOD_HOUR, PERIODS, TOTAL_PERIOD
+
+# Pasta dos logs de eventos ao vivo: <câmera>/<data>/events.jsonl, uma linha JSON
+# por evento (só acrescentadas), com t em segundos desde 00:00 do dia, ex.:
+#   {"type": "meta", "width": 1280, "height": 720}
+#   {"type": "detection", "t": 36012.4, "track": 17, "x": 640.0, "y": 360.5}
+#   {"type": "entry", "t": 36015.0}
+#   {"type": "queue", "t": 36100.0, "queue": 1, "wait_s": 42.5}
+LIVE_DIR = os.path.join(config.STATE_DIR, "live")
+EVENTS_FILE = "events.jsonl"
+
+# Intervalo (s) entre atualizações da interface no modo ao vivo
+REFRESH_SECONDS = 5
+
+
+def today_str():
+    return date.today().strftime("%Y-%m-%d")
+
+
+def events_path(camera_name: str, date_str: str):
+    return os.path.join(LIVE_DIR, camera_name, date_str, EVENTS_FILE)
+
+
+def live_cameras(date_str: str):
+    """Câmeras com log de eventos na data."""
+    try:
+        names = os.listdir(LIVE_DIR)
+    except OSError:
+        return []
+    return sorted(name for name in names if os.path.exists(events_path(name, date_str)))
+
+
+def period_of(t: float):
+    """Período (1..PERIODS) de um instante em segundos desde 00:00, ou None fora do expediente."""
+    period = int((t - FIRST_PERIOD_HOUR * 3600) // 3600) + 1
+    return period if 1 <= period <= PERIODS else None
+
+
+def current_period():
+    now = datetime.now()
+    return period_of(now.hour * 3600 + now.minute * 60 + now.second)
+
+
+class EventLog:
+    """Escrita no log de eventos de uma câmera (cada lote em uma única escrita)."""
+
+    def __init__(self, camera_name: str, date_str: str):
+        self.path = events_path(camera_name, date_str)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def append(self, events):
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events)
+        if not data:
+            return
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+
+
+class LiveAggregator:
+    """Agregação incremental do log de eventos de uma câmera em um dia."""
+
+    def __init__(self, camera_name: str, date_str: str):
+        self.camera_name = camera_name
+        self.date_str = date_str
+        self.path = events_path(camera_name, date_str)
+        # Caixas da loja da câmera (eventos de outras filas são ignorados)
+        self.queue_numbers = stores.store_of(camera_name).queue_numbers
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._pending = b""
+        self.version = 0
+        self.events = 0
+        self.last_event_t = None
+        self.updated_at = None
+        # Índice 0 (TOTAL_PERIOD) = dia inteiro; 1..PERIODS = períodos
+        self._tracks = [set() for _ in range(PERIODS + 1)]
+        self._entries = np.zeros(PERIODS + 1, dtype=np.int64)
+        # Linha = número do caixa
+        queues = max(self.queue_numbers, default=0) + 1
+        self._queue_sum = np.zeros((queues, PERIODS + 1))
+        self._queue_count = np.zeros((queues, PERIODS + 1), dtype=np.int64)
+        self._has_entries = False
+        self._has_queue = [False] * queues
+        self._frame_size = None
+        self._grid = None
+        self._images = {}
+
+    # --- Leitura incremental ---
+    def update(self):
+        """Lê os eventos novos do log. Retorna quantos eventos foram aplicados."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        with self._lock:
+            if size < self._offset:
+                # Arquivo recriado (ex.: produtor reiniciado): recomeça do zero
+                self._reset()
+            if size == self._offset:
+                return 0
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            self._offset += len(data)
+
+            lines = (self._pending + data).split(b"\n")
+            # A última linha pode estar incompleta (ainda sendo escrita)
+            self._pending = lines.pop()
+
+            detections = []
+            applied = 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(event, detections)
+                applied += 1
+            if detections:
+                self._accumulate(detections)
+            if applied:
+                self.version += 1
+                self.events += applied
+                self.updated_at = time.time()
+            return applied
+
+    def _apply(self, event: dict, detections: list):
+        kind = event.get("type")
+        if kind == "meta":
+            if self._grid is None:
+                self._frame_size = (int(event["width"]), int(event["height"]))
+            return
+        t = float(event.get("t", 0.0))
+        self.last_event_t = t if self.last_event_t is None else max(self.last_event_t, t)
+        period = period_of(t)
+        if kind == "detection":
+            track = event.get("track")
+            if track is not None:
+                self._tracks[TOTAL_PERIOD].add(track)
+                if period:
+                    self._tracks[period].add(track)
+            detections.append((period or TOTAL_PERIOD, float(event["x"]), float(event["y"])))
+        elif kind == "entry":
+            self._has_entries = True
+            self._entries[TOTAL_PERIOD] += 1
+            if period:
+                self._entries[period] += 1
+        elif kind == "queue":
+            queue = int(event.get("queue", 1))
+            if queue not in self.queue_numbers:
+                return
+            self._has_queue[queue] = True
+            wait = float(event["wait_s"])
+            self._queue_sum[queue, TOTAL_PERIOD] += wait
+            self._queue_count[queue, TOTAL_PERIOD] += 1
+            if period:
+                self._queue_sum[queue, period] += wait
+                self._queue_count[queue, period] += 1
+
+    def _accumulate(self, detections):
+        """Soma um lote de detecções na grade (índice 0 = dia, 1..PERIODS = períodos)."""
+        width, height = self._frame_size or DEFAULT_FRAME_SIZE
+        if self._grid is None:
+            self._frame_size = (width, height)
+            self._grid = np.zeros((PERIODS + 1, max(1, height // CELL_SIZE), max(1, width // CELL_SIZE)), dtype=np.float32)
+        batch = np.asarray(detections, dtype=np.float64)
+        periods = batch[:, 0].astype(np.intp)
+        rows = np.clip((batch[:, 2] // CELL_SIZE).astype(np.intp), 0, self._grid.shape[1] - 1)
+        cols = np.clip((batch[:, 1] // CELL_SIZE).astype(np.intp), 0, self._grid.shape[2] - 1)
+        np.add.at(self._grid[TOTAL_PERIOD], (rows, cols), 1.0)
+        in_period = periods != TOTAL_PERIOD
+        np.add.at(self._grid, (periods[in_period], rows[in_period], cols[in_period]), 1.0)
+
+    # --- Consultas ---
+    def _last_period(self):
+        """Último período com dados até agora (os seguintes ficam NaN)."""
+        if self.last_event_t is None:
+            return 0
+        period = period_of(self.last_event_t)
+        if period is None:
+            return PERIODS if self.last_event_t >= FIRST_PERIOD_HOUR * 3600 else 0
+        return period
+
+    def _array(self, values):
+        array = np.full(PERIODS + 1, np.nan)
+        last = self._last_period()
+        array[TOTAL_PERIOD] = values[TOTAL_PERIOD]
+        array[1:last + 1] = values[1:last + 1]
+        array.setflags(write=False)
+        return array
+
+    def arrays(self):
+        """{tipo: array por período} no formato do DaySnapshot (None se o tipo não teve eventos)."""
+        with self._lock:
+            people = None
+            if self._tracks[TOTAL_PERIOD]:
+                people = self._array(np.array([len(s) for s in self._tracks], dtype=np.float64))
+            entries = self._array(self._entries.astype(np.float64)) if self._has_entries else None
+            result = {"people_count": people, "people_total": entries}
+            for queue in self.queue_numbers:
+                if not self._has_queue[queue]:
+                    result[f"queue{queue}"] = None
+                    continue
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    means = self._queue_sum[queue] / self._queue_count[queue]
+                result[f"queue{queue}"] = self._array(means)
+            return result
+
+    def heatmap(self, period: int | None = None):
+        """Heatmap (PIL.Image no tamanho do quadro) do dia ou de um período, ou None sem detecções."""
+        index = TOTAL_PERIOD if period is None else int(period)
+        with self._lock:
+            if self._grid is None or not 0 <= index <= PERIODS:
+                return None
+            cached = self._images.get(index)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            grid = self._grid[index].copy()
+            frame_size = self._frame_size
+            version = self.version
+        img = colorize(smooth(grid), frame_size)
+        with self._lock:
+            self._images[index] = (version, img)
+        return img
+
+
+_aggregators = {}
+_aggregators_lock = threading.Lock()
+
+
+def get_aggregator(camera_name: str, date_str: str):
+    """Agregador compartilhado (por processo) de (câmera, data)."""
+    key = (camera_name, date_str)
+    with _aggregators_lock:
+        aggregator = _aggregators.get(key)
+        if aggregator is None:
+            # Descarta os agregadores de dias anteriores
+            for old in [k for k in _aggregators if k[1] != date_str]:
+                del _aggregators[old]
+            aggregator = LiveAggregator(camera_name, date_str)
+            _aggregators[key] = aggregator
+        return aggregator
+
+
+def live_snapshot(camera_name: str, date_str: str | None = None):
+    """DaySnapshot do dia ao vivo: pessoas da câmera, entradas e filas da entrada da loja."""
+    date_str = date_str or today_str()
+    camera = get_aggregator(camera_name, date_str)
+    entrance = get_aggregator(stores.store_of(camera_name).entrance_id, date_str)
+    camera.update()
+    if entrance is not camera:
+        entrance.update()
+    camera_arrays = camera.arrays()
+    entrance_arrays = camera_arrays if entrance is camera else entrance.arrays()
+    return DaySnapshot(camera_name, date_str, {
+        "people_count": camera_arrays["people_count"],
+        "people_total": entrance_arrays["people_total"],
+        **{kind: values for kind, values in entrance_arrays.items() if kind.startswith("queue")},
+    })
+
+
+def live_heatmap(camera_name: str, period: int | None = None, date_str: str | None = None):
+    """(imagem ou None, agregador) do heatmap ao vivo da câmera."""
+    aggregator = get_aggregator(camera_name, date_str or today_str())
+    aggregator.update()
+    return aggregator.heatmap(period), aggregator
+
+
+# --- Produtor sintético (substituto local do pipeline de detecção) ---
+class SimulatedProducer:
+    """Escreve eventos sintéticos de hoje nos logs das câmeras."""
+
+    def __init__(self, cameras, people: int = 15, frame_size=DEFAULT_FRAME_SIZE, seed=None):
+        self.cameras = list(cameras)
+        self.people = people
+        self.frame_size = frame_size
+        self._rng = random.Random(seed)
+        self._logs = {}
+        self._tracks = {}
+        self._next_track = 1
+
+    def _log(self, camera_name: str, date_str: str):
+        key = (camera_name, date_str)
+        if key not in self._logs:
+            log = EventLog(camera_name, date_str)
+            if not os.path.exists(log.path):
+                log.append([{"type": "meta", "width": self.frame_size[0], "height": self.frame_size[1]}])
+            self._logs[key] = log
+            self._tracks[camera_name] = {}
+        return self._logs[key]
+
+    def tick(self):
+        """Gera um segundo de eventos para todas as câmeras."""
+        now = datetime.now()
+        date_str = now.strftime("%Y-%m-%d")
+        t = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        width, height = self.frame_size
+        rng = self._rng
+        for camera_name in self.cameras:
+            log = self._log(camera_name, date_str)
+            tracks = self._tracks[camera_name]
+            # Pessoas entram e saem do quadro e caminham alguns pixels por segundo
+            for track in [k for k in tracks if rng.random() < 0.02]:
+                del tracks[track]
+            for _ in range(max(0, rng.randint(self.people // 2, self.people) - len(tracks))):
+                tracks[self._next_track] = [rng.uniform(0, width), rng.uniform(0, height)]
+                self._next_track += 1
+            events = []
+            for track, pos in tracks.items():
+                pos[0] = min(max(pos[0] + rng.gauss(0, 15), 0), width - 1)
+                pos[1] = min(max(pos[1] + rng.gauss(0, 15), 0), height - 1)
+                events.append({"type": "detection", "t": round(t, 2), "track": track, "x": round(pos[0], 1), "y": round(pos[1], 1)})
+            if camera_name == ENTRANCE_CAMERA:
+                if rng.random() < 0.05:
+                    events.append({"type": "entry", "t": round(t, 2)})
+                for queue in stores.store_of(camera_name).queue_numbers:
+                    if rng.random() < 0.03:
+                        events.append({"type": "queue", "t": round(t, 2), "queue": queue, "wait_s": round(rng.uniform(10, 180), 1)})
+            log.append(events)
+
+    def run(self, duration: float | None = None, interval: float = 1.0):
+        start = time.time()
+        while duration is None or time.time() - start < duration:
+            self.tick()
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera eventos sintéticos do modo ao vivo.")
+    parser.add_argument("--cameras", nargs="+", default=[ENTRANCE_CAMERA])
+    parser.add_argument("--people", type=int, default=15, help="pessoas simultâneas por câmera")
+    parser.add_argument("--duration", type=float, help="segundos (padrão: até Ctrl+C)")
+    args = parser.parse_args()
+    try:
+        SimulatedProducer(args.cameras, people=args.people).run(args.duration)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,347 @@
+# components/metrics_store.py
+"""Métricas por período em um banco SQLite por câmera, importadas dos CSVs diários."""
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from components import config
+from components.cache import cached_by_files
+from components.profiling import timed
+
+BASE_DIR = config.BASE_DIR
+
+# Pasta local onde ficam os bancos (um arquivo .sqlite por câmera)
+STORE_DIR = os.path.join(config.STATE_DIR, "metrics")
+
+# Período usado para guardar a linha "Total" dos CSVs
+TOTAL_PERIOD = 0
+
+# Períodos do dia: 1 = 08:00–09:00 ... 12 = 19:00–20:00
+FIRST_PERIOD_HOUR = 8
+PERIODS = 12
+
+# Tipos de métrica -> caminho do CSV dentro da pasta do dia
+# (os caixas além destes seguem o mesmo padrão: queue<N> -> queue/queue_time<N>.csv)
+SOURCES = {
+    "people_count": os.path.join("count", "people_count.csv"),
+    "people_total": os.path.join("count", "people_total.csv"),
+    "queue1": os.path.join("queue", "queue_time1.csv"),
+    "queue2": os.path.join("queue", "queue_time2.csv"),
+}
+
+# Coluna de valor de cada tipo (em ordem de preferência)
+VALUE_COLUMNS = {
+    "people_count": ["Número de Pessoas"],
+    "people_total": ["Entradas", "Número de Pessoas"],
+    "queue1": ["Tempo Médio (s)"],
+    "queue2": ["Tempo Médio (s)"],
+}
+
+# Coluna de valor dos CSVs de fila (queue<N>)
+QUEUE_VALUE_COLUMNS = ["Tempo Médio (s)"]
+
+# Métricas de contagem são devolvidas como inteiros
+INTEGER_KINDS = {"people_count", "people_total"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (date, kind, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (date, kind)
+) WITHOUT ROWID;
+"""
+
+_connections = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _store_path(camera_name: str):
+    return os.path.join(STORE_DIR, f"{camera_name}.sqlite")
+
+
+def _get_connection(camera_name: str):
+    """Retorna (conexão, lock) da câmera, abrindo o banco na primeira chamada."""
+    with _registry_lock:
+        conn = _connections.get(camera_name)
+        if conn is None:
+            # Câmeras das outras lojas ("<loja>/<câmera>") ficam numa subpasta por loja
+            os.makedirs(os.path.dirname(_store_path(camera_name)), exist_ok=True)
+            conn = sqlite3.connect(_store_path(camera_name), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Consolidação diária antiga: agora fica por loja em components/rollups.py
+            conn.execute("DROP TABLE IF EXISTS daily")
+            _connections[camera_name] = conn
+            _locks[camera_name] = threading.RLock()
+        return conn, _locks[camera_name]
+
+
+def close_all():
+    """Fecha todas as conexões abertas (útil em testes e ao trocar BASE_DIR)."""
+    with _registry_lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+        _locks.clear()
+
+
+def _queue_number(kind: str):
+    """Número do caixa de um tipo queue<N>, ou None."""
+    suffix = kind[len("queue"):]
+    return int(suffix) if kind.startswith("queue") and suffix.isdigit() else None
+
+
+def source_file(kind: str):
+    """Caminho do CSV de uma métrica dentro da pasta do dia."""
+    if kind not in SOURCES and _queue_number(kind) is not None:
+        return os.path.join("queue", f"queue_time{_queue_number(kind)}.csv")
+    return SOURCES[kind]
+
+
+def value_columns(kind: str):
+    """Colunas de valor aceitas para o tipo, em ordem de preferência."""
+    if kind not in VALUE_COLUMNS and _queue_number(kind) is not None:
+        return QUEUE_VALUE_COLUMNS
+    return VALUE_COLUMNS[kind]
+
+
+def source_path(camera_name: str, date_str: str, kind: str):
+    """Caminho do CSV de origem de uma métrica."""
+    return os.path.join(BASE_DIR, camera_name, date_str, source_file(kind))
+
+
+def _parse_period(value):
+    """Converte o valor da coluna 'Período' em inteiro (Total -> TOTAL_PERIOD)."""
+    text = str(value).strip()
+    if text.lower() == "total":
+        return TOTAL_PERIOD
+    try:
+        return int(float(text))
+    except ValueError:
+        return None
+
+
+def _parse_csv(csv_path: str, kind: str):
+    """Lê um CSV de métrica e devolve uma lista de (período, valor)."""
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    if "Período" not in df.columns:
+        return []
+    value_col = next((c for c in value_columns(kind) if c in df.columns), None)
+    if value_col is None:
+        return []
+
+    periods = df["Período"].map(_parse_period)
+    values = pd.to_numeric(df[value_col], errors="coerce")
+    rows = []
+    for period, value in zip(periods, values):
+        if period is None:
+            continue
+        rows.append((period, None if pd.isna(value) else float(value)))
+    return rows
+
+
+def peak(values: dict):
+    """
+    (período, valor) do maior valor de {período: valor}, ou (None, None).
+    Empates ficam com o período mais cedo: a mesma regra em todo o dashboard
+    (consolidações, visão geral, relatórios).
+    """
+    if not values:
+        return None, None
+    return max(values.items(), key=lambda kv: (kv[1], -kv[0]))
+
+
+def _stored_signature(conn, date_str: str, kind: str):
+    return conn.execute(
+        "SELECT mtime_ns, size FROM sources WHERE date = ? AND kind = ?", (date_str, kind)
+    ).fetchone()
+
+
+@timed()
+def _refresh(conn, lock, camera_name: str, date_str: str, kind: str):
+    """
+    Reprocessa o CSV de (data, tipo) se ele mudou desde a última leitura.
+    O CSV é lido fora do lock, então vários tipos/dias da mesma câmera podem
+    ser lidos em paralelo; só a gravação no banco é serializada.
+    """
+    csv_path = source_path(camera_name, date_str, kind)
+    try:
+        st_ = os.stat(csv_path)
+        signature = (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        signature = None
+
+    with lock:
+        if _stored_signature(conn, date_str, kind) == signature:
+            return
+
+    try:
+        rows = _parse_csv(csv_path, kind) if signature else []
+    except Exception:
+        # CSV corrompido ou ainda sendo escrito pelo Drive: tenta de novo na próxima leitura
+        return
+
+    with lock, conn:
+        # Outra thread pode ter importado a mesma versão enquanto este CSV era lido
+        if _stored_signature(conn, date_str, kind) == signature:
+            return
+        conn.execute("DELETE FROM metrics WHERE date = ? AND kind = ?", (date_str, kind))
+        conn.execute("DELETE FROM sources WHERE date = ? AND kind = ?", (date_str, kind))
+        if signature:
+            conn.executemany(
+                "INSERT OR REPLACE INTO metrics (date, kind, period, value) VALUES (?, ?, ?, ?)",
+                [(date_str, kind, period, value) for period, value in rows],
+            )
+            conn.execute(
+                "INSERT INTO sources (date, kind, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                (date_str, kind, signature[0], signature[1]),
+            )
+
+
+def refresh_day(camera_name: str, date_str: str, kinds=None):
+    """Garante que o banco da câmera reflete os CSVs atuais de um dia."""
+    conn, lock = _get_connection(camera_name)
+    for kind in kinds or SOURCES:
+        _refresh(conn, lock, camera_name, date_str, kind)
+
+
+def sync_camera(camera_name: str):
+    """Importa (ou atualiza) todos os dias disponíveis de uma câmera."""
+    camera_path = os.path.join(BASE_DIR, camera_name)
+    if not os.path.isdir(camera_path):
+        return
+    for date_str in sorted(os.listdir(camera_path)):
+        if os.path.isdir(os.path.join(camera_path, date_str)):
+            refresh_day(camera_name, date_str)
+
+
+def _convert(kind: str, value):
+    if value is None:
+        return None
+    return int(value) if kind in INTEGER_KINDS else value
+
+
+def _day_source(camera_name, date_str, kind, *args, **kwargs):
+    return [source_path(camera_name, date_str, kind)]
+
+
+@cached_by_files(_day_source)
+def get_metric(camera_name: str, date_str: str, kind: str, period: int = TOTAL_PERIOD):
+    """Retorna o valor de uma métrica em um período (ou a linha Total) ou None."""
+    conn, lock = _get_connection(camera_name)
+    _refresh(conn, lock, camera_name, date_str, kind)
+    with lock:
+        row = conn.execute(
+            "SELECT value FROM metrics WHERE date = ? AND kind = ? AND period = ?",
+            (date_str, kind, int(period)),
+        ).fetchone()
+    return _convert(kind, row[0]) if row else None
+
+
+@cached_by_files(_day_source)
+def get_period_values(camera_name: str, date_str: str, kind: str):
+    """Retorna {período: valor} do dia, sem a linha Total, ordenado por período."""
+    conn, lock = _get_connection(camera_name)
+    _refresh(conn, lock, camera_name, date_str, kind)
+    with lock:
+        rows = conn.execute(
+            "SELECT period, value FROM metrics WHERE date = ? AND kind = ? AND period != ? ORDER BY period",
+            (date_str, kind, TOTAL_PERIOD),
+        ).fetchall()
+    return {period: _convert(kind, value) for period, value in rows}
+
+
+@cached_by_files(_day_source)
+def has_data(camera_name: str, date_str: str, kind: str):
+    """Indica se o CSV de origem da métrica existe para o dia."""
+    conn, lock = _get_connection(camera_name)
+    _refresh(conn, lock, camera_name, date_str, kind)
+    with lock:
+        row = conn.execute(
+            "SELECT 1 FROM sources WHERE date = ? AND kind = ?", (date_str, kind)
+        ).fetchone()
+    return row is not None
+
+
+@cached_by_files(_day_source)
+def get_day_array(camera_name: str, date_str: str, kind: str):
+    """
+    Valores do dia em um array float64 indexado pelo período (a posição
+    TOTAL_PERIOD guarda a linha Total), com NaN onde não há valor.
+    Retorna None se o CSV do dia não existir. O array é somente leitura.
+    """
+    conn, lock = _get_connection(camera_name)
+    _refresh(conn, lock, camera_name, date_str, kind)
+    with lock:
+        if conn.execute("SELECT 1 FROM sources WHERE date = ? AND kind = ?", (date_str, kind)).fetchone() is None:
+            return None
+        rows = conn.execute(
+            "SELECT period, value FROM metrics WHERE date = ? AND kind = ?", (date_str, kind)
+        ).fetchall()
+    return _to_array(rows)
+
+
+def _to_array(rows):
+    values = np.full(max((period for period, _ in rows), default=TOTAL_PERIOD) + 1, np.nan)
+    for period, value in rows:
+        if value is not None and period >= 0:
+            values[period] = value
+    values.setflags(write=False)
+    return values
+
+
+def read_day_array(camera_name: str, date_str: str, kind: str):
+    """
+    Como get_day_array, mas lendo o CSV diretamente, sem passar pelo banco
+    (para processos auxiliares, ex.: o job de consolidação em components/rollups.py).
+    """
+    csv_path = source_path(camera_name, date_str, kind)
+    if not os.path.exists(csv_path):
+        return None
+    return _to_array(_parse_csv(csv_path, kind))
+
+
+def get_period_frame(camera_name: str, date_str: str, kind: str):
+    """
+    Retorna um DataFrame com as colunas 'Período' e a coluna de valor original
+    (ex.: 'Entradas'), ou None se o CSV do dia não existir.
+    """
+    if not has_data(camera_name, date_str, kind):
+        return None
+    values = get_period_values(camera_name, date_str, kind)
+    value_col = value_columns(kind)[0]
+    return pd.DataFrame({"Período": list(values.keys()), value_col: list(values.values())})
+
+
+def get_daily_values(camera_name: str, dates, kind: str, period: int = TOTAL_PERIOD):
+    """Retorna {data: valor} de uma métrica para várias datas em uma única consulta."""
+    dates = tuple(dates)
+    if not dates:
+        return {}
+    return _get_daily_values(camera_name, dates, kind, int(period))
+
+
+@cached_by_files(lambda camera_name, dates, kind, period: [source_path(camera_name, d, kind) for d in dates])
+def _get_daily_values(camera_name: str, dates: tuple, kind: str, period: int):
+    conn, lock = _get_connection(camera_name)
+    for date_str in dates:
+        _refresh(conn, lock, camera_name, date_str, kind)
+    with lock:
+        placeholders = ",".join("?" for _ in dates)
+        rows = conn.execute(
+            f"SELECT date, value FROM metrics WHERE kind = ? AND period = ? AND date IN ({placeholders})",
+            (kind, period, *dates),
+        ).fetchall()
+    return {date_str: _convert(kind, value) for date_str, value in rows}
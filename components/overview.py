@@ -1,2 +1,222 @@
-#RUN: streamlit run dashboard/app.py
-#G:\Meu Drive\Colab Notebooks\src>
\ No newline at end of file
+# components/overview.py
+"""Visão geral da loja (todas as câmeras x todos os períodos) a partir de resumos diários pré-calculados."""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import plotly.express as px
+
+from components import config, metrics_store, queue_analytics, stores
+from components.cache import file_signature, get_cache
+from components.day_snapshot import dwell_sources, get_day_snapshot, snapshot_sources
+from components.graficos import period_to_time
+from components.metrics_store import PERIODS, TOTAL_PERIOD
+from components.profiling import timed
+from components.utils import format_camera_name
+
+BASE_DIR = config.BASE_DIR
+
+# Pasta local dos resumos diários (um JSON por data)
+SUMMARY_DIR = os.path.join(config.STATE_DIR, "summaries")
+
+# Versão do formato do resumo (resumos de outra versão são refeitos)
+SUMMARY_VERSION = 2
+
+_build_lock = threading.Lock()
+
+
+def summary_path(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    folder = SUMMARY_DIR if store_id == stores.DEFAULT_STORE else os.path.join(SUMMARY_DIR, store_id)
+    return os.path.join(folder, f"{date_str}.json")
+
+
+def _peak(values):
+    """{"period", "value"} do maior valor entre os períodos (None se não houver valores)."""
+    period, value = metrics_store.peak({p: v for p, v in enumerate(values) if p != TOTAL_PERIOD and v is not None})
+    if period is None:
+        return None
+    return {"period": period, "value": value}
+
+
+def _source_paths(date_str: str, store, camera_names):
+    paths = set()
+    for camera_name in camera_names:
+        camera_id = store.camera_id(camera_name)
+        paths.update(metrics_store.source_path(cam, date_str, kind) for cam, kind in snapshot_sources(camera_id))
+        paths.update(queue_analytics.dwell_path(date_str, cam) for cam in dwell_sources(camera_id))
+    return sorted(paths)
+
+
+def files_signature(date_str: str, store_id: str, catalog_signature: dict):
+    """[caminho relativo, mtime_ns, tamanho] dos CSVs que compõem o resumo do dia."""
+    store = stores.get_store(store_id)
+    return [
+        [os.path.relpath(path, BASE_DIR), mtime_ns, size]
+        for path, mtime_ns, size in (file_signature(p) for p in _source_paths(date_str, store, catalog_signature))
+    ]
+
+
+def _row(values):
+    """Valores por período (posição 0 = total do dia) e o pico."""
+    return {"values": values, "peak": _peak(values)}
+
+
+# --- Montagem do resumo ---
+@timed()
+def build_day_summary(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    """Monta o resumo do dia da loja a partir dos snapshots das câmeras e o salva em disco."""
+    store = stores.get_store(store_id)
+    catalog = stores.store_catalog(BASE_DIR, store_id)
+    with _build_lock:
+        signature = catalog.day_signature(date_str)
+        periods = range(TOTAL_PERIOD, PERIODS + 1)
+        summary = {
+            "version": SUMMARY_VERSION,
+            "date": date_str,
+            "store": store_id,
+            "built_at": time.time(),
+            "signature": signature,
+            "files": files_signature(date_str, store_id, signature),
+            "people": {},
+            "entries": None,
+            "queues": {},
+        }
+        for camera_name in sorted(signature, key=lambda c: (c not in store.entrances, c)):
+            camera_id = store.camera_id(camera_name)
+            snapshot = get_day_snapshot(camera_id, date_str)
+            if snapshot.has("people_count"):
+                summary["people"][camera_id] = _row([snapshot.people(p or None) for p in periods])
+
+        entrance = get_day_snapshot(store.entrance_id, date_str)
+        if entrance.has("people_total"):
+            summary["entries"] = _row([entrance.entries(p or None) for p in periods])
+        for number in store.queue_numbers:
+            if entrance.has(f"queue{number}"):
+                summary["queues"][str(number)] = _row([entrance.queue(number, p or None) for p in periods])
+
+        path = summary_path(date_str, store_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, path)
+        return summary
+
+
+def _read_summary(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_day_summary(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    """
+    Resumo do dia da loja (lido do JSON e mantido no cache em memória). Se ele
+    não existir ou não bater com o catálogo, é montado agora.
+    """
+    path = summary_path(date_str, store_id)
+    summary = get_cache().load("day_summary", [path], _read_summary, path)
+    signature = stores.store_catalog(BASE_DIR, store_id).day_signature(date_str)
+    if (
+        summary is None
+        or summary.get("version") != SUMMARY_VERSION
+        or summary.get("signature") != signature
+        or summary.get("files") != files_signature(date_str, store_id, signature)
+    ):
+        summary = build_day_summary(date_str, store_id)
+    return summary
+
+
+class _SummaryListener:
+    """Refaz (na thread do catálogo) o resumo de cada data da loja que apareceu ou mudou."""
+
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+
+    def __eq__(self, other):
+        return isinstance(other, _SummaryListener) and other.store_id == self.store_id
+
+    def __hash__(self):
+        return hash(self.store_id)
+
+    def __call__(self, days):
+        for date_str in sorted({date_str for _, date_str in days}):
+            try:
+                build_day_summary(date_str, self.store_id)
+            except Exception as e:
+                print(f"⚠️ Erro ao montar o resumo de {self.store_id}/{date_str}: {e}")
+
+
+def watch_catalog(store_id: str = stores.DEFAULT_STORE):
+    """Passa a montar o resumo de cada dia da loja assim que o catálogo dela encontrar seus dados."""
+    stores.store_catalog(BASE_DIR, store_id).add_listener(_SummaryListener(store_id))
+
+
+# --- Matriz ---
+def _peak_label(peak):
+    if peak is None:
+        return "–"
+    return f"{period_to_time.get(peak['period'], peak['period'])} ({peak['value']})"
+
+
+def summary_frame(summary: dict):
+    """
+    Matriz do dia: uma linha por câmera (pessoas), pelas entradas e por caixa
+    (tempo médio, s); colunas = horários, Total e Pico.
+    """
+    rows = {}
+    for camera_name, row in summary["people"].items():
+        rows[f"📊 {format_camera_name(camera_name)}"] = row
+    if summary["entries"] is not None:
+        rows["🚶‍♂️ Entradas"] = summary["entries"]
+    for number, row in sorted(summary["queues"].items(), key=lambda item: int(item[0])):
+        rows[f"🕒 Caixa {number} (s)"] = row
+
+    columns = [period_to_time.get(p, f"Período {p}") for p in range(1, PERIODS + 1)]
+    data = {}
+    for label, row in rows.items():
+        values = row["values"]
+        data[label] = values[1:] + [values[TOTAL_PERIOD], _peak_label(row["peak"])]
+    frame = pd.DataFrame.from_dict(data, orient="index", columns=columns + ["Total", "Pico"])
+    frame.index.name = "Zona"
+    return frame
+
+
+def people_figure(summary: dict):
+    """Heatmap câmeras x horários com as pessoas de cada período."""
+    columns = [period_to_time.get(p, f"Período {p}") for p in range(1, PERIODS + 1)]
+    matrix = pd.DataFrame(
+        [row["values"][1:] for row in summary["people"].values()],
+        index=[format_camera_name(c) for c in summary["people"]],
+        columns=columns,
+        dtype=float,
+    )
+    fig = px.imshow(
+        matrix,
+        text_auto=True,
+        aspect="auto",
+        color_continuous_scale="YlOrRd",
+        labels={"x": "Horário", "y": "Câmera", "color": "Pessoas"},
+    )
+    fig.update_layout(margin=dict(l=10, r=10, t=30, b=10), height=120 + 40 * len(matrix))
+    return fig
+
+
+def show_overview(date_str: str, placeholder, store_id: str = stores.DEFAULT_STORE):
+    """Mostra a matriz de todas as câmeras e períodos do dia da loja."""
+    summary = get_day_summary(date_str, store_id)
+    if not summary["people"] and summary["entries"] is None and not summary["queues"]:
+        placeholder.info("Nenhum dado encontrado para esta data.")
+        return
+
+    if summary["people"]:
+        placeholder.plotly_chart(people_figure(summary), use_container_width=True)
+    placeholder.dataframe(summary_frame(summary), use_container_width=True)
+    placeholder.caption(
+        f"Resumo montado em {time.strftime('%d/%m/%Y %H:%M', time.localtime(summary['built_at']))} "
+        f"a partir de {len(summary['signature'])} câmera(s)."
+    )
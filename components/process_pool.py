@@ -0,0 +1,45 @@
+# components/process_pool.py
+"""Pool de processos auxiliares com os mesmos caminhos de dados do processo principal."""
+import importlib
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Caminhos que podem ser trocados em tempo de execução (testes, benchmark) e
+# precisam valer também nos processos filhos
+PATHS = {
+    "components.metrics_store": ("BASE_DIR", "STORE_DIR"),
+    "components.queue_analytics": ("BASE_DIR",),
+    "components.export_pdf": ("BASE_DIR", "REPORTS_DIR"),
+    "components.rollups": ("ROLLUP_DIR",),
+}
+
+
+def _current_paths():
+    """{(módulo, atributo): valor} dos módulos de PATHS já carregados neste processo."""
+    return {
+        (module, name): getattr(sys.modules[module], name)
+        for module, names in PATHS.items() if module in sys.modules
+        for name in names
+    }
+
+
+def _init_worker(paths: dict, initializer, initargs):
+    for (module, name), value in paths.items():
+        setattr(importlib.import_module(module), name, value)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def spawn_pool(max_workers: int, initializer=None, initargs=()):
+    """
+    ProcessPoolExecutor com processos 'spawn' (não herdam via fork as threads e
+    locks do servidor do Streamlit) que recebem os caminhos atuais de PATHS e
+    depois rodam initializer(*initargs), se indicado.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(_current_paths(), initializer, initargs),
+    )
@@ -0,0 +1,225 @@
+# components/profiling.py
+"""Medição de tempo por rerun do dashboard (?perf=1 na URL ou SMARTAWARE_PROFILE=1)."""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+from components import config
+
+# Pasta e arquivo do log rotativo de medições
+LOG_DIR = os.path.join(config.STATE_DIR, "logs")
+LOG_FILE = "perf.jsonl"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Variável de ambiente que liga a gravação de todos os reruns no log
+ENV_FLAG = "SMARTAWARE_PROFILE"
+
+# Parâmetro da URL que mostra o painel de desempenho (?perf=1)
+QUERY_PARAM = "perf"
+
+_current = contextvars.ContextVar("smartaware_rerun", default=None)
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+class Rerun:
+    """Spans e contadores de um rerun do script."""
+
+    def __init__(self, label: str = "rerun"):
+        self.label = label
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+        self.depth = 0
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.t0
+        return self.duration
+
+    def ordered_spans(self):
+        """Spans em ordem de início."""
+        return sorted(self.spans, key=lambda s: s["start_ms"])
+
+    def summary(self):
+        """{nome: (chamadas, total_ms, maior_ms)} ordenado pelo tempo total."""
+        totals = {}
+        for item in self.spans:
+            calls, total, peak = totals.get(item["name"], (0, 0.0, 0.0))
+            totals[item["name"]] = (calls + 1, total + item["ms"], max(peak, item["ms"]))
+        return dict(sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True))
+
+    def to_record(self):
+        return {
+            "ts": round(self.started_at, 3),
+            "label": self.label,
+            "total_ms": round((self.duration or 0.0) * 1000, 3),
+            "counters": self.counters,
+            "spans": self.ordered_spans(),
+        }
+
+
+class _Span:
+    __slots__ = ("rerun", "name", "attrs", "start", "depth")
+
+    def __init__(self, rerun: Rerun, name: str, attrs: dict):
+        self.rerun = rerun
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = self.rerun.depth
+        self.rerun.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.rerun.depth -= 1
+        item = {
+            "name": self.name,
+            "start_ms": round((self.start - self.rerun.t0) * 1000, 3),
+            "ms": round((end - self.start) * 1000, 3),
+            "depth": self.depth,
+        }
+        if self.attrs:
+            item["attrs"] = self.attrs
+        if exc_type is not None:
+            item["error"] = exc_type.__name__
+        self.rerun.spans.append(item)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current_rerun():
+    return _current.get()
+
+
+def span(name: str, **attrs):
+    """Context manager que mede o trecho (sem efeito se não houver medição ativa)."""
+    rerun = _current.get()
+    if rerun is None:
+        return _NULL_SPAN
+    return _Span(rerun, name, attrs)
+
+
+def count(name: str, amount: int = 1):
+    """Incrementa um contador do rerun atual (ex.: acertos de cache)."""
+    rerun = _current.get()
+    if rerun is not None:
+        rerun.count(name, amount)
+
+
+def timed(name: str | None = None):
+    """Decorador: mede cada chamada da função como um span."""
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            rerun = _current.get()
+            if rerun is None:
+                return fn(*args, **kwargs)
+            with _Span(rerun, span_name, None):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def log_enabled():
+    return os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes", "on")
+
+
+def begin_rerun(panel: bool = False, label: str = "rerun"):
+    """
+    Abre a medição do rerun se o painel foi pedido ou o log está ligado.
+    Retorna o Rerun (ou None, quando nada deve ser medido).
+    """
+    if not panel and not log_enabled():
+        _current.set(None)
+        return None
+    rerun = Rerun(label)
+    _current.set(rerun)
+    return rerun
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(LOG_DIR, LOG_FILE), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("smartaware.perf")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def end_rerun(rerun: Rerun | None):
+    """Fecha a medição e grava a linha no log rotativo (se ligado)."""
+    if rerun is None:
+        return
+    rerun.finish()
+    if _current.get() is rerun:
+        _current.set(None)
+    if log_enabled():
+        try:
+            _get_logger().info(json.dumps(rerun.to_record(), ensure_ascii=False))
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o log de desempenho: {e}")
+
+
+def show_panel(rerun: Rerun | None, placeholder):
+    """Painel de desempenho do rerun: tempo total, resumo por trecho e linha do tempo."""
+    if rerun is None:
+        return
+
+    total_ms = rerun.finish() * 1000
+    placeholder.markdown(f"**⏱️ Rerun: {total_ms:.1f} ms** — {len(rerun.spans)} trechos medidos")
+    if rerun.counters:
+        placeholder.caption(" · ".join(f"{k}: {v}" for k, v in sorted(rerun.counters.items())))
+
+    summary = pd.DataFrame(
+        [(name, calls, round(total, 2), round(peak, 2)) for name, (calls, total, peak) in rerun.summary().items()],
+        columns=["Trecho", "Chamadas", "Total (ms)", "Maior (ms)"],
+    )
+    placeholder.dataframe(summary, hide_index=True)
+
+    timeline = pd.DataFrame(
+        [("  " * s["depth"] + s["name"], s["start_ms"], s["ms"]) for s in rerun.ordered_spans()],
+        columns=["Trecho", "Início (ms)", "Duração (ms)"],
+    )
+    placeholder.dataframe(timeline, hide_index=True)
@@ -0,0 +1,176 @@
+# components/queue_analytics.py
+"""Tempos de fila calculados a partir das passagens de cada pessoa pela fila (queue/dwell.csv)."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from components import config
+from components.cache import cached_by_files
+from components.metrics_store import FIRST_PERIOD_HOUR, PERIODS, TOTAL_PERIOD
+
+BASE_DIR = config.BASE_DIR
+
+ENTRANCE_CAMERA = "camera11"
+DWELL_FILE = os.path.join("queue", "dwell.csv")
+
+# Colunas do dwell.csv -> nomes internos
+DWELL_COLUMNS = {
+    "Caixa": "queue",
+    "Trilha": "track",
+    "Início (s)": "start",
+    "Fim (s)": "end",
+    "Tempo (s)": "dwell",
+}
+
+# Saídas mais longas que isso (oclusão, pessoa saiu e voltou) separam passagens
+MAX_GAP_S = 10.0
+
+# Passagens mais curtas que isso não são espera (pessoa cruzando a área)
+MIN_DWELL_S = 5.0
+
+PERCENTILES = (50, 90, 95)
+
+
+def dwell_path(date_str: str, camera_name: str = ENTRANCE_CAMERA):
+    return os.path.join(BASE_DIR, camera_name, date_str, DWELL_FILE)
+
+
+def points_in_polygon(xy: np.ndarray, polygon: np.ndarray):
+    """Máscara dos pontos (N, 2) dentro do polígono (M, 2), por ray casting vetorizado."""
+    (xmin, ymin), (xmax, ymax) = polygon.min(axis=0), polygon.max(axis=0)
+    # Só os pontos dentro do retângulo envolvente passam pelo teste completo
+    candidates = np.flatnonzero((xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) & (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax))
+    x, y = xy[candidates, 0], xy[candidates, 1]
+    hit = np.zeros(len(candidates), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        hit ^= crosses & (x < x_cross)
+    inside = np.zeros(len(xy), dtype=bool)
+    inside[candidates[hit]] = True
+    return inside
+
+
+def dwell_records(points: np.ndarray, zones: dict, min_dwell_s: float = MIN_DWELL_S, max_gap_s: float = MAX_GAP_S):
+    """
+    Passagens pelas filas a partir dos pontos (N, 4+) com (t, x, y, trilha).
+    zones: {número do caixa: polígono (M, 2) em pixels}.
+    Retorna um DataFrame com queue, track, start, end e dwell (segundos).
+    """
+    frames = []
+    if len(points):
+        t = points[:, 0].astype(np.float64)
+        track = points[:, 3].astype(np.int64)
+        for number, polygon in zones.items():
+            inside = points_in_polygon(points[:, 1:3], np.asarray(polygon, dtype=np.float64))
+            if not inside.any():
+                continue
+            zt, ztrack = t[inside], track[inside]
+            order = np.lexsort((zt, ztrack))
+            zt, ztrack = zt[order], ztrack[order]
+            # Nova passagem quando muda a trilha ou quando a trilha ficou fora por mais de max_gap_s
+            new = np.ones(len(zt), dtype=bool)
+            new[1:] = (ztrack[1:] != ztrack[:-1]) | (np.diff(zt) > max_gap_s)
+            first = np.flatnonzero(new)
+            last = np.append(first[1:], len(zt)) - 1
+            frame = pd.DataFrame({
+                "queue": int(number),
+                "track": ztrack[first],
+                "start": zt[first],
+                "end": zt[last],
+            })
+            frame["dwell"] = frame["end"] - frame["start"]
+            frames.append(frame[frame["dwell"] >= min_dwell_s])
+    if not frames:
+        return pd.DataFrame({"queue": [], "track": [], "start": [], "end": [], "dwell": []})
+    return pd.concat(frames, ignore_index=True).sort_values(["queue", "start"], ignore_index=True)
+
+
+def to_csv_frame(records: pd.DataFrame):
+    """DataFrame no formato do dwell.csv (colunas em português, 2 casas)."""
+    out = records.rename(columns={v: k for k, v in DWELL_COLUMNS.items()})
+    return out.round({"Início (s)": 2, "Fim (s)": 2, "Tempo (s)": 2})
+
+
+@cached_by_files(lambda date_str, camera_name=ENTRANCE_CAMERA: [dwell_path(date_str, camera_name)])
+def load_dwell(date_str: str, camera_name: str = ENTRANCE_CAMERA):
+    """Passagens do dia (DataFrame queue, track, start, end, dwell) ou None sem dwell.csv."""
+    path = dwell_path(date_str, camera_name)
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns=DWELL_COLUMNS)
+    return df[list(DWELL_COLUMNS.values())]
+
+
+def period_of_starts(start: np.ndarray):
+    """Período (1..PERIODS) de cada início de passagem, TOTAL_PERIOD fora do expediente."""
+    period = np.floor((np.asarray(start, dtype=np.float64) - FIRST_PERIOD_HOUR * 3600) / 3600).astype(np.int64) + 1
+    period[(period < 1) | (period > PERIODS)] = TOTAL_PERIOD
+    return period
+
+
+def _percentile_columns(grouped):
+    return {f"p{q}": grouped["dwell"].quantile(q / 100) for q in PERCENTILES}
+
+
+def _waiting(records: pd.DataFrame, start_s: float, end_s: float):
+    """(média de pessoas na fila, pico simultâneo) de cada caixa em [start_s, end_s)."""
+    overlap = (np.minimum(records["end"], end_s) - np.maximum(records["start"], start_s)).clip(lower=0)
+    duration = max(end_s - start_s, 1e-9)
+    mean = overlap.groupby(records["queue"]).sum() / duration
+
+    peaks = {}
+    active = records[overlap > 0]
+    for number, group in active.groupby("queue"):
+        # Varredura: +1 na entrada, -1 na saída; o pico é o máximo da soma acumulada
+        times = np.concatenate([np.maximum(group["start"], start_s), np.minimum(group["end"], end_s)])
+        steps = np.concatenate([np.ones(len(group)), -np.ones(len(group))])
+        order = np.lexsort((steps, times))
+        peaks[number] = int(np.cumsum(steps[order]).max())
+    return mean, pd.Series(peaks, dtype="int64")
+
+
+def window_stats(records: pd.DataFrame, start_s: float = 0, end_s: float = 24 * 3600, queues=None):
+    """
+    Métricas de cada caixa na janela [start_s, end_s): clientes que entraram na
+    fila na janela, média ponderada, p50/p90/p95 (s), média de pessoas na fila e
+    pico simultâneo. Retorna um DataFrame indexado pelo número do caixa.
+    """
+    if queues is not None:
+        records = records[records["queue"].isin(list(queues))]
+    joined = records[(records["start"] >= start_s) & (records["start"] < end_s)]
+    grouped = joined.groupby("queue")
+    stats = pd.DataFrame({
+        "customers": grouped.size(),
+        "mean": grouped["dwell"].mean(),
+        **_percentile_columns(grouped),
+    })
+    mean_waiting, peak_waiting = _waiting(records, start_s, end_s)
+    stats = stats.join(pd.DataFrame({"waiting_mean": mean_waiting, "waiting_peak": peak_waiting}), how="outer")
+    stats["customers"] = stats["customers"].fillna(0).astype(int)
+    stats["waiting_peak"] = stats["waiting_peak"].fillna(0).astype(int)
+    stats["waiting_mean"] = stats["waiting_mean"].fillna(0.0)
+    stats.index.name = "queue"
+    return stats
+
+
+def period_stats(records: pd.DataFrame):
+    """Clientes, média e percentis por (caixa, período), pelo período de início da passagem."""
+    records = records.assign(period=period_of_starts(records["start"].to_numpy()))
+    records = records[records["period"] != TOTAL_PERIOD]
+    grouped = records.groupby(["queue", "period"])
+    return pd.DataFrame({
+        "customers": grouped.size(),
+        "mean": grouped["dwell"].mean(),
+        **_percentile_columns(grouped),
+    })
+
+
+def day_means(records: pd.DataFrame):
+    """{caixa: tempo médio do dia ponderado pelos clientes (2 casas)}."""
+    expedient = records[period_of_starts(records["start"].to_numpy()) != TOTAL_PERIOD]
+    return {int(q): round(float(v), 2) for q, v in expedient.groupby("queue")["dwell"].mean().items()}
@@ -0,0 +1,129 @@
+# components/report_jobs.py
+"""Geração de relatórios PDF em lote, fora da requisição do Streamlit."""
+import os
+import threading
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from components import rollups, stores
+from components.export_pdf import generate_daily_report, report_path
+from components.process_pool import spawn_pool
+
+# Número máximo de processos gerando PDFs ao mesmo tempo
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_executor = None
+_inflight = {}
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = spawn_pool(MAX_WORKERS)
+    return _executor
+
+
+def date_range(start_date, end_date):
+    """Lista de datas 'YYYY-MM-DD' entre start_date e end_date (inclusive)."""
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    days = (end_date - start_date).days
+    return [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days + 1)]
+
+
+def submit_report(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    """Agenda o relatório de um dia da loja e retorna um Future com o caminho do PDF."""
+    output_path = report_path(date_str, store_id)
+    if os.path.exists(output_path):
+        future = Future()
+        future.set_result(output_path)
+        return future
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with _lock:
+        future = _inflight.get(output_path)
+        if future is not None and not future.done():
+            return future
+        future = _get_executor().submit(generate_daily_report, date_str, output_path, store_id)
+        _inflight[output_path] = future
+
+    def _forget(done, path=output_path):
+        with _lock:
+            if _inflight.get(path) is done:
+                del _inflight[path]
+
+    future.add_done_callback(_forget)
+    return future
+
+
+class ReportBatch:
+    """Conjunto de relatórios em geração, com progresso e resultados por data."""
+
+    def __init__(self, dates, store_id: str = stores.DEFAULT_STORE):
+        self.dates = list(dates)
+        self.store_id = store_id
+        self.futures = {}
+        self._zip = None
+        self._zip_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        # Os relatórios leem só as consolidações: são agendados quando os dias até o último estiverem prontos
+        rollups.request_update(store_id, self.dates[-1]).add_done_callback(lambda _: self._start())
+
+    def _start(self):
+        with self._start_lock:
+            if not self.futures:
+                self.futures = {date_str: submit_report(date_str, self.store_id) for date_str in self.dates}
+
+    def consolidating(self):
+        """Indica se o lote ainda espera a consolidação dos dias (em segundo plano)."""
+        if not self.futures and rollups.ensure_consolidated(self.store_id, self.dates[-1]):
+            self._start()
+        return not self.futures
+
+    def progress(self):
+        """(concluídos, total)."""
+        done = sum(1 for f in self.futures.values() if f.done())
+        return done, len(self.dates)
+
+    def done(self):
+        return bool(self.futures) and all(f.done() for f in self.futures.values())
+
+    def results(self):
+        """{data: caminho do PDF} dos relatórios gerados com sucesso."""
+        return {
+            d: f.result() for d, f in self.futures.items()
+            if f.done() and f.exception() is None
+        }
+
+    def errors(self):
+        """{data: exceção} dos relatórios que falharam (ex.: arquivos ausentes)."""
+        return {
+            d: f.exception() for d, f in self.futures.items()
+            if f.done() and f.exception() is not None
+        }
+
+    def zip_bytes(self):
+        """
+        Todos os PDFs gerados em um único .zip (em memória). Com o lote
+        concluído o .zip é montado uma vez e reaproveitado a cada rerun.
+        """
+        with self._zip_lock:
+            if self._zip is not None:
+                return self._zip
+            buffer = BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                for date_str, path in sorted(self.results().items()):
+                    zf.write(path, arcname=f"relatorio_{date_str}.pdf")
+            if self.done():
+                self._zip = buffer.getvalue()
+            return buffer.getvalue()
+
+
+def submit_reports(start_date, end_date, store_id: str = stores.DEFAULT_STORE):
+    """Agenda os relatórios da loja para todos os dias do intervalo."""
+    return ReportBatch(date_range(start_date, end_date), store_id)
@@ -0,0 +1,571 @@
+# components/rollups.py
+"""Consolidação diária e por horário de cada loja, mantida por um job incremental."""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from components import anomalies, config, metrics_store, queue_analytics, stores
+from components.cache import file_signature
+from components.day_snapshot import build_snapshot, sum_arrays
+from components.metrics_store import PERIODS, TOTAL_PERIOD
+from components.process_pool import spawn_pool
+from components.profiling import timed
+
+# Pasta dos bancos de consolidação (um arquivo .sqlite por loja)
+ROLLUP_DIR = os.path.join(config.STATE_DIR, "rollups")
+
+# Incrementar quando o conteúdo das consolidações mudar (os bancos são refeitos)
+ROLLUP_VERSION = 2
+
+# Processos usados no preenchimento de intervalos longos (--backfill)
+MAX_WORKERS = max(1, os.cpu_count() or 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily (
+    date TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    total REAL,
+    mean REAL,
+    periods INTEGER NOT NULL,
+    peak_period INTEGER,
+    peak_value REAL,
+    PRIMARY KEY (date, metric, camera)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hourly (
+    date TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    camera TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (date, metric, camera, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS queues (
+    date TEXT NOT NULL,
+    queue INTEGER NOT NULL,
+    customers INTEGER NOT NULL,
+    p50 REAL,
+    p90 REAL,
+    p95 REAL,
+    waiting_peak INTEGER,
+    PRIMARY KEY (date, queue)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    catalog_signature TEXT,
+    files_signature TEXT NOT NULL,
+    built_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+_connections = {}
+_locks = {}
+_update_locks = {}
+_registry_lock = threading.Lock()
+
+# Consolidações em segundo plano: pedidos em andamento, progresso e dias que falharam, por loja
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}
+_progress = {}
+_failed = {}
+
+
+def _db_path(store_id: str):
+    return os.path.join(ROLLUP_DIR, f"{store_id}.sqlite")
+
+
+def _get_connection(store_id: str):
+    """Retorna (conexão, lock) da loja, abrindo o banco na primeira chamada."""
+    with _registry_lock:
+        conn = _connections.get(store_id)
+        if conn is None:
+            os.makedirs(ROLLUP_DIR, exist_ok=True)
+            # timeout: o job e os processos de relatório podem gravar ao mesmo tempo
+            conn = sqlite3.connect(_db_path(store_id), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.executescript(anomalies.SCHEMA)
+            row = conn.execute("SELECT value FROM state WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(ROLLUP_VERSION):
+                # Formato antigo: tudo é consolidado de novo
+                with conn:
+                    for table in ("daily", "hourly", "queues", "days", "state", *anomalies.TABLES):
+                        conn.execute(f"DELETE FROM {table}")
+                    conn.execute("INSERT INTO state (key, value) VALUES ('version', ?)", (str(ROLLUP_VERSION),))
+            _connections[store_id] = conn
+            _locks[store_id] = threading.RLock()
+            _update_locks[store_id] = threading.Lock()
+        return conn, _locks[store_id]
+
+
+def close_all():
+    """Fecha todas as conexões abertas (útil em testes e ao trocar BASE_DIR)."""
+    with _registry_lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+        _locks.clear()
+        _update_locks.clear()
+
+
+def get_watermark(store_id: str = stores.DEFAULT_STORE):
+    """Último dia até onde todos os dias da loja foram consolidados (ou None)."""
+    conn, lock = _get_connection(store_id)
+    with lock:
+        row = conn.execute("SELECT value FROM state WHERE key = 'watermark'").fetchone()
+    return row[0] if row else None
+
+
+# --- Montagem de um dia (só lê arquivos: pode rodar em outro processo) ---
+def day_sources(store_id: str, date_str: str, cameras):
+    """Arquivos de origem das consolidações de um dia da loja."""
+    store = stores.get_store(store_id)
+    paths = [metrics_store.source_path(camera, date_str, "people_count") for camera in cameras]
+    paths += [metrics_store.source_path(camera, date_str, "people_total") for camera in store.entrance_ids]
+    for number in store.queue_numbers:
+        camera = store.checkout_id(number)
+        paths.append(metrics_store.source_path(camera, date_str, f"queue{number}"))
+        paths.append(queue_analytics.dwell_path(date_str, camera))
+    return sorted(set(paths))
+
+
+def files_signature(paths):
+    digest = hashlib.sha1(f"v{ROLLUP_VERSION}".encode("utf-8"))
+    for path, mtime_ns, size in (file_signature(p) for p in paths):
+        digest.update(f"|{os.path.relpath(path, metrics_store.BASE_DIR)}:{mtime_ns}:{size}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _series(date_str: str, metric: str, camera: str, values, total=None, mean=None):
+    """(linha daily, linhas hourly) de um array indexado pelo período."""
+    periods = {
+        p: float(values[p]) for p in range(TOTAL_PERIOD + 1, min(len(values), PERIODS + 1))
+        if not math.isnan(values[p])
+    }
+    # Tempos de fila não têm total, só a média do dia
+    if not metric.startswith("queue"):
+        if total is None and not math.isnan(values[TOTAL_PERIOD]):
+            total = float(values[TOTAL_PERIOD])
+        if total is None and periods:
+            total = sum(periods.values())
+    if mean is None and periods:
+        mean = sum(periods.values()) / len(periods)
+    peak_period, peak_value = metrics_store.peak(periods)
+    daily = (date_str, metric, camera, total, mean, len(periods), peak_period, peak_value)
+    hourly = [(date_str, metric, camera, p, v) for p, v in periods.items()]
+    return daily, hourly
+
+
+def build_day(store_id: str, date_str: str, cameras):
+    """
+    Consolidações de um dia da loja a partir dos CSVs (sem cache e sem os
+    bancos por câmera). Retorna um dict simples, que pode voltar de um processo auxiliar.
+    """
+    store = stores.get_store(store_id)
+    signature = files_signature(day_sources(store_id, date_str, cameras))
+    read = metrics_store.read_day_array
+    daily, hourly, queues = [], [], []
+
+    snapshot = build_snapshot(store.entrance_id, date_str, read_array=read)
+    entries = sum_arrays([read(camera, date_str, "people_total") for camera in store.entrance_ids])
+    if entries is not None:
+        row, rows = _series(date_str, "entries", "", entries)
+        daily.append(row)
+        hourly += rows
+    for number in store.queue_numbers:
+        values = read(store.checkout_id(number), date_str, f"queue{number}")
+        if values is not None:
+            row, rows = _series(date_str, f"queue{number}", "", values, mean=snapshot.queue(number))
+            daily.append(row)
+            hourly += rows
+    for camera in cameras:
+        values = read(camera, date_str, "people_count")
+        if values is not None:
+            row, rows = _series(date_str, "people", camera, values)
+            daily.append(row)
+            hourly += rows
+
+    if snapshot.dwell is not None and not snapshot.dwell.empty:
+        stats = queue_analytics.window_stats(snapshot.dwell)
+        for number, stat in stats.iterrows():
+            queues.append((
+                date_str, int(number), int(stat["customers"]),
+                *(None if pd.isna(stat[c]) else float(stat[c]) for c in ("p50", "p90", "p95")),
+                int(stat["waiting_peak"]),
+            ))
+
+    return {"date": date_str, "signature": signature, "daily": daily, "hourly": hourly, "queues": queues}
+
+
+def _write_day(conn, lock, record: dict, catalog_signature: str):
+    date_str = record["date"]
+    with lock, conn:
+        for table in ("daily", "hourly", "queues"):
+            conn.execute(f"DELETE FROM {table} WHERE date = ?", (date_str,))
+        conn.executemany("INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?)", record["daily"])
+        conn.executemany("INSERT INTO hourly VALUES (?, ?, ?, ?, ?)", record["hourly"])
+        conn.executemany("INSERT INTO queues VALUES (?, ?, ?, ?, ?, ?, ?)", record["queues"])
+        anomalies.apply_day(conn, date_str, record["daily"], record["hourly"])
+        conn.execute(
+            "INSERT OR REPLACE INTO days (date, catalog_signature, files_signature, built_at) VALUES (?, ?, ?, ?)",
+            (date_str, catalog_signature, record["signature"], time.time()),
+        )
+
+
+def _delete_day(conn, lock, date_str: str):
+    with lock, conn:
+        for table in ("daily", "hourly", "queues", "days"):
+            conn.execute(f"DELETE FROM {table} WHERE date = ?", (date_str,))
+        anomalies.remove_day(conn, date_str)
+
+
+# --- Job incremental ---
+def _store_days(store_id: str):
+    """(catálogo da loja, {data: ids das câmeras com a data})."""
+    store = stores.get_store(store_id)
+    catalog = stores.store_catalog(metrics_store.BASE_DIR, store_id)
+    days = {}
+    for name in catalog.cameras():
+        for date_str in catalog.dates(name):
+            days.setdefault(date_str, []).append(store.camera_id(name))
+    return catalog, days
+
+
+def _catalog_signature(catalog, date_str: str):
+    signature = json.dumps(catalog.day_signature(date_str), sort_keys=True)
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+
+
+def _plan(store_id: str, start_date=None, end_date=None, full: bool = False):
+    """
+    O que update() faria, sem gravar nada: (dias que sumiram do catálogo,
+    [(data, câmeras, assinatura do catálogo)] a consolidar, [(data, assinatura
+    do catálogo)] cujos arquivos não mudaram). Os dias antes da marca d'água
+    só são conferidos se o catálogo mudou; a partir dela (onde os dados ainda
+    podem estar chegando) os arquivos de origem são conferidos sempre, porque
+    um CSV regravado no lugar não muda o catálogo.
+    """
+    conn, lock = _get_connection(store_id)
+    catalog, days = _store_days(store_id)
+    watermark = get_watermark(store_id) or ""
+    with lock:
+        known = {row[0]: row[1:] for row in conn.execute("SELECT date, catalog_signature, files_signature FROM days")}
+
+    def in_range(date_str):
+        return (not start_date or date_str >= start_date) and (not end_date or date_str <= end_date)
+
+    # Dias que sumiram do catálogo (pasta apagada)
+    removed = [d for d in sorted(set(known) - set(days)) if not end_date or d <= end_date]
+    pending, relabeled = [], []
+    for date_str in sorted(days):
+        if end_date and date_str > end_date:
+            break
+        catalog_sig = _catalog_signature(catalog, date_str)
+        stored_catalog, stored_files = known.get(date_str, (None, None))
+        if stored_catalog == catalog_sig and date_str < watermark and not (full and in_range(date_str)):
+            continue
+        cameras = days[date_str]
+        if stored_files == files_signature(day_sources(store_id, date_str, cameras)):
+            # Arquivos iguais (ex.: só um PNG de heatmap novo): nada a refazer
+            if stored_catalog != catalog_sig:
+                relabeled.append((date_str, catalog_sig))
+            continue
+        pending.append((date_str, cameras, catalog_sig))
+    return days, removed, pending, relabeled
+
+
+@timed()
+def update(store_id: str = stores.DEFAULT_STORE, start_date=None, end_date=None, full: bool = False, workers: int = 1):
+    """
+    Consolida, em ordem de data, os dias da loja até end_date (se indicado)
+    ainda não consolidados, cujo catálogo mudou ou, a partir da marca d'água,
+    cujos arquivos mudaram: start_date não limita a consolidação, porque as
+    linhas de base de cada dia dependem dos dias anteriores. Com full=True
+    confere os arquivos de todos os dias do intervalo (de todos, sem
+    intervalo). Com workers > 1 os dias são montados em processos paralelos.
+    Retorna {"built": [...], "unchanged": [...], "removed": [...], "failed": {...}}.
+    """
+    conn, lock = _get_connection(store_id)
+    with _update_locks[store_id]:
+        watermark = get_watermark(store_id) or ""
+        days, removed, pending, relabeled = _plan(store_id, start_date, end_date, full)
+
+        result = {"built": [], "unchanged": [], "removed": removed, "failed": {}}
+        _progress[store_id] = (0, len(pending))
+        for date_str in removed:
+            _delete_day(conn, lock, date_str)
+        if relabeled:
+            with lock, conn:
+                conn.executemany("UPDATE days SET catalog_signature = ? WHERE date = ?", [(c, d) for d, c in relabeled])
+            result["unchanged"] = [d for d, _ in relabeled]
+
+        def _done(date_str, catalog_sig, record=None, error=None):
+            if error is not None:
+                print(f"⚠️ Erro ao consolidar {store_id}/{date_str}: {error}")
+                result["failed"][date_str] = error
+                _progress[store_id] = (len(result["built"]) + len(result["failed"]), len(pending))
+                return
+            _write_day(conn, lock, record, catalog_sig)
+            result["built"].append(date_str)
+            _progress[store_id] = (len(result["built"]) + len(result["failed"]), len(pending))
+
+        if workers > 1 and len(pending) > 1:
+            with spawn_pool(min(workers, len(pending))) as executor:
+                futures = {
+                    executor.submit(build_day, store_id, date_str, cameras): date_str
+                    for date_str, cameras, _ in pending
+                }
+                # Grava na ordem das datas (as linhas de base esperam os dias em ordem),
+                # cada dia assim que ele e todos os anteriores ficarem prontos
+                finished = {}
+                next_index = 0
+                for future in as_completed(futures):
+                    finished[futures[future]] = future
+                    while next_index < len(pending) and pending[next_index][0] in finished:
+                        date_str, _, catalog_sig = pending[next_index]
+                        done_future = finished.pop(date_str)
+                        if done_future.exception() is not None:
+                            _done(date_str, catalog_sig, error=done_future.exception())
+                        else:
+                            _done(date_str, catalog_sig, done_future.result())
+                        next_index += 1
+        else:
+            for date_str, cameras, catalog_sig in pending:
+                try:
+                    record = build_day(store_id, date_str, cameras)
+                except Exception as e:
+                    _done(date_str, catalog_sig, error=e)
+                    continue
+                _done(date_str, catalog_sig, record)
+
+        # Marca d'água: último dia antes do primeiro dia ainda não consolidado (ou que falhou)
+        with lock:
+            done = {row[0] for row in conn.execute("SELECT date FROM days").fetchall()}
+        new_watermark = None
+        for date_str in sorted(days):
+            if date_str not in done or date_str in result["failed"]:
+                break
+            new_watermark = date_str
+        if new_watermark and new_watermark != watermark:
+            with lock, conn:
+                conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('watermark', ?)", (new_watermark,))
+        failed = _failed.setdefault(store_id, set())
+        failed.difference_update(result["built"])
+        failed.update(result["failed"])
+        result["built"].sort()
+        return result
+
+
+class _RollupListener:
+    """Consolida (na thread do catálogo) os dias da loja que apareceram ou mudaram."""
+
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+
+    def __eq__(self, other):
+        return isinstance(other, _RollupListener) and other.store_id == self.store_id
+
+    def __hash__(self):
+        return hash(self.store_id)
+
+    def __call__(self, days):
+        _run_update(self.store_id)
+
+
+def _run_update(store_id: str, end_date=None):
+    try:
+        update(store_id, end_date=end_date)
+    except Exception as e:
+        print(f"⚠️ Erro ao consolidar a loja {store_id}: {e}")
+    finally:
+        _progress.pop(store_id, None)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rollups")
+        return _executor
+
+
+def request_update(store_id: str = stores.DEFAULT_STORE, end_date=None):
+    """
+    Agenda update() da loja (até end_date) em segundo plano e retorna o
+    Future; um pedido igual ainda em andamento é reaproveitado.
+    """
+    key = (store_id, end_date)
+    with _executor_lock:
+        future = _jobs.get(key)
+        if future is not None and not future.done():
+            return future
+    future = _get_executor().submit(_run_update, store_id, end_date)
+    with _executor_lock:
+        _jobs[key] = future
+    return future
+
+
+def pending_days(store_id: str = stores.DEFAULT_STORE, end_date=None):
+    """Dias até end_date que update() ainda consolidaria ou apagaria (sem os que acabaram de falhar)."""
+    _, removed, pending, _ = _plan(store_id, end_date=end_date)
+    failed = _failed.get(store_id, set())
+    return sorted(set(removed) | {d for d, _, _ in pending if d not in failed})
+
+
+def ensure_consolidated(store_id: str = stores.DEFAULT_STORE, end_date=None):
+    """
+    Indica se os dias da loja até end_date já estão consolidados; se não,
+    agenda a consolidação em segundo plano (nunca consolida na thread de quem chamou).
+    """
+    if not pending_days(store_id, end_date):
+        return True
+    request_update(store_id, end_date)
+    return False
+
+
+def progress(store_id: str = stores.DEFAULT_STORE):
+    """(dias gravados, dias a gravar) da consolidação em andamento da loja, ou None."""
+    return _progress.get(store_id)
+
+
+def watch_catalog(store_id: str = stores.DEFAULT_STORE):
+    """
+    Passa a consolidar cada dia da loja assim que o catálogo encontrar seus
+    dados e agenda em segundo plano a consolidação do que já está no catálogo
+    (o listener só é chamado quando algo muda).
+    """
+    stores.store_catalog(metrics_store.BASE_DIR, store_id).add_listener(_RollupListener(store_id))
+    request_update(store_id)
+
+
+# --- Leitura ---
+def daily_frame(start_date: str, end_date: str, store_id: str = stores.DEFAULT_STORE, metric: str | None = None):
+    """
+    Consolidação diária já gravada do intervalo (inclusivo): DataFrame com date, metric, camera, total, mean, periods, peak_period, peak_value.
+    """
+    conn, lock = _get_connection(store_id)
+    query = "SELECT date, metric, camera, total, mean, periods, peak_period, peak_value FROM daily WHERE date BETWEEN ? AND ?"
+    params = [start_date, end_date]
+    if metric:
+        query += " AND metric = ?"
+        params.append(metric)
+    with lock:
+        return pd.read_sql_query(query + " ORDER BY date, metric, camera", conn, params=params)
+
+
+def hourly_frame(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    """Valores por período do dia: DataFrame com metric, camera, period, value."""
+    conn, lock = _get_connection(store_id)
+    with lock:
+        return pd.read_sql_query(
+            "SELECT metric, camera, period, value FROM hourly WHERE date = ? ORDER BY metric, camera, period",
+            conn,
+            params=(date_str,),
+        )
+
+
+def period_frame(start_date: str, end_date: str, store_id: str = stores.DEFAULT_STORE):
+    """
+    Soma, média e número de dias de cada (métrica, câmera, período) no
+    intervalo: DataFrame com metric, camera, period, total, mean, days.
+    """
+    conn, lock = _get_connection(store_id)
+    with lock:
+        return pd.read_sql_query(
+            "SELECT metric, camera, period, SUM(value) AS total, AVG(value) AS mean, COUNT(value) AS days "
+            "FROM hourly WHERE date BETWEEN ? AND ? GROUP BY metric, camera, period ORDER BY metric, camera, period",
+            conn,
+            params=(start_date, end_date),
+        )
+
+
+def queue_frame(start_date: str, end_date: str, store_id: str = stores.DEFAULT_STORE):
+    """Estatísticas diárias da fila: DataFrame com date, queue, customers, p50, p90, p95, waiting_peak."""
+    conn, lock = _get_connection(store_id)
+    with lock:
+        return pd.read_sql_query(
+            "SELECT * FROM queues WHERE date BETWEEN ? AND ? ORDER BY date, queue",
+            conn,
+            params=(start_date, end_date),
+        )
+
+
+def anomaly_frame(start_date: str, end_date: str, store_id: str = stores.DEFAULT_STORE):
+    """
+    Períodos fora do padrão no intervalo: DataFrame com date, metric, camera,
+    period (0 = dia inteiro), value, expected, std, z.
+    """
+    conn, lock = _get_connection(store_id)
+    with lock:
+        return pd.read_sql_query(
+            "SELECT * FROM anomalies WHERE date BETWEEN ? AND ? ORDER BY date, metric, camera, period",
+            conn,
+            params=(start_date, end_date),
+        )
+
+
+def range_state(start_date: str, end_date: str, store_id: str = stores.DEFAULT_STORE):
+    """
+    Assinatura dos dias consolidados do intervalo (quais dias e quando cada
+    um foi gravado), para caches de figuras montadas a partir das consolidações.
+    """
+    conn, lock = _get_connection(store_id)
+    with lock:
+        rows = conn.execute(
+            "SELECT date, files_signature, built_at FROM days WHERE date BETWEEN ? AND ? ORDER BY date",
+            (start_date, end_date),
+        ).fetchall()
+    return hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()[:16]
+
+
+def day_state(date_str: str, store_id: str = stores.DEFAULT_STORE):
+    """
+    Assinatura do que está consolidado para o dia (arquivos de origem e
+    anomalias): muda quando o dia é refeito ou quando dias anteriores mudam a
+    comparação com a linha de base. Vazia se o dia ainda não foi consolidado.
+    """
+    conn, lock = _get_connection(store_id)
+    with lock:
+        day = conn.execute("SELECT files_signature FROM days WHERE date = ?", (date_str,)).fetchone()
+        flagged = conn.execute(
+            "SELECT * FROM anomalies WHERE date = ? ORDER BY metric, camera, period", (date_str,)
+        ).fetchall()
+    if day is None:
+        return ""
+    return hashlib.sha1(json.dumps([day[0], flagged]).encode("utf-8")).hexdigest()[:16]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consolida por dia e por horário os dados de cada loja.")
+    parser.add_argument("--store", action="append", help="loja (pode repetir; padrão: todas)")
+    parser.add_argument("--backfill", nargs=2, metavar=("INICIO", "FIM"), help="intervalo de datas (YYYY-MM-DD)")
+    parser.add_argument("--full", action="store_true", help="confere os arquivos de todos os dias")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="processos paralelos")
+    args = parser.parse_args(argv)
+
+    start_date, end_date = args.backfill or (None, None)
+    for store_id in args.store or [s.store_id for s in stores.list_stores()]:
+        started = time.perf_counter()
+        result = update(store_id, start_date, end_date, full=args.full or bool(args.backfill), workers=args.workers)
+        print(
+            f"✅ {store_id}: {len(result['built'])} dias consolidados, {len(result['unchanged'])} sem mudanças, "
+            f"{len(result['removed'])} removidos, {len(result['failed'])} com erro "
+            f"({time.perf_counter() - started:.1f} s; marca d'água {get_watermark(store_id)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# components/stores.py
+"""Lojas e papéis das câmeras de cada loja (config.STORES_FILE)."""
+import json
+import os
+
+from components import config
+from components.cache import cached_by_files
+from components.catalog import get_catalog
+
+DEFAULT_STORE = "default"
+
+# Papéis usados quando o stores.json não existe ou não define a loja padrão.
+# O stores.json tem o mesmo formato por loja ({"<loja>": {...}}); as câmeras das
+# demais lojas ficam em <BASE_DIR>/<loja>/<câmera>/<data>/ e têm o id "<loja>/<câmera>"
+DEFAULT_ROLES = {
+    "name": "Loja",
+    "entrances": ["camera11"],
+    "checkouts": {"1": "camera11", "2": "camera11"},
+    "labels": {"camera11": "ENTRADA"},
+}
+
+
+class Store:
+    """Uma loja: pasta, câmeras de entrada, câmeras dos caixas e nomes amigáveis."""
+
+    def __init__(self, store_id: str, name: str, entrances, checkouts: dict, labels: dict):
+        self.store_id = store_id
+        self.name = name
+        self.entrances = list(entrances)
+        self.checkouts = {int(number): camera for number, camera in checkouts.items()}
+        self.labels = dict(labels)
+
+    @property
+    def is_default(self):
+        return self.store_id == DEFAULT_STORE
+
+    def camera_id(self, camera_name: str):
+        """Id da câmera usado pelos componentes (caminho relativo ao BASE_DIR)."""
+        return camera_name if self.is_default else f"{self.store_id}/{camera_name}"
+
+    @property
+    def entrance_ids(self):
+        return [self.camera_id(c) for c in self.entrances]
+
+    @property
+    def entrance_id(self):
+        """Câmera de entrada principal (a primeira configurada)."""
+        return self.entrance_ids[0]
+
+    @property
+    def queue_numbers(self):
+        return sorted(self.checkouts)
+
+    def checkout_id(self, number: int):
+        camera_name = self.checkouts.get(int(number))
+        return self.camera_id(camera_name) if camera_name else None
+
+    def directory(self, root: str):
+        return root if self.is_default else os.path.join(root, self.store_id)
+
+    def label(self, camera_name: str):
+        return self.labels.get(camera_name, camera_name.capitalize())
+
+
+def _read_stores(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    data.setdefault(DEFAULT_STORE, DEFAULT_ROLES)
+    stores = {}
+    for store_id, roles in data.items():
+        roles = {**DEFAULT_ROLES, "name": store_id, **roles}
+        stores[store_id] = Store(store_id, roles["name"], roles["entrances"], roles["checkouts"], roles["labels"])
+    return stores
+
+
+@cached_by_files(lambda: [config.STORES_FILE])
+def load_stores():
+    """{id: Store} do stores.json (relido só quando o arquivo muda)."""
+    return _read_stores(config.STORES_FILE)
+
+
+def list_stores():
+    """Lojas configuradas, a padrão primeiro."""
+    stores = load_stores()
+    return sorted(stores.values(), key=lambda s: (not s.is_default, s.store_id))
+
+
+def get_store(store_id: str = DEFAULT_STORE):
+    stores = load_stores()
+    if store_id not in stores:
+        raise KeyError(f"Loja desconhecida: {store_id}")
+    return stores[store_id]
+
+
+def split(camera_id: str):
+    """(id da loja, nome da câmera) de um id de câmera."""
+    store_id, _, camera_name = camera_id.rpartition("/")
+    return store_id or DEFAULT_STORE, camera_name
+
+
+def store_of(camera_id: str):
+    return get_store(split(camera_id)[0])
+
+
+def store_catalog(root: str, store_id: str = DEFAULT_STORE):
+    """
+    Catálogo da loja (criado na primeira consulta). O da loja padrão ignora
+    as pastas das outras lojas, que ficam dentro da mesma raiz.
+    """
+    store = get_store(store_id)
+    exclude = [s for s in load_stores() if s != DEFAULT_STORE] if store.is_default else ()
+    return get_catalog(store.directory(root), exclude=exclude)
+
+
+def catalog_for(root: str, camera_id: str):
+    """(catálogo da loja da câmera, nome da câmera dentro da loja)."""
+    store_id, camera_name = split(camera_id)
+    return store_catalog(root, store_id), camera_name
+
+
+def camera_ids(root: str, store_id: str = DEFAULT_STORE):
+    """Ids das câmeras da loja, segundo o catálogo dela."""
+    store = get_store(store_id)
+    return [store.camera_id(c) for c in store_catalog(root, store_id).cameras()]
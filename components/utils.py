@@ -1,11 +1,12 @@
 # components/utils.py
+from components import stores
 
-def format_camera_name(camera_name: str) -> str:
-
-    mapping = {
-        "camera11": "ENTRADA",
-        # "camera12": "Corredor Principal",
-        # "camera13": "Caixa 1",
-    }
 
-    return mapping.get(camera_name, camera_name.capitalize())
+def format_camera_name(camera_name: str) -> str:
+    """Nome amigável da câmera (stores.json); nas demais lojas vem prefixado pela loja."""
+    store_id, name = stores.split(camera_name)
+    store = stores.load_stores().get(store_id)
+    if store is None:
+        return camera_name.capitalize()
+    label = store.label(name)
+    return label if store.is_default else f"{store.name} · {label}"
@@ -0,0 +1,93 @@
+# processing/detectors.py
+"""Detectores de pessoas usados pelo pipeline (YOLO ou FakeDetector)."""
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Classe "person" do COCO
+PERSON_CLASS = 0
+
+DEFAULT_MODEL = "yolov8n.pt"
+
+
+def _empty():
+    return np.zeros((0, 5), dtype=np.float32)
+
+
+class YoloDetector:
+    """Detecção de pessoas com um modelo YOLO da ultralytics."""
+
+    def __init__(self, model: str = DEFAULT_MODEL, conf: float = 0.35, imgsz: int = 640, device: str = "cpu"):
+        try:
+            from ultralytics import YOLO
+        except ImportError as e:
+            raise ImportError("O YoloDetector requer a biblioteca ultralytics (pip install ultralytics).") from e
+        self.model = YOLO(model)
+        self.conf = conf
+        self.imgsz = imgsz
+        self.device = device
+
+    def detect(self, frames):
+        if not frames:
+            return []
+        results = self.model.predict(
+            list(frames),
+            classes=[PERSON_CLASS],
+            conf=self.conf,
+            imgsz=self.imgsz,
+            device=self.device,
+            verbose=False,
+        )
+        batch = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                batch.append(_empty())
+                continue
+            xyxy = boxes.xyxy.cpu().numpy()
+            conf = boxes.conf.cpu().numpy()[:, None]
+            batch.append(np.hstack([xyxy, conf]).astype(np.float32))
+        return batch
+
+
+class FakeDetector:
+    """Manchas claras (limiar + componentes conexos) tratadas como pessoas."""
+
+    def __init__(self, threshold: int = 180, min_area: int = 150):
+        if cv2 is None:
+            raise ImportError("O FakeDetector requer o OpenCV (pip install opencv-python).")
+        self.threshold = threshold
+        self.min_area = min_area
+
+    def detect(self, frames):
+        batch = []
+        for frame in frames:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            _, mask = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            # stats: x, y, largura, altura, área (a linha 0 é o fundo)
+            stats = stats[1:count]
+            stats = stats[stats[:, 4] >= self.min_area]
+            if len(stats) == 0:
+                batch.append(_empty())
+                continue
+            x1, y1 = stats[:, 0], stats[:, 1]
+            x2, y2 = x1 + stats[:, 2], y1 + stats[:, 3]
+            batch.append(np.stack([x1, y1, x2, y2, np.ones(len(stats))], axis=1).astype(np.float32))
+        return batch
+
+
+DETECTORS = {
+    "yolo": YoloDetector,
+    "fake": FakeDetector,
+}
+
+
+def create_detector(name: str, **kwargs):
+    """Cria o detector pelo nome ('yolo' ou 'fake')."""
+    if name not in DETECTORS:
+        raise ValueError(f"Detector desconhecido: {name} (opções: {', '.join(DETECTORS)})")
+    return DETECTORS[name](**kwargs)
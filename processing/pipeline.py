@@ -0,0 +1,412 @@
+# processing/pipeline.py
+"""Pipeline que transforma os vídeos das câmeras nos arquivos lidos pelo dashboard."""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from components.heatmap_engine import BACKGROUND_FILE, CELL_SIZE, colorize, smooth
+from components import queue_analytics
+from components.config import BASE_DIR
+from components.live import period_of
+from components.metrics_store import PERIODS, SOURCES, TOTAL_PERIOD
+from components.process_pool import spawn_pool
+from processing import sampling, video
+from processing.detectors import DEFAULT_MODEL, create_detector
+from processing.tracking import MAX_AGE_S, Tracker, foot_points
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cameras.json")
+
+OUTPUT_DIR = BASE_DIR
+
+# Processos de detecção em paralelo (cada um com um modelo carregado)
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Opacidade do heatmap sobre o quadro de referência
+HEATMAP_ALPHA = 0.45
+
+# Ids de trilha de vídeos diferentes do mesmo dia não se misturam
+# (os ids continuam exatos no float32 do detections.npy até 2**24 ≈ 167 vídeos por dia)
+TRACK_ID_BLOCK = 100_000
+
+
+def load_camera_config(camera_name: str, path: str = CONFIG_FILE):
+    """Configuração da câmera (sobre os valores 'default') do cameras.json."""
+    config = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    merged = dict(config.get("default", {}))
+    for key, value in config.get(camera_name, {}).items():
+        # Seções (ex.: "sampling") são mescladas chave a chave
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = {**merged[key], **value}
+        merged[key] = value
+    return merged
+
+
+def _scale(points, frame_size):
+    return np.asarray(points, dtype=np.float64) * np.asarray(frame_size, dtype=np.float64)
+
+
+class DayAccumulator:
+    """Contagens, grade do heatmap e pontos de uma câmera em um dia (somáveis entre vídeos)."""
+
+    def __init__(self, camera_name: str, date_str: str, frame_size, config: dict):
+        self.camera_name = camera_name
+        self.date_str = date_str
+        self.frame_size = tuple(frame_size)
+        self.config = config
+        width, height = self.frame_size
+        # Índice 0 (TOTAL_PERIOD) = dia inteiro; 1..PERIODS = períodos
+        self.tracks = [set() for _ in range(PERIODS + 1)]
+        self.entries = np.zeros(PERIODS + 1, dtype=np.int64)
+        self.covered = np.zeros(PERIODS + 1, dtype=bool)
+        self.grid = np.zeros((PERIODS + 1, max(1, height // CELL_SIZE), max(1, width // CELL_SIZE)), dtype=np.float32)
+        self.background = None
+        self.stats = {
+            "videos": 0, "frames_read": 0, "frames_sampled": 0, "frames_detected": 0,
+            "frames_interpolated": 0, "detections": 0, "seconds": 0.0,
+        }
+        self._points = []
+        self._sides = {}
+        self._entered = set()
+        line = config.get("entry_line")
+        self._entry_line = _scale(line, self.frame_size) if line else None
+
+    def add(self, t: float, feet: np.ndarray, track_ids: np.ndarray, weight: float = 1.0):
+        """Soma os pontos de apoio (K, 2) de uma amostra no instante t com o peso da amostra."""
+        period = period_of(t)
+        if period:
+            self.covered[period] = True
+        self.covered[TOTAL_PERIOD] = True
+        if len(feet) == 0:
+            return
+        self._points.append(
+            np.column_stack([np.full(len(feet), t), feet, track_ids, np.full(len(feet), weight)]).astype(np.float32)
+        )
+
+        ids = track_ids.tolist()
+        self.tracks[TOTAL_PERIOD].update(ids)
+        rows = np.clip((feet[:, 1] // CELL_SIZE).astype(np.intp), 0, self.grid.shape[1] - 1)
+        cols = np.clip((feet[:, 0] // CELL_SIZE).astype(np.intp), 0, self.grid.shape[2] - 1)
+        np.add.at(self.grid[TOTAL_PERIOD], (rows, cols), weight)
+        if period:
+            self.tracks[period].update(ids)
+            np.add.at(self.grid[period], (rows, cols), weight)
+
+        if self._entry_line is not None:
+            self._count_entries(period, feet, ids)
+
+    def _count_entries(self, period, feet, ids):
+        (x1, y1), (x2, y2) = self._entry_line
+        sides = np.sign((x2 - x1) * (feet[:, 1] - y1) - (y2 - y1) * (feet[:, 0] - x1))
+        for track, side in zip(ids, sides.tolist()):
+            previous = self._sides.get(track)
+            if side != 0:
+                self._sides[track] = side
+            if previous is not None and previous < 0 < side and track not in self._entered:
+                self._entered.add(track)
+                self.entries[TOTAL_PERIOD] += 1
+                if period:
+                    self.entries[period] += 1
+
+    def merge(self, other):
+        """Soma o resultado de outro vídeo da mesma câmera e dia."""
+        for mine, theirs in zip(self.tracks, other.tracks):
+            mine.update(theirs)
+        self.entries += other.entries
+        self.covered |= other.covered
+        self.grid += other.grid
+        self._points.extend(other._points)
+        if self.background is None:
+            self.background = other.background
+        for key, value in other.stats.items():
+            self.stats[key] += value
+
+    def points(self):
+        """Array (N, 5) float32 com (t, x, y, trilha, peso), ordenado por t."""
+        if not self._points:
+            return np.zeros((0, 5), dtype=np.float32)
+        points = np.concatenate(self._points)
+        return points[np.argsort(points[:, 0], kind="stable")]
+
+    def queue_records(self, points: np.ndarray):
+        """Passagens pelas filas configuradas (queue_analytics.dwell_records), ou None sem filas."""
+        zones = self.config.get("queue_zones") or {}
+        if not zones:
+            return None
+        return queue_analytics.dwell_records(
+            points,
+            {int(number): _scale(polygon, self.frame_size) for number, polygon in zones.items()},
+            min_dwell_s=float(self.config.get("min_queue_s", queue_analytics.MIN_DWELL_S)),
+        )
+
+    # --- Gravação no layout lido pelo dashboard ---
+    def write(self, output_dir: str = OUTPUT_DIR):
+        """Grava os arquivos do dia em <output_dir>/<câmera>/<data>/. Retorna a pasta."""
+        day_dir = os.path.join(output_dir, self.camera_name, self.date_str)
+        periods = [p for p in range(1, PERIODS + 1) if self.covered[p]]
+        points = self.points()
+
+        people = [len(self.tracks[p]) for p in periods]
+        _write_csv(
+            os.path.join(day_dir, SOURCES["people_count"]),
+            ["Período", "Número de Pessoas"],
+            list(zip(periods, people)) + [("Total", len(self.tracks[TOTAL_PERIOD]))],
+        )
+        if self._entry_line is not None:
+            _write_csv(
+                os.path.join(day_dir, SOURCES["people_total"]),
+                ["Período", "Entradas"],
+                [(p, int(self.entries[p])) for p in periods] + [("Total", int(self.entries[TOTAL_PERIOD]))],
+            )
+        records = self.queue_records(points)
+        if records is not None:
+            dwell_csv = queue_analytics.to_csv_frame(records)
+            _save_atomic(
+                os.path.join(day_dir, queue_analytics.DWELL_FILE),
+                lambda tmp: dwell_csv.to_csv(tmp, index=False, encoding="utf-8"),
+            )
+            means = queue_analytics.period_stats(records)["mean"]
+            for number in sorted(int(n) for n in self.config["queue_zones"]):
+                _write_csv(
+                    os.path.join(day_dir, "queue", f"queue_time{number}.csv"),
+                    ["Período", "Tempo Médio (s)"],
+                    [(p, round(float(means[(number, p)]), 2)) for p in periods if (number, p) in means.index],
+                )
+
+        heatmaps_dir = os.path.join(day_dir, "heatmaps")
+        for p, stem in [(p, f"heatmap_interval_{p}") for p in periods] + [(TOTAL_PERIOD, "heatmap_total")]:
+            # Grade bruta (float32) ao lado do PNG: o dashboard aplica escala de cor e normalização na hora
+            grid = smooth(self.grid[p])
+            _save_atomic(os.path.join(heatmaps_dir, f"{stem}.npy"), lambda tmp: _save_npy(tmp, grid))
+            img = self._heatmap_image(grid)
+            _save_atomic(os.path.join(heatmaps_dir, f"{stem}.png"), lambda tmp: img.save(tmp, format="PNG"))
+        if self.background is not None:
+            _save_atomic(
+                os.path.join(heatmaps_dir, BACKGROUND_FILE),
+                lambda tmp: self.background.save(tmp, format="JPEG", quality=85),
+            )
+
+        points_dir = os.path.join(day_dir, "points")
+        _save_atomic(os.path.join(points_dir, "detections.npy"), lambda tmp: _save_npy(tmp, points))
+        # points() ordena por t: o dashboard confia nisso para ler só a janela pedida
+        meta = {"width": self.frame_size[0], "height": self.frame_size[1], "sorted_by_time": True, **self.stats}
+        _save_atomic(os.path.join(points_dir, "meta.json"), lambda tmp: _save_json(tmp, meta))
+        return day_dir
+
+    def _heatmap_image(self, grid: np.ndarray):
+        heat = colorize(grid, self.frame_size)
+        if self.background is None:
+            return heat
+        return Image.blend(self.background, heat, HEATMAP_ALPHA)
+
+
+def _save_atomic(path: str, save):
+    """Grava via save(caminho_temporário) e troca o arquivo de uma vez (o dashboard nunca lê pela metade)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_npy(path: str, array: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+def _save_json(path: str, data: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def _write_csv(path: str, columns, rows):
+    df = pd.DataFrame(rows, columns=columns)
+    _save_atomic(path, lambda tmp: df.to_csv(tmp, index=False, encoding="utf-8"))
+
+
+# --- Processamento de um vídeo (executado nos processos do pool) ---
+_detector = None
+
+
+def _load_detector(detector_name: str, detector_kwargs: dict, threads: int):
+    """Carrega o detector uma vez por processo e limita as threads de cada um."""
+    global _detector
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _detector = create_detector(detector_name, **detector_kwargs)
+
+
+def _interpolate(previous, current, t: float):
+    """
+    Pontos (feet, ids) no instante t entre duas detecções: trilhas presentes
+    nas duas são interpoladas linearmente; as demais ficam com a detecção
+    mais próxima no tempo.
+    """
+    t0, feet0, ids0 = previous
+    if current is None:
+        return feet0, ids0
+    t1, feet1, ids1 = current
+    frac = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+    common, i0, i1 = np.intersect1d(ids0, ids1, return_indices=True)
+    feet = [feet0[i0] + frac * (feet1[i1] - feet0[i0])]
+    ids = [common]
+    if frac < 0.5:
+        only = ~np.isin(ids0, common)
+        feet.append(feet0[only])
+        ids.append(ids0[only])
+    else:
+        only = ~np.isin(ids1, common)
+        feet.append(feet1[only])
+        ids.append(ids1[only])
+    return np.concatenate(feet), np.concatenate(ids)
+
+
+def process_video(camera_name: str, date_str: str, path: str, video_index: int = 0, config: dict | None = None, detector=None):
+    """Processa um vídeo e retorna o DayAccumulator com as suas detecções."""
+    detector = detector or _detector
+    config = config if config is not None else load_camera_config(camera_name)
+    policy = sampling.policy_for(config)
+    info = video.probe(path)
+    start_s = video.start_seconds(path)
+    if start_s is None:
+        raise ValueError(f"Horário inicial não encontrado no nome do vídeo (use HH-MM-SS): {path}")
+
+    started = time.perf_counter()
+    acc = DayAccumulator(camera_name, date_str, (info["width"], info["height"]), config)
+    # Uma trilha sobrevive a pelo menos duas amostras seguidas sem a pessoa (passo máximo)
+    tracker = Tracker(
+        first_id=video_index * TRACK_ID_BLOCK + 1,
+        max_age_s=max(MAX_AGE_S, 2 * policy["max_stride"] / info["fps"]),
+    )
+    batch_size = max(1, int(config.get("batch", 16)))
+    batch = []
+    # Última detecção (t, feet, ids) e amostras sem detector (t, peso) desde ela
+    state = {"last": None, "pending": []}
+
+    def add_pending(current):
+        for t, weight in state["pending"]:
+            if state["last"] is None:
+                acc.add(t, np.zeros((0, 2)), np.zeros(0, dtype=np.int64), weight)
+            else:
+                feet, ids = _interpolate(state["last"], current, t)
+                acc.add(t, feet, ids, weight)
+        state["pending"].clear()
+
+    def flush():
+        results = iter(detector.detect([frame for _, frame, detect, _ in batch if detect]))
+        for t, _, detect, weight in batch:
+            if not detect:
+                tracker.keep_alive(t)
+                state["pending"].append((t, weight))
+                continue
+            boxes = next(results)
+            feet = foot_points(boxes)
+            ids = tracker.update(t, feet)
+            acc.stats["detections"] += len(boxes)
+            add_pending((t, feet, ids))
+            acc.add(t, feet, ids, weight)
+            state["last"] = (t, feet, ids)
+        batch.clear()
+
+    for t, frame, detect, weight in sampling.iter_samples(path, start_s, policy, acc.stats):
+        if acc.background is None:
+            acc.background = Image.fromarray(frame[:, :, ::-1].copy())
+        # Amostras sem detector não precisam guardar o quadro
+        batch.append((t, frame if detect else None, detect, weight))
+        if sum(1 for item in batch if item[2]) >= batch_size:
+            flush()
+    flush()
+    add_pending(None)
+
+    acc.stats["videos"] = 1
+    acc.stats["seconds"] = round(time.perf_counter() - started, 3)
+    return acc
+
+
+def run(video_root: str, output_dir: str = OUTPUT_DIR, detector: str = "yolo", detector_kwargs: dict | None = None,
+        workers: int = MAX_WORKERS, cameras=None, dates=None):
+    """
+    Processa todos os vídeos de <video_root>/<câmera>/<data>/ em paralelo e
+    grava os arquivos de cada dia. Retorna {(câmera, data): estatísticas}.
+    """
+    jobs = video.find_videos(video_root)
+    jobs = {
+        key: paths for key, paths in jobs.items()
+        if (not cameras or key[0] in cameras) and (not dates or key[1] in dates)
+    }
+    if not jobs:
+        return {}
+
+    detector_kwargs = detector_kwargs or {}
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    with spawn_pool(workers, _load_detector, (detector, detector_kwargs, threads)) as executor:
+        futures = {
+            key: [
+                executor.submit(process_video, key[0], key[1], path, i, load_camera_config(key[0]))
+                for i, path in enumerate(paths)
+            ]
+            for key, paths in jobs.items()
+        }
+        summary = {}
+        for (camera_name, date_str), day_futures in futures.items():
+            try:
+                partials = [future.result() for future in day_futures]
+            except Exception as e:
+                print(f"⚠️ Erro ao processar {camera_name}/{date_str}: {e}")
+                continue
+            acc = partials[0]
+            for partial in partials[1:]:
+                acc.merge(partial)
+            acc.write(output_dir)
+            summary[(camera_name, date_str)] = {**sampling.summarize(acc.stats), "seconds": acc.stats["seconds"]}
+    return summary
+
+
+def write_demo_videos(video_root: str, date_str: str = "2025-10-07", cameras=("camera11", "camera3")):
+    """Cria vídeos sintéticos curtos (dois por câmera) para testar o pipeline."""
+    for seed, camera_name in enumerate(cameras):
+        for hour in (9, 14):
+            path = os.path.join(video_root, camera_name, date_str, f"{hour:02d}-00-00.mp4")
+            if not os.path.exists(path):
+                video.write_synthetic_video(path, seconds=30, people=4, seed=seed * 100 + hour)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os arquivos do dashboard a partir dos vídeos das câmeras.")
+    parser.add_argument("videos", help="pasta <câmera>/<data>/<HH-MM-SS>.mp4")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="pasta de saída (padrão: data/detections)")
+    parser.add_argument("--detector", default="yolo", choices=["yolo", "fake"])
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="modelo YOLO (ex.: yolov8n.pt)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--camera", action="append", help="processa só estas câmeras")
+    parser.add_argument("--date", action="append", help="processa só estas datas")
+    parser.add_argument("--demo", action="store_true", help="cria vídeos sintéticos e usa o FakeDetector")
+    args = parser.parse_args()
+
+    if args.demo:
+        write_demo_videos(args.videos)
+        args.detector = "fake"
+    kwargs = {"model": args.model} if args.detector == "yolo" else {}
+    result = run(args.videos, args.out, args.detector, kwargs, args.workers, args.camera, args.date)
+    if not result:
+        print("⚠️ Nenhum vídeo processado.")
+    else:
+        # Relatório: quadros com detector x quadros interpolados ou pulados
+        report = pd.DataFrame(
+            [{"câmera": c, "data": d, **stats} for (c, d), stats in sorted(result.items())]
+        )
+        print(report.to_string(index=False))
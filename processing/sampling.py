@@ -0,0 +1,130 @@
+# processing/sampling.py
+"""Amostragem adaptativa dos quadros, controlada pelo movimento na cena."""
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+DEFAULT_POLICY = {
+    "mode": "adaptive",        # "adaptive" ou "fixed"
+    "stride": 5,               # passo normal (quadros)
+    "min_stride": 2,           # passo com movimento alto
+    "max_stride": 25,          # passo máximo com a cena parada
+    "method": "diff",          # "diff" (diferença de quadros) ou "mog2" (subtração de fundo)
+    "motion_threshold": 0.002, # fração de pixels alterados abaixo da qual a cena é considerada parada
+    "high_motion": 0.02,       # fração acima da qual o movimento é alto
+    "max_skip_s": 10.0,        # intervalo máximo sem rodar o detector
+    "motion_width": 160,       # largura (px) da cópia usada para medir o movimento
+}
+
+
+def policy_for(config: dict):
+    """Política de amostragem da câmera (DEFAULT_POLICY + 'sampling' da configuração)."""
+    policy = dict(DEFAULT_POLICY)
+    policy.update(config.get("sampling") or {})
+    policy["stride"] = max(1, int(policy["stride"]))
+    policy["min_stride"] = max(1, min(int(policy["min_stride"]), policy["stride"]))
+    policy["max_stride"] = max(policy["stride"], int(policy["max_stride"]))
+    return policy
+
+
+class MotionGate:
+    """Fração de pixels com movimento em cada quadro (diferença de quadros ou MOG2)."""
+
+    def __init__(self, method: str = "diff", width: int = 160, pixel_threshold: int = 25):
+        if cv2 is None:
+            raise ImportError("A amostragem adaptativa requer o OpenCV (pip install opencv-python).")
+        self.method = method
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self._previous = None
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == "mog2" else None
+
+    def score(self, frame: np.ndarray):
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, height * self.width // width)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self._subtractor is not None:
+            mask = self._subtractor.apply(gray)
+            return float(np.count_nonzero(mask)) / mask.size
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            return 1.0
+        diff = cv2.absdiff(gray, previous)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+
+def iter_samples(path: str, start_s: float, policy: dict, report: dict | None = None):
+    """
+    Gera (t, quadro, detectar, peso) das amostras do vídeo conforme a política.
+    Se 'report' for informado, soma nele frames_read, frames_sampled,
+    frames_detected e frames_interpolated.
+    """
+    if cv2 is None:
+        raise ImportError("A amostragem de vídeo requer o OpenCV (pip install opencv-python).")
+    report = report if report is not None else {}
+    for key in ("frames_read", "frames_sampled", "frames_detected", "frames_interpolated"):
+        report.setdefault(key, 0)
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"Não foi possível abrir o vídeo: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    adaptive = policy["mode"] == "adaptive"
+    gate = MotionGate(policy["method"], policy["motion_width"]) if adaptive else None
+    base = policy["stride"]
+    stride = base
+    index = -1
+    next_index = 0
+    last_sample = None
+    last_detection_t = None
+    try:
+        while cap.grab():
+            index += 1
+            report["frames_read"] += 1
+            if index < next_index:
+                continue
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            report["frames_sampled"] += 1
+            t = start_s + index / fps
+            weight = (index - last_sample if last_sample is not None else base) / base
+            last_sample = index
+
+            detect = True
+            if adaptive:
+                motion = gate.score(frame)
+                overdue = last_detection_t is None or t - last_detection_t >= policy["max_skip_s"]
+                if motion >= policy["high_motion"]:
+                    stride = policy["min_stride"]
+                elif motion < policy["motion_threshold"] and not overdue:
+                    detect = False
+                    stride = min(stride * 2, policy["max_stride"])
+                else:
+                    stride = base
+            next_index = index + stride
+
+            if detect:
+                last_detection_t = t
+                report["frames_detected"] += 1
+            else:
+                report["frames_interpolated"] += 1
+            yield t, frame, detect, weight
+    finally:
+        cap.release()
+
+
+def summarize(report: dict):
+    """Resumo: quadros lidos, com detector, interpolados (sem detector) e pulados pelo passo."""
+    read = report.get("frames_read", 0)
+    detected = report.get("frames_detected", 0)
+    return {
+        "frames_read": read,
+        "frames_detected": detected,
+        "frames_interpolated": report.get("frames_interpolated", 0),
+        "frames_skipped": read - report.get("frames_sampled", 0),
+        "detector_share": round(detected / read, 4) if read else 0.0,
+    }
@@ -0,0 +1,63 @@
+# processing/tracking.py
+"""Rastreamento simples por proximidade dos pontos de apoio."""
+import numpy as np
+
+# Distância máxima (px por segundo desde a última posição, com um mínimo) para associar
+MAX_SPEED_PX_S = 250.0
+MIN_DISTANCE_PX = 40.0
+
+# Tempo sem detecção até a trilha ser encerrada
+MAX_AGE_S = 2.0
+
+
+def foot_points(boxes: np.ndarray):
+    """Ponto de apoio (centro da base) de cada caixa (K, 2)."""
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+
+
+class Tracker:
+    """Associa as detecções de quadros consecutivos a ids de trilha."""
+
+    def __init__(self, first_id: int = 1, max_age_s: float = MAX_AGE_S):
+        self.max_age_s = max_age_s
+        self._next_id = first_id
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._points = np.zeros((0, 2))
+        self._seen = np.zeros(0)
+
+    def keep_alive(self, t: float):
+        """Renova todas as trilhas em uma amostra sem detector (cena parada: ninguém saiu)."""
+        self._seen[:] = t
+
+    def update(self, t: float, points: np.ndarray):
+        """Ids (K,) das detecções do quadro no instante t."""
+        alive = (t - self._seen) <= self.max_age_s
+        self._ids, self._points, self._seen = self._ids[alive], self._points[alive], self._seen[alive]
+
+        ids = np.zeros(len(points), dtype=np.int64)
+        matched = np.zeros(len(points), dtype=bool)
+        if len(points) and len(self._ids):
+            dist = np.linalg.norm(points[:, None, :] - self._points[None, :, :], axis=2)
+            limit = np.maximum(MIN_DISTANCE_PX, MAX_SPEED_PX_S * (t - self._seen))
+            dist[dist > limit[None, :]] = np.inf
+            # Associação gulosa: pares mais próximos primeiro
+            for flat in np.argsort(dist, axis=None):
+                det, trk = np.unravel_index(flat, dist.shape)
+                if not np.isfinite(dist[det, trk]):
+                    break
+                if matched[det] or self._seen[trk] == t:
+                    continue
+                ids[det] = self._ids[trk]
+                matched[det] = True
+                self._points[trk] = points[det]
+                self._seen[trk] = t
+
+        new = ~matched
+        if new.any():
+            new_ids = np.arange(self._next_id, self._next_id + new.sum())
+            self._next_id += len(new_ids)
+            ids[new] = new_ids
+            self._ids = np.concatenate([self._ids, new_ids])
+            self._points = np.concatenate([self._points, points[new]])
+            self._seen = np.concatenate([self._seen, np.full(len(new_ids), t)])
+        return ids
@@ -0,0 +1,128 @@
+# processing/video.py
+"""Leitura dos vídeos das câmeras com salto de quadros (frame striding)."""
+import os
+import re
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # o pipeline exige o OpenCV; o erro é mostrado ao abrir um vídeo
+    cv2 = None
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+
+# HH-MM-SS, HH_MM_SS, HH:MM:SS ou HHMMSS no nome do arquivo
+_START_PATTERN = re.compile(r"(\d{2})[-_:h]?(\d{2})[-_:m]?(\d{2})")
+
+
+def _require_cv2():
+    if cv2 is None:
+        raise ImportError("O processamento de vídeo requer o OpenCV (pip install opencv-python).")
+
+
+def probe(path: str):
+    """{"fps", "frames", "width", "height"} do vídeo."""
+    _require_cv2()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"Não foi possível abrir o vídeo: {path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        return {
+            "fps": fps if fps > 0 else 25.0,
+            "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0),
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def start_seconds(path: str):
+    """Horário do primeiro quadro (segundos desde 00:00) a partir do nome do arquivo, ou None."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = _START_PATTERN.search(stem)
+    if match is None:
+        return None
+    hours, minutes, seconds = (int(g) for g in match.groups())
+    if hours > 23 or minutes > 59 or seconds > 59:
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def iter_frames(path: str, stride: int = 1, start_s: float = 0.0):
+    """
+    Gera (índice, t, quadro BGR) de 1 a cada 'stride' quadros do vídeo, onde t
+    é start_s + posição do quadro no vídeo (segundos).
+    Os quadros pulados são apenas avançados (grab), sem conversão para BGR.
+    """
+    _require_cv2()
+    stride = max(1, int(stride))
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"Não foi possível abrir o vídeo: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    index = 0
+    try:
+        while True:
+            if not cap.grab():
+                break
+            if index % stride == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                yield index, start_s + index / fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def find_videos(root: str):
+    """{(câmera, data): [vídeos em ordem]} das pastas <root>/<câmera>/<data>/."""
+    jobs = {}
+    for camera_name in sorted(os.listdir(root)):
+        camera_dir = os.path.join(root, camera_name)
+        if not os.path.isdir(camera_dir):
+            continue
+        for date_str in sorted(os.listdir(camera_dir)):
+            date_dir = os.path.join(camera_dir, date_str)
+            if not os.path.isdir(date_dir):
+                continue
+            videos = sorted(
+                os.path.join(date_dir, name)
+                for name in os.listdir(date_dir)
+                if name.lower().endswith(VIDEO_EXTENSIONS)
+            )
+            if videos:
+                jobs[(camera_name, date_str)] = videos
+    return jobs
+
+
+def write_synthetic_video(path: str, seconds: float = 60, fps: int = 10, size=(640, 360), people: int = 5, seed: int = 0):
+    """
+    Grava um vídeo sintético (fundo escuro com retângulos claros caminhando),
+    usado para testar o pipeline com o FakeDetector sem câmeras nem modelo.
+    """
+    _require_cv2()
+    width, height = size
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([20, 40], [width - 40, height - 20], size=(people, 2))
+    vel = rng.uniform(-40, 40, size=(people, 2)) / fps
+    background = np.full((height, width, 3), 40, dtype=np.uint8)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for _ in range(int(seconds * fps)):
+            frame = background.copy()
+            pos += vel
+            bounce = (pos < [10, 40]) | (pos > [width - 30, height - 10])
+            vel[bounce] *= -1
+            pos = np.clip(pos, [10, 40], [width - 30, height - 10])
+            for x, y in pos.astype(int):
+                # (x, y) é o ponto de apoio (centro da base) da "pessoa"
+                cv2.rectangle(frame, (x - 10, y - 40), (x + 10, y), (230, 230, 230), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
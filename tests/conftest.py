@@ -0,0 +1,14 @@
+# tests/conftest.py
+"""Configuração dos testes: dados e estado derivado em pastas temporárias."""
+import os
+import sys
+import tempfile
+
+# Precisa vir antes de importar components.config (os caminhos são lidos na importação)
+_ROOT = tempfile.mkdtemp(prefix="smartaware-tests-")
+os.environ["SMARTAWARE_DATA_DIR"] = os.path.join(_ROOT, "data")
+os.environ["SMARTAWARE_STATE_DIR"] = os.path.join(_ROOT, "state")
+os.environ["SMARTAWARE_STORES_FILE"] = os.path.join(_ROOT, "stores.json")
+os.environ["SMARTAWARE_BACKEND"] = "local"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
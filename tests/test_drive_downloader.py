@@ -0,0 +1,166 @@
+# tests/test_drive_downloader.py
+"""DownloadManager contra uma pasta local fazendo o papel do backend remoto."""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from components import drive_downloader
+from components.datasource import LocalSource, _version_path
+from components.drive_downloader import PRIORITY_PREFETCH, PRIORITY_VIEW, DownloadManager
+
+CAMERA = "camera11"
+DATE = "2025-10-07"
+
+FILES = {
+    "count/people_total.csv": b"Periodo,Entradas\n1,10\nTotal,10\n",
+    "queue/queue_time1.csv": b"Periodo,Tempo Medio (s)\n1,42.5\n",
+    "heatmaps/heatmap_total.png": bytes(range(256)) * 64,
+    "video.mp4": b"ignorado",
+}
+
+
+class RecordingSource(LocalSource):
+    """LocalSource que registra as chamadas e pode segurar as listagens até ser liberada."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.listed = []
+        self.fetched = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self._lock = threading.Lock()
+
+    def list_files(self, camera_name, date_str):
+        self.entered.set()
+        self.gate.wait(10)
+        with self._lock:
+            self.listed.append((camera_name, date_str))
+        return super().list_files(camera_name, date_str)
+
+    def fetch(self, camera_name, date_str, relative_path, ref, dest_path):
+        offset = os.path.getsize(dest_path) if os.path.exists(dest_path) else 0
+        with self._lock:
+            self.fetched.append((relative_path, offset))
+        super().fetch(camera_name, date_str, relative_path, ref, dest_path)
+
+
+def _write_tree(root, camera_name=CAMERA, date_str=DATE, files=FILES):
+    for relative, content in files.items():
+        path = os.path.join(root, camera_name, date_str, *relative.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+
+@pytest.fixture
+def source(tmp_path):
+    _write_tree(str(tmp_path / "remote"))
+    return RecordingSource(str(tmp_path / "remote"))
+
+
+@pytest.fixture
+def manager(source, tmp_path):
+    return DownloadManager(source, base_dir=str(tmp_path / "local"), max_workers=2)
+
+
+def _read(manager, relative):
+    with open(os.path.join(manager.base_dir, CAMERA, DATE, *relative.split("/")), "rb") as f:
+        return f.read()
+
+
+def test_downloads_only_wanted_files(manager):
+    assert manager.request(CAMERA, DATE).result(timeout=10) == "complete"
+    assert manager.status(CAMERA, DATE) == "complete"
+    for relative, content in FILES.items():
+        if drive_downloader.is_wanted(relative):
+            assert _read(manager, relative) == content
+    assert not os.path.exists(os.path.join(manager.base_dir, CAMERA, DATE, "video.mp4"))
+
+
+def test_concurrent_requests_share_one_download(manager, source):
+    source.gate.clear()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        jobs = list(pool.map(lambda _: manager.request(CAMERA, DATE), range(8)))
+    assert all(job is jobs[0] for job in jobs)
+    assert manager.status(CAMERA, DATE) == "pending"
+
+    source.gate.set()
+    assert jobs[0].result(timeout=10) == "complete"
+    assert source.listed == [(CAMERA, DATE)]
+    assert len(source.fetched) == 3
+
+    # Pasta completa: um novo pedido responde na hora, sem listar nem baixar de novo
+    again = manager.request(CAMERA, DATE)
+    assert again.done() and again.result() == "complete"
+    assert source.listed == [(CAMERA, DATE)]
+
+
+def test_partial_folder_resumes_from_manifest(manager, source):
+    assert manager.request(CAMERA, DATE).result(timeout=10) == "complete"
+
+    # Simula uma interrupção: um arquivo nunca chegou e outro parou no meio (.part)
+    folder = os.path.join(manager.base_dir, CAMERA, DATE)
+    os.remove(os.path.join(folder, "queue", "queue_time1.csv"))
+    image = os.path.join(folder, "heatmaps", "heatmap_total.png")
+    content = FILES["heatmaps/heatmap_total.png"]
+    os.remove(image)
+    remote = os.stat(os.path.join(source.root, CAMERA, DATE, "heatmaps", "heatmap_total.png"))
+    version = {"size": remote.st_size, "mtime_ns": remote.st_mtime_ns}
+    with open(f"{image}.part", "wb") as f:
+        f.write(content[:1000])
+    with open(_version_path(f"{image}.part"), "w", encoding="utf-8") as f:
+        json.dump(version, f)
+    assert manager.status(CAMERA, DATE) == "partial"
+
+    source.fetched.clear()
+    assert manager.request(CAMERA, DATE).result(timeout=10) == "complete"
+
+    # Só o que faltava foi baixado, sem relistar a pasta, e o parcial continuou de onde parou
+    assert source.listed == [(CAMERA, DATE)]
+    assert sorted(source.fetched) == [("heatmaps/heatmap_total.png", 1000), ("queue/queue_time1.csv", 0)]
+    assert _read(manager, "heatmaps/heatmap_total.png") == content
+    assert _read(manager, "queue/queue_time1.csv") == FILES["queue/queue_time1.csv"]
+    assert manager.status(CAMERA, DATE) == "complete"
+
+
+def test_prefetch_window(manager, monkeypatch):
+    requested = []
+    monkeypatch.setattr(manager, "request", lambda cam, d, priority=PRIORITY_VIEW: requested.append((cam, d, priority)))
+
+    manager.prefetch("camera1", DATE, entrance_camera=CAMERA)
+
+    assert all(priority == PRIORITY_PREFETCH for _, _, priority in requested)
+    wanted = {(cam, d) for cam, d, _ in requested}
+    assert wanted == {
+        (CAMERA, DATE),
+        ("camera1", "2025-10-06"),
+        ("camera1", "2025-10-08"),
+        *((CAMERA, f"2025-09-{day:02d}") for day in range(22, 31)),
+        *((CAMERA, f"2025-10-{day:02d}") for day in range(1, 7)),
+    }
+    assert len(requested) == 3 + drive_downloader.ENTRIES_WINDOW_DAYS
+
+
+def test_view_request_runs_before_prefetch(source, tmp_path):
+    for day in range(1, 6):
+        _write_tree(source.root, date_str=f"2025-10-0{day}")
+    manager = DownloadManager(source, base_dir=str(tmp_path / "local"), max_workers=1)
+
+    # O único worker fica preso na primeira pasta enquanto a fila se forma
+    source.gate.clear()
+    first = manager.request(CAMERA, "2025-10-01", PRIORITY_PREFETCH)
+    assert source.entered.wait(10)
+    prefetched = [manager.request(CAMERA, f"2025-10-0{day}", PRIORITY_PREFETCH) for day in (2, 3, 4)]
+    # Um pedido de pré-carregamento que a tela passa a pedir sobe de prioridade
+    promoted = manager.request(CAMERA, "2025-10-04", PRIORITY_VIEW)
+    assert promoted is prefetched[-1]
+    view = manager.request(CAMERA, "2025-10-05", PRIORITY_VIEW)
+    source.gate.set()
+
+    for job in [first, view, *prefetched]:
+        assert job.result(timeout=10) == "complete"
+    assert [d for _, d in source.listed] == ["2025-10-01", "2025-10-04", "2025-10-05", "2025-10-02", "2025-10-03"]
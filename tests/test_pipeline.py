@@ -0,0 +1,78 @@
+# tests/test_pipeline.py
+"""Pipeline de ponta a ponta na CPU: vídeo sintético -> FakeDetector -> arquivos lidos pelo dashboard."""
+import math
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("cv2")
+
+from components import metrics_store
+from components.day_snapshot import get_day_snapshot
+from processing import pipeline, video
+
+CAMERA = "camera11"
+DATE = "2025-10-07"
+# O vídeo começa às 09:00 -> período 2 (09:00 – 10:00)
+PERIOD = 2
+
+
+@pytest.fixture(scope="module")
+def day_dir(tmp_path_factory):
+    video_root = str(tmp_path_factory.mktemp("videos"))
+    video.write_synthetic_video(os.path.join(video_root, CAMERA, DATE, "09-00-00.mp4"), seconds=20, people=4, seed=9)
+    # Grava direto na árvore lida pelos componentes (config.BASE_DIR dos testes)
+    summary = pipeline.run(video_root, metrics_store.BASE_DIR, detector="fake", workers=1)
+    assert summary[(CAMERA, DATE)]["frames_detected"] > 0
+    return os.path.join(metrics_store.BASE_DIR, CAMERA, DATE)
+
+
+def test_writes_dashboard_layout(day_dir):
+    expected = [
+        "count/people_count.csv",
+        "count/people_total.csv",
+        "queue/queue_time1.csv",
+        "queue/queue_time2.csv",
+        "queue/dwell.csv",
+        f"heatmaps/heatmap_interval_{PERIOD}.png",
+        f"heatmaps/heatmap_interval_{PERIOD}.npy",
+        "heatmaps/heatmap_total.png",
+        "heatmaps/heatmap_total.npy",
+        "points/detections.npy",
+        "points/meta.json",
+    ]
+    for relative in expected:
+        assert os.path.isfile(os.path.join(day_dir, *relative.split("/"))), relative
+
+    with Image.open(os.path.join(day_dir, "heatmaps", "heatmap_total.png")) as img:
+        assert img.size == (640, 360)
+    points = np.load(os.path.join(day_dir, "points", "detections.npy"))
+    assert points.shape[1] == 5 and np.all(np.diff(points[:, 0]) >= 0)
+
+
+def test_metrics_store_reads_csvs(day_dir):
+    people = metrics_store.read_day_array(CAMERA, DATE, "people_count")
+    assert people[metrics_store.TOTAL_PERIOD] > 0 and people[PERIOD] > 0
+    entries = metrics_store.read_day_array(CAMERA, DATE, "people_total")
+    assert entries[metrics_store.TOTAL_PERIOD] == np.nansum(entries[1:])
+    for number in (1, 2):
+        assert metrics_store.read_day_array(CAMERA, DATE, f"queue{number}") is not None
+
+    # O banco por câmera importa os mesmos valores
+    assert metrics_store.get_metric(CAMERA, DATE, "people_count", PERIOD) == int(people[PERIOD])
+    assert metrics_store.has_data(CAMERA, DATE, "queue1")
+
+
+def test_day_snapshot_reads_csvs(day_dir):
+    snapshot = get_day_snapshot(CAMERA, DATE)
+    people = metrics_store.read_day_array(CAMERA, DATE, "people_count")
+    assert snapshot.people() == int(people[metrics_store.TOTAL_PERIOD])
+    assert snapshot.people(PERIOD) == int(people[PERIOD])
+    assert snapshot.entries() is not None
+    assert snapshot.has("queue1") and snapshot.has("queue2")
+    assert list(snapshot.period_values("people_count")) == [PERIOD]
+    assert snapshot.dwell is not None
+    for value in snapshot.queues():
+        assert value is None or not math.isnan(value)